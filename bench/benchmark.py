@@ -0,0 +1,189 @@
+"""
+Benchmark ponta a ponta do scraper contra o portal simulado.
+
+Sobe o portal simulado (bench/portal_simulado.py) em uma porta livre, aponta o
+ScrapNotaFiscal para ele, executa get_info e informa notas por minuto e a
+latência de cada fase (nfse_fase_duracao_segundos). Requer Chrome e
+chromedriver, como uma execução real.
+
+Uso:
+    python -m bench.benchmark --meses Janeiro Fevereiro --notas-por-mes 50 --modo-download http
+    python -m bench.benchmark --repeticoes 3 --saida resultado.json
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from bench.portal_simulado import PortalSimulado
+
+
+def _diferenca_fases(antes, depois):
+    """Durações por fase registradas entre dois resumos do histograma."""
+    fases = {}
+    for chave, atual in depois.items():
+        anterior = antes.get(chave, {"quantidade": 0, "soma": 0.0})
+        quantidade = atual["quantidade"] - anterior["quantidade"]
+        if quantidade <= 0:
+            continue
+        total = atual["soma"] - anterior["soma"]
+        fases[chave[0]] = {
+            "quantidade": quantidade,
+            "total": round(total, 3),
+            "media": round(total / quantidade, 3),
+        }
+    return dict(sorted(fases.items(), key=lambda item: item[1]["total"], reverse=True))
+
+
+def executar_benchmark(args):
+    """
+    Executa as repetições do benchmark.
+
+    Args:
+        args (argparse.Namespace): Opções da linha de comando
+
+    Returns:
+        dict: Configuração e resultado de cada repetição
+    """
+    portal = PortalSimulado(
+        notas_por_mes=args.notas_por_mes,
+        tamanho_pagina=args.tamanho_pagina,
+        taxa_canceladas=args.taxa_canceladas,
+        captcha=args.captcha,
+        latencia=args.latencia,
+        latencia_pesquisa=args.latencia_pesquisa,
+        latencia_download=args.latencia_download,
+        atraso_desenho=args.atraso_desenho,
+        url_no_botao=args.modo_download != "impressao",
+        formato_impressao="html" if args.modo_download == "cdp" else "pdf",
+    )
+    url = portal.iniciar()
+    temporario = tempfile.mkdtemp(prefix="nfse_benchmark_")
+    tenant = f"benchmark_{uuid.uuid4().hex[:8]}"
+
+    # Configuração do scraper: variáveis já definidas não são sobrescritas pelo .env
+    os.environ.update({
+        "URL_CNPJ": url,
+        "CAPTCHA_BACKEND": "fixo",
+        "CAPTCHA_FIXO": args.captcha,
+        "MODO_DOWNLOAD": args.modo_download,
+        "PAGINACAO": args.paginacao,
+        "ABAS_POR_SESSAO": str(args.abas_por_sessao),
+        "SESSAO_TTL": "0",
+        "S3_BUCKET": "",
+        "ARMAZEM_DIR": os.path.join(temporario, "objetos"),
+        "CHECKPOINT_DB": os.path.join(temporario, "checkpoints.sqlite3"),
+    })
+    if args.rastrear:
+        os.environ["RASTREAR_WEBDRIVER_DIR"] = os.path.join(temporario, "perfis")
+
+    # Importado após configurar o ambiente
+    from tasks.metricas import DURACAO_FASES
+    from tasks.scrap_nfse import ScrapNotaFiscal, diretorio_notas_tenant
+
+    resultado = {
+        "configuracao": {
+            "meses": args.meses,
+            "notas_por_mes": args.notas_por_mes,
+            "tamanho_pagina": args.tamanho_pagina,
+            "modo_download": args.modo_download,
+            "paginacao": args.paginacao,
+            "abas_por_sessao": args.abas_por_sessao,
+            "latencia": args.latencia,
+            "latencia_pesquisa": args.latencia_pesquisa,
+            "latencia_download": args.latencia_download,
+            "incremental": args.incremental,
+        },
+        "repeticoes": [],
+    }
+    try:
+        for repeticao in range(args.repeticoes):
+            # Sem --incremental cada repetição começa sem notas armazenadas
+            indice_manifesto = 0 if args.incremental else repeticao
+            os.environ["MANIFESTO_DB"] = os.path.join(temporario, f"manifesto_{indice_manifesto}.sqlite3")
+            if not args.incremental:
+                shutil.rmtree(diretorio_notas_tenant(tenant), ignore_errors=True)
+
+            scraper = ScrapNotaFiscal(
+                download_dir=os.path.join(temporario, f"downloads_{repeticao}"),
+                tenant=tenant,
+                cache_sessao=False,
+            )
+            driver = scraper.abrir_navegador(os.path.join(temporario, f"perfil_{repeticao}"))
+            fases_antes = DURACAO_FASES.resumo()
+            inicio = time.monotonic()
+            try:
+                arquivos = scraper.get_info(driver, "benchmark", "benchmark", args.meses)
+            finally:
+                duracao = time.monotonic() - inicio
+                driver.quit()
+
+            resultado["repeticoes"].append({
+                "repeticao": repeticao + 1,
+                "duracao": round(duracao, 3),
+                "notas_baixadas": len(arquivos),
+                "notas_por_minuto": round(len(arquivos) / duracao * 60, 1) if duracao else 0.0,
+                "fases": _diferenca_fases(fases_antes, DURACAO_FASES.resumo()),
+                "esperas": scraper.esperas.resumo(),
+            })
+        resultado["portal"] = dict(portal.estatisticas)
+        if args.rastrear:
+            resultado["perfis_webdriver"] = os.environ["RASTREAR_WEBDRIVER_DIR"]
+    finally:
+        portal.encerrar()
+        if not args.manter_arquivos:
+            shutil.rmtree(diretorio_notas_tenant(tenant), ignore_errors=True)
+            if not args.rastrear:
+                shutil.rmtree(temporario, ignore_errors=True)
+    return resultado
+
+
+def imprimir_resultado(resultado):
+    """Exibe o resumo das repetições no console."""
+    for execucao in resultado["repeticoes"]:
+        print(
+            f"\nRepetição {execucao['repeticao']}: {execucao['notas_baixadas']} notas em "
+            f"{execucao['duracao']}s ({execucao['notas_por_minuto']} notas/min)"
+        )
+        print(f"  {'fase':<22}{'qtd':>6}{'média (s)':>12}{'total (s)':>12}")
+        for fase, valores in execucao["fases"].items():
+            print(f"  {fase:<22}{valores['quantidade']:>6}{valores['media']:>12.3f}{valores['total']:>12.3f}")
+    if resultado.get("perfis_webdriver"):
+        print(f"\nPerfis WebDriver em {resultado['perfis_webdriver']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do scraper contra o portal simulado")
+    parser.add_argument("--meses", nargs="+", default=["Janeiro", "Fevereiro"])
+    parser.add_argument("--notas-por-mes", type=int, default=25)
+    parser.add_argument("--tamanho-pagina", type=int, default=10)
+    parser.add_argument("--taxa-canceladas", type=float, default=0.1)
+    parser.add_argument("--captcha", default="ABCD12")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso (s) de toda requisição ao portal")
+    parser.add_argument("--latencia-pesquisa", type=float, default=0.3)
+    parser.add_argument("--latencia-download", type=float, default=0.1)
+    parser.add_argument("--atraso-desenho", type=float, default=0.05)
+    parser.add_argument("--modo-download", choices=["impressao", "http", "cdp"], default="impressao")
+    parser.add_argument("--paginacao", choices=["completa", "ui"], default="completa")
+    parser.add_argument("--abas-por-sessao", type=int, default=1)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Mantém o manifesto entre repetições (mede a sincronização incremental)")
+    parser.add_argument("--rastrear", action="store_true", help="Grava o perfil de comandos WebDriver")
+    parser.add_argument("--manter-arquivos", action="store_true", help="Não remove os PDFs baixados")
+    parser.add_argument("--saida", help="Arquivo JSON com o resultado completo")
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(args)
+    imprimir_resultado(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultado gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,574 @@
+"""
+Portal de NFS-e simulado, servido localmente, para benchmarks e testes do scraper.
+
+Reproduz apenas o que o ScrapNotaFiscal usa do portal real: tela de login com
+captcha, frames de menu (fraMenu, fraMain > iFrameMenu), frame de pesquisa
+(ctl00_ContentPlaceHolder1_frmObras) com a tabela #tblNfse paginada, notas
+canceladas, modal de impressão e URL de impressão para os modos http/cdp.
+
+Uso:
+    python -m bench.portal_simulado --porta 8765 --notas-por-mes 50
+
+No .env do scraper: URL_CNPJ=http://127.0.0.1:8765/, CAPTCHA_BACKEND=fixo e
+CAPTCHA_FIXO com o mesmo código passado em --captcha.
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http import cookies
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MESES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+]
+
+_COOKIE_SESSAO = "ASP.NET_SessionId"
+
+_PAGINA_LOGIN = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Portal NFS-e (simulado)</title></head>
+<body>
+<form method="post" action="/">
+  <input id="txtLogin" name="txtLogin" type="text">
+  <input id="txtSenha" name="txtSenha" type="password">
+  <img id="imgNewCaptcha" src="/captcha.svg" width="120" height="40" alt="captcha">
+  <input id="txtCodeTextBox" name="txtCodeTextBox" type="text">
+  <input id="btnLogar" type="submit" value="Entrar">
+  <span id="lblMsg">{mensagem}</span>
+</form>
+</body></html>"""
+
+_PAGINA_PRINCIPAL = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Principal</title></head>
+<body>
+<iframe id="fraMenu" name="fraMenu" src="/menu" width="240" height="600"></iframe>
+<iframe id="fraMain" name="fraMain" src="/inicio" width="1000" height="600"></iframe>
+</body></html>"""
+
+_PAGINA_MENU = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body>
+<div id="td1_div5"><b><span style="cursor:pointer"
+  onclick="parent.frames['fraMain'].location.href='/nfse/menu'">Nota Fiscal</span></b></div>
+</body></html>"""
+
+_PAGINA_INICIO = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head><body><p>Bem-vindo</p></body></html>"""
+
+_PAGINA_MENU_NFSE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><iframe id="iFrameMenu" name="iFrameMenu" src="/nfse/submenu"></iframe></body></html>"""
+
+_PAGINA_SUBMENU_NFSE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><a href="/nfse/pesquisa" target="fraMain">Pesquisar NFS-e Recebidas (IFRAME)</a></body></html>"""
+
+_PAGINA_PESQUISA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><iframe id="ctl00_ContentPlaceHolder1_frmObras" src="/nfse/notas" width="980" height="560"></iframe></body></html>"""
+
+# Tabela com uma imitação mínima da API do DataTables usada pelo scraper
+# (jQuery.active, isDataTable, page.info(), page.len().draw())
+_PAGINA_NOTAS = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Notas</title>
+<style>
+.modal { display: none; }
+.modal.show { display: block; }
+#tblNfse_processing { display: none; }
+@media print {
+  body * { visibility: hidden; }
+  #modalImpressao .modal-body, #modalImpressao .modal-body * { visibility: visible; }
+}
+</style></head>
+<body>
+<select id="Mes">{opcoes}</select>
+<button id="btnPesquisar" type="button">Pesquisar</button>
+<div id="tblNfse_processing">Processando...</div>
+<table id="tblNfse">
+  <thead><tr><th></th><th>Número</th><th>Prestador</th><th>CNPJ</th><th>Emissão</th><th>Valor</th></tr></thead>
+  <tbody></tbody>
+</table>
+<ul class="pagination">
+  <li class="paginate_button page-item previous disabled"><a href="#">Anterior</a></li>
+  <li class="paginate_button page-item next disabled"><a href="#">Próximo</a></li>
+</ul>
+<div id="modalImpressao" class="modal">
+  <div class="modal-body"></div>
+  <div class="modal-footer">
+    <button type="button" class="btn btn-success">Imprimir</button>
+    <button type="button" class="btn btn-secondary">Fechar</button>
+  </div>
+</div>
+<script>
+var config = {config};
+var estado = {dados: [], pagina: 0, tamanho: config.tamanho_pagina, iniciada: false, nota: null};
+
+function pagina() { return estado.pagina; }
+pagina.info = function () {
+  return {
+    page: estado.pagina,
+    pages: Math.max(1, Math.ceil(estado.dados.length / estado.tamanho)),
+    length: estado.tamanho,
+    recordsDisplay: estado.dados.length
+  };
+};
+pagina.len = function (tamanho) {
+  estado.tamanho = tamanho;
+  estado.pagina = 0;
+  return {draw: desenhar};
+};
+var api = {page: pagina};
+window.jQuery = function () { return {DataTable: function () { return api; }}; };
+window.jQuery.active = 0;
+window.jQuery.fn = {dataTable: {isDataTable: function (seletor) {
+  return seletor === '#tblNfse' && estado.iniciada;
+}}};
+
+function processando(ativo) {
+  document.getElementById('tblNfse_processing').style.display = ativo ? 'block' : 'none';
+}
+
+function escapar(texto) {
+  var div = document.createElement('div');
+  div.textContent = texto;
+  return div.innerHTML;
+}
+
+function linhaHtml(nota) {
+  var url = config.url_no_botao ? ' data-url="/nfse/imprimir?id=' + nota.id + '"' : '';
+  return '<tr' + (nota.cancelada ? ' class="canceled"' : '') + '>' +
+    '<td class="action-column"><button type="button" data-action="imprimir" data-id="' + nota.id +
+    '" data-numero="' + nota.numero + '"' + url + '>Imprimir</button></td>' +
+    '<td>' + nota.numero + '</td><td>' + escapar(nota.prestador) + '</td><td>' + nota.cnpj + '</td>' +
+    '<td>' + nota.emissao + '</td><td>' + nota.valor + '</td></tr>';
+}
+
+// Redesenha a tabela após o atraso configurado, substituindo as linhas (as antigas ficam obsoletas)
+function desenhar() {
+  window.jQuery.active++;
+  processando(true);
+  setTimeout(function () {
+    var inicio = estado.pagina * estado.tamanho;
+    var notas = estado.dados.slice(inicio, inicio + estado.tamanho);
+    var corpo = notas.length ? notas.map(linhaHtml).join('')
+      : '<tr><td class="dataTables_empty" colspan="6">Nenhum registro encontrado</td></tr>';
+    document.querySelector('#tblNfse tbody').innerHTML = corpo;
+    var ultima = pagina.info().pages - 1;
+    document.querySelector('li.previous').className =
+      'paginate_button page-item previous' + (estado.pagina === 0 ? ' disabled' : '');
+    document.querySelector('li.next').className =
+      'paginate_button page-item next' + (estado.pagina >= ultima ? ' disabled' : '');
+    processando(false);
+    window.jQuery.active--;
+  }, config.atraso_desenho_ms);
+}
+
+document.getElementById('btnPesquisar').addEventListener('click', function () {
+  var mes = document.getElementById('Mes').value;
+  window.jQuery.active++;
+  processando(true);
+  fetch('/nfse/api/notas?mes=' + encodeURIComponent(mes))
+    .then(function (resposta) { return resposta.json(); })
+    .then(function (dados) {
+      estado.dados = dados;
+      estado.pagina = 0;
+      estado.tamanho = config.tamanho_pagina;
+      estado.iniciada = true;
+      window.jQuery.active--;
+      desenhar();
+    });
+});
+
+document.querySelector('li.next').addEventListener('click', function (evento) {
+  evento.preventDefault();
+  if (estado.pagina < pagina.info().pages - 1) { estado.pagina++; desenhar(); }
+});
+document.querySelector('li.previous').addEventListener('click', function (evento) {
+  evento.preventDefault();
+  if (estado.pagina > 0) { estado.pagina--; desenhar(); }
+});
+
+document.querySelector('#tblNfse tbody').addEventListener('click', function (evento) {
+  var botao = evento.target.closest("button[data-action='imprimir']");
+  if (!botao) { return; }
+  var nota = estado.dados.filter(function (n) { return String(n.id) === botao.getAttribute('data-id'); })[0];
+  estado.nota = nota;
+  document.querySelector('#modalImpressao .modal-body').innerHTML =
+    '<h1>NFS-e ' + nota.numero + '</h1><p>' + escapar(nota.prestador) + ' - ' + nota.cnpj +
+    '</p><p>Emissão: ' + nota.emissao + '</p><p>Valor: R$ ' + nota.valor + '</p>';
+  document.getElementById('modalImpressao').classList.add('show');
+});
+
+document.querySelector('.modal-footer .btn-success').addEventListener('click', function () {
+  // O Chrome em --kiosk-printing salva o PDF com o título da página como nome
+  document.title = 'NFSe_' + estado.nota.numero + '_' + Date.now();
+  window.print();
+});
+document.querySelector('.modal-footer .btn-secondary').addEventListener('click', function () {
+  document.getElementById('modalImpressao').classList.remove('show');
+});
+</script>
+</body></html>"""
+
+_PAGINA_IMPRESSAO = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>NFS-e {numero}</title></head>
+<body><h1>NFS-e {numero}</h1><p>{prestador} - {cnpj}</p><p>Emissão: {emissao}</p><p>Valor: R$ {valor}</p></body></html>"""
+
+
+def _escapar_pdf(texto):
+    """Escapa barras e parênteses de uma string literal do PDF."""
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def gerar_pdf(linhas):
+    """
+    Gera um PDF mínimo (uma página, fonte Helvetica) com as linhas de texto.
+
+    Args:
+        linhas (list): Linhas de texto ASCII
+
+    Returns:
+        bytes: Conteúdo do PDF
+    """
+    texto = "\n".join(
+        f"BT /F1 12 Tf 50 {780 - 18 * indice} Td ({_escapar_pdf(linha)}) Tj ET"
+        for indice, linha in enumerate(linhas)
+    ).encode("latin-1", "replace")
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(texto) + texto + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    conteudo = b"%PDF-1.4\n"
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(conteudo))
+        conteudo += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+    inicio_xref = len(conteudo)
+    conteudo += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    conteudo += b"".join(b"%010d 00000 n \n" % posicao for posicao in posicoes)
+    conteudo += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return conteudo
+
+
+class PortalSimulado:
+    """
+    Servidor HTTP local que imita o portal de NFS-e.
+
+    As notas de cada mês são geradas de forma determinística a partir da
+    semente, de modo que execuções repetidas veem os mesmos dados.
+    """
+
+    def __init__(
+        self,
+        notas_por_mes=25,
+        tamanho_pagina=10,
+        taxa_canceladas=0.1,
+        captcha="ABCD12",
+        latencia=0.0,
+        latencia_pesquisa=0.3,
+        latencia_download=0.1,
+        atraso_desenho=0.05,
+        url_no_botao=True,
+        formato_impressao="pdf",
+        semente=42,
+    ):
+        """
+        Args:
+            notas_por_mes (int): Quantidade de notas em cada mês
+            tamanho_pagina (int): Linhas por página da tabela
+            taxa_canceladas (float): Fração das notas marcadas como canceladas
+            captcha (str): Código aceito na tela de login
+            latencia (float): Atraso (s) aplicado a toda requisição
+            latencia_pesquisa (float): Atraso adicional (s) da pesquisa de um mês
+            latencia_download (float): Atraso adicional (s) da URL de impressão
+            atraso_desenho (float): Atraso (s) do redesenho da tabela no navegador
+            url_no_botao (bool): Expõe a URL de impressão em data-url (modos http/cdp)
+            formato_impressao (str): "pdf" (modo http) ou "html" (modo cdp)
+            semente (int): Semente dos dados gerados
+        """
+        self.notas_por_mes = notas_por_mes
+        self.tamanho_pagina = tamanho_pagina
+        self.taxa_canceladas = taxa_canceladas
+        self.captcha = captcha
+        self.latencia = latencia
+        self.latencia_pesquisa = latencia_pesquisa
+        self.latencia_download = latencia_download
+        self.atraso_desenho = atraso_desenho
+        self.url_no_botao = url_no_botao
+        self.formato_impressao = formato_impressao
+        self.semente = semente
+        self._sessoes = set()
+        self._notas = {}
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._thread = None
+        self.estatisticas = {"logins": 0, "logins_recusados": 0, "pesquisas": 0, "impressoes": 0}
+
+    def notas_do_mes(self, mes):
+        """
+        Retorna as notas de um mês, gerando-as na primeira consulta.
+
+        Args:
+            mes (str): Nome do mês (ver MESES)
+
+        Returns:
+            list: Notas (dict) com id, numero, prestador, cnpj, emissao, valor e cancelada
+        """
+        with self._lock:
+            if mes not in self._notas:
+                indice_mes = MESES.index(mes) + 1
+                aleatorio = random.Random(f"{self.semente}-{mes}")
+                ano = datetime.now().year
+                notas = []
+                for sequencia in range(self.notas_por_mes):
+                    valor = aleatorio.randint(1000, 999999)
+                    notas.append({
+                        "id": indice_mes * 100000 + sequencia,
+                        "numero": str(indice_mes * 10000 + sequencia + 1),
+                        "prestador": f"Prestador {aleatorio.randint(1, 50)} Ltda",
+                        "cnpj": f"{aleatorio.randint(10, 99)}.{aleatorio.randint(100, 999)}."
+                                f"{aleatorio.randint(100, 999)}/0001-{aleatorio.randint(10, 99)}",
+                        "emissao": f"{aleatorio.randint(1, 28):02d}/{indice_mes:02d}/{ano} "
+                                   f"{aleatorio.randint(8, 18):02d}:{aleatorio.randint(0, 59):02d}",
+                        "valor": f"{valor // 100:,}".replace(",", ".") + f",{valor % 100:02d}",
+                        "cancelada": aleatorio.random() < self.taxa_canceladas,
+                    })
+                self._notas[mes] = notas
+            return self._notas[mes]
+
+    def nota(self, id_nota):
+        """Localiza uma nota pelo id (None se não existir)."""
+        mes = MESES[id_nota // 100000 - 1] if 0 < id_nota // 100000 <= len(MESES) else None
+        if mes is None:
+            return None
+        for nota in self.notas_do_mes(mes):
+            if nota["id"] == id_nota:
+                return nota
+        return None
+
+    def criar_sessao(self):
+        """Registra uma sessão autenticada e retorna seu token."""
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._sessoes.add(token)
+            self.estatisticas["logins"] += 1
+        return token
+
+    def sessao_valida(self, token):
+        with self._lock:
+            return token in self._sessoes
+
+    def contar(self, campo):
+        with self._lock:
+            self.estatisticas[campo] += 1
+
+    def configuracao_pagina(self):
+        """Parâmetros repassados ao JavaScript da página de notas."""
+        return {
+            "tamanho_pagina": self.tamanho_pagina,
+            "atraso_desenho_ms": int(self.atraso_desenho * 1000),
+            "url_no_botao": self.url_no_botao,
+        }
+
+    def iniciar(self, host="127.0.0.1", porta=0):
+        """
+        Inicia o servidor em uma thread de fundo.
+
+        Args:
+            host (str): Endereço de escuta
+            porta (int): Porta (0 escolhe uma porta livre)
+
+        Returns:
+            str: URL da tela de login (valor de URL_CNPJ)
+        """
+        portal = self
+
+        class Manipulador(_ManipuladorPortal):
+            pass
+
+        Manipulador.portal = portal
+        self._servidor = ThreadingHTTPServer((host, porta), Manipulador)
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="portal-simulado", daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._servidor.server_address[1]}/"
+
+    def encerrar(self):
+        """Para o servidor."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+
+class _ManipuladorPortal(BaseHTTPRequestHandler):
+    """Rotas do portal simulado (portal é definido por PortalSimulado.iniciar)."""
+
+    portal = None
+
+    def log_message(self, formato, *args):
+        # Silencia o log de acesso padrão do http.server
+        pass
+
+    def _token(self):
+        cabecalho = self.headers.get("Cookie")
+        if not cabecalho:
+            return None
+        jar = cookies.SimpleCookie()
+        jar.load(cabecalho)
+        return jar[_COOKIE_SESSAO].value if _COOKIE_SESSAO in jar else None
+
+    def _responder(self, conteudo, tipo="text/html; charset=utf-8", status=200, cabecalhos=None):
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.send_header("Cache-Control", "no-store")
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _redirecionar(self, destino, cabecalhos=None):
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.portal.latencia)
+        url = urlsplit(self.path)
+        rota, parametros = url.path, parse_qs(url.query)
+        autenticado = self.portal.sessao_valida(self._token())
+
+        if rota == "/":
+            if autenticado:
+                return self._redirecionar("/principal")
+            return self._responder(_PAGINA_LOGIN.format(mensagem=""))
+        if rota == "/captcha.svg":
+            svg = (
+                '<svg xmlns="http://www.w3.org/2000/svg" width="120" height="40">'
+                '<rect width="120" height="40" fill="#eee"/>'
+                f'<text x="10" y="28" font-size="22" font-family="monospace">{html.escape(self.portal.captcha)}</text>'
+                "</svg>"
+            )
+            return self._responder(svg, tipo="image/svg+xml")
+        if not autenticado:
+            return self._redirecionar("/")
+
+        paginas = {
+            "/principal": _PAGINA_PRINCIPAL,
+            "/menu": _PAGINA_MENU,
+            "/inicio": _PAGINA_INICIO,
+            "/nfse/menu": _PAGINA_MENU_NFSE,
+            "/nfse/submenu": _PAGINA_SUBMENU_NFSE,
+            "/nfse/pesquisa": _PAGINA_PESQUISA,
+        }
+        if rota in paginas:
+            return self._responder(paginas[rota])
+        if rota == "/nfse/notas":
+            opcoes = "".join(f'<option value="{mes}">{mes}</option>' for mes in MESES)
+            pagina = _PAGINA_NOTAS.replace("{opcoes}", opcoes).replace(
+                "{config}", json.dumps(self.portal.configuracao_pagina())
+            )
+            return self._responder(pagina)
+        if rota == "/nfse/api/notas":
+            mes = parametros.get("mes", [""])[0]
+            if mes not in MESES:
+                return self._responder(json.dumps({"erro": "mês inválido"}), "application/json", 400)
+            time.sleep(self.portal.latencia_pesquisa)
+            self.portal.contar("pesquisas")
+            return self._responder(json.dumps(self.portal.notas_do_mes(mes)), "application/json")
+        if rota == "/nfse/imprimir":
+            try:
+                nota = self.portal.nota(int(parametros.get("id", ["0"])[0]))
+            except ValueError:
+                nota = None
+            if nota is None:
+                return self._responder("Nota não encontrada", "text/plain; charset=utf-8", 404)
+            time.sleep(self.portal.latencia_download)
+            self.portal.contar("impressoes")
+            if self.portal.formato_impressao == "html":
+                return self._responder(_PAGINA_IMPRESSAO.format(**{k: html.escape(str(v)) for k, v in nota.items()}))
+            pdf = gerar_pdf([
+                f"NFS-e {nota['numero']}",
+                f"{nota['prestador']} - {nota['cnpj']}",
+                f"Emissao: {nota['emissao']}",
+                f"Valor: R$ {nota['valor']}",
+            ])
+            return self._responder(
+                pdf, "application/pdf",
+                cabecalhos={"Content-Disposition": f'inline; filename="NFSe_{nota["numero"]}.pdf"'},
+            )
+        return self._responder("Página não encontrada", "text/plain; charset=utf-8", 404)
+
+    def do_POST(self):
+        time.sleep(self.portal.latencia)
+        if urlsplit(self.path).path != "/":
+            return self._responder("Página não encontrada", "text/plain; charset=utf-8", 404)
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        campos = parse_qs(self.rfile.read(tamanho).decode("utf-8"))
+        codigo = campos.get("txtCodeTextBox", [""])[0].strip()
+        if not campos.get("txtLogin", [""])[0] or codigo.upper() != self.portal.captcha.upper():
+            self.portal.contar("logins_recusados")
+            return self._responder(_PAGINA_LOGIN.format(mensagem="Código de verificação inválido"))
+        token = self.portal.criar_sessao()
+        return self._redirecionar(
+            "/principal", cabecalhos={"Set-Cookie": f"{_COOKIE_SESSAO}={token}; Path=/; HttpOnly"}
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portal de NFS-e simulado para benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--notas-por-mes", type=int, default=25)
+    parser.add_argument("--tamanho-pagina", type=int, default=10)
+    parser.add_argument("--taxa-canceladas", type=float, default=0.1)
+    parser.add_argument("--captcha", default="ABCD12")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso (s) de toda requisição")
+    parser.add_argument("--latencia-pesquisa", type=float, default=0.3)
+    parser.add_argument("--latencia-download", type=float, default=0.1)
+    parser.add_argument("--atraso-desenho", type=float, default=0.05)
+    parser.add_argument("--sem-url-no-botao", action="store_true", help="Força o uso do modal de impressão")
+    parser.add_argument("--formato-impressao", choices=["pdf", "html"], default="pdf")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    portal = PortalSimulado(
+        notas_por_mes=args.notas_por_mes,
+        tamanho_pagina=args.tamanho_pagina,
+        taxa_canceladas=args.taxa_canceladas,
+        captcha=args.captcha,
+        latencia=args.latencia,
+        latencia_pesquisa=args.latencia_pesquisa,
+        latencia_download=args.latencia_download,
+        atraso_desenho=args.atraso_desenho,
+        url_no_botao=not args.sem_url_no_botao,
+        formato_impressao=args.formato_impressao,
+        semente=args.semente,
+    )
+    url = portal.iniciar(args.host, args.porta)
+    print(f"Portal simulado em {url} (captcha: {args.captcha}). Ctrl+C para encerrar.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        portal.encerrar()
+
+
+if __name__ == "__main__":
+    main()
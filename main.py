@@ -1,11 +1,34 @@
-from fastapi import FastAPI, HTTPException
+import anyio
+from fastapi import FastAPI, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
-from typing import List
+from typing import Dict, List, Optional
 import os
+import json
+import logging
+import shutil
+from functools import partial
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 
-from tasks.scrap_nfse import ScrapNotaFiscal
+from tasks.scrap_nfse import ScrapNotaFiscal, ExtracaoIncompleta, DIRETORIO_DOWNLOADS, diretorio_notas_tenant
+from tasks.jobs import GerenciadorJobs, STATUS_CONCLUIDO, STATUS_PARCIAL
+from tasks.lotes import EscalonadorLotes
+from tasks.pool_navegadores import PoolNavegadores
+from tasks.captcha import estatisticas_solucionadores
+from tasks.zip_stream import gerar_zip
+from tasks.metricas import REGISTRO as REGISTRO_METRICAS
+from tasks.log_estruturado import configurar_logging, contexto_log
+
+load_dotenv()
+
+# Logging estruturado (fila + thread de escrita), configurado uma vez por processo
+configurar_logging()
+logger = logging.getLogger("nfse.api")
 
 app = FastAPI(title="API de Notas Fiscais")
 
@@ -18,43 +41,442 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Limite global de navegadores abertos ao mesmo tempo: toda sessão de scraping
+# (job, sessão paralela ou unidade de lote) ocupa uma vaga enquanto executa
+NAVEGADORES_MAX = int(
+    os.getenv("NAVEGADORES_MAX")
+    or os.getenv("LOTES_MAX_CONCORRENTES")
+    or os.getenv("BROWSER_POOL_SIZE")
+    or os.getenv("JOBS_MAX_WORKERS")
+    or "2"
+)
+capacidade_navegadores = threading.BoundedSemaphore(max(1, NAVEGADORES_MAX))
+
+# Pool de workers que executa os scrapings fora do event loop
+gerenciador_jobs = GerenciadorJobs(max_workers=int(os.getenv("JOBS_MAX_WORKERS", "2")))
+
+# Pool de navegadores aquecidos (desabilitado quando BROWSER_POOL_SIZE=0)
+pool_navegadores = None
+if int(os.getenv("BROWSER_POOL_SIZE", "0")) > 0:
+    pool_navegadores = PoolNavegadores(
+        tamanho=int(os.getenv("BROWSER_POOL_SIZE")),
+        diretorio_downloads=os.path.join(DIRETORIO_DOWNLOADS, "pool"),
+        max_usos=int(os.getenv("BROWSER_POOL_MAX_USOS", "20")),
+    )
+
+# Lotes com vários logins: rodízio entre logins com limite por login; a
+# capacidade de navegadores é a mesma dos jobs (capacidade_navegadores)
+escalonador_lotes = EscalonadorLotes(
+    max_concorrentes=max(1, NAVEGADORES_MAX),
+    max_por_tenant=int(os.getenv("LOTES_MAX_POR_TENANT", "1")),
+)
+# Meses processados por unidade de trabalho de um lote (granularidade do rodízio)
+LOTES_MESES_POR_UNIDADE = int(os.getenv("LOTES_MESES_POR_UNIDADE", "1"))
+
 class NotaFiscalRequest(BaseModel):
     login: str
     password: str
+    months: List[str]
     chrome_profile: str = "chrome_profile_nfse"
+    sessoes_paralelas: Optional[int] = None
+    # Continua dos checkpoints da execução anterior, pulando os meses concluídos
+    retomar: bool = False
+
+class CredencialLote(BaseModel):
+    login: str
+    password: str
+    months: Optional[List[str]] = None
+
+class LoteRequest(BaseModel):
+    credenciais: List[CredencialLote]
+    months: List[str] = []
+    chrome_profile: str = "chrome_profile_nfse"
+
+class LoteCriadoResponse(BaseModel):
+    lote_id: str
+    status: str
+
+class TenantLoteResponse(BaseModel):
+    status: str
+    meses: List[str] = []
+    meses_concluidos: List[str] = []
+    erros: Dict[str, str] = {}
+    arquivos_baixados: List[str] = []
+
+class LoteStatusResponse(BaseModel):
+    lote_id: str
+    status: str
+    criado_em: str
+    finalizado_em: Optional[str] = None
+    tenants: Dict[str, TenantLoteResponse] = {}
 
 class NotaFiscalResponse(BaseModel):
     sucesso: bool
     mensagem: str
     arquivos_baixados: List[str] = []
 
-@app.post("/baixar-notas-fiscais", response_model=NotaFiscalResponse)
-async def baixar_notas_fiscais(request: NotaFiscalRequest):
-    try:
-        scraper = ScrapNotaFiscal()
-        driver = scraper.abrir_navegador(request.chrome_profile)
-        
+class JobCriadoResponse(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    mensagem: str
+    criado_em: str
+    iniciado_em: Optional[str] = None
+    finalizado_em: Optional[str] = None
+    arquivos_baixados: List[str] = []
+
+# Sessões de navegador simultâneas por login (meses distribuídos entre elas)
+SESSOES_PARALELAS = int(os.getenv("SESSOES_PARALELAS", "1"))
+SESSOES_PARALELAS_MAX = int(os.getenv("SESSOES_PARALELAS_MAX", "4"))
+# Valor por login, ex.: {"12345678000199": 3}
+SESSOES_PARALELAS_POR_TENANT = json.loads(os.getenv("SESSOES_PARALELAS_POR_TENANT") or "{}")
+
+def definir_sessoes_paralelas(dados):
+    """
+    Define quantas sessões de navegador usar para um login.
+
+    Prioridade: valor da requisição, configuração do login em
+    SESSOES_PARALELAS_POR_TENANT e SESSOES_PARALELAS, limitado por
+    SESSOES_PARALELAS_MAX e pelo número de meses.
+
+    Args:
+        dados (NotaFiscalRequest): Dados da requisição
+
+    Returns:
+        int: Número de sessões (ao menos 1)
+    """
+    sessoes = dados.sessoes_paralelas or SESSOES_PARALELAS_POR_TENANT.get(dados.login) or SESSOES_PARALELAS
+    return max(1, min(int(sessoes), SESSOES_PARALELAS_MAX, len(dados.months)))
+
+def executar_scrap(job_id, dados):
+    """
+    Executa o scraping completo de um login e retorna os arquivos baixados.
+
+    Com mais de uma sessão paralela, os meses são distribuídos entre sessões de
+    navegador independentes (cada uma com login e diretório de download
+    próprios) e os resultados são unidos.
+
+    Args:
+        job_id (str): Identificador do job (None para execuções síncronas)
+        dados (NotaFiscalRequest): Dados da requisição
+
+    Returns:
+        list: Arquivos baixados, relativos à pasta do cliente (ex.: "Maio/arquivo.pdf")
+
+    Raises:
+        ExtracaoIncompleta: Se algum mês ficou pendente; traz os arquivos já baixados
+    """
+    execucao_id = job_id or uuid.uuid4().hex
+    # Progresso publicado nos eventos do job (acompanhados via /jobs/{job_id}/eventos)
+    ao_evento = partial(gerenciador_jobs.registrar_evento, job_id) if job_id else None
+    if job_id:
+        gerenciador_jobs.definir_contexto(job_id, diretorio_notas=diretorio_notas_tenant(dados.login))
+    total_sessoes = definir_sessoes_paralelas(dados)
+    if total_sessoes == 1:
+        return executar_sessao(execucao_id, dados, dados.months, ao_evento=ao_evento)
+
+    # Distribui os meses alternadamente, equilibrando a carga entre as sessões
+    grupos = [dados.months[indice::total_sessoes] for indice in range(total_sessoes)]
+    logger.info(f"Distribuindo {len(dados.months)} meses entre {total_sessoes} sessões: {grupos}")
+
+    with ThreadPoolExecutor(max_workers=total_sessoes, thread_name_prefix="nfse-sessao") as executor:
+        futuros = [
+            executor.submit(executar_sessao, execucao_id, dados, meses, indice, ao_evento)
+            for indice, meses in enumerate(grupos)
+        ]
+
+    arquivos = []
+    erros = []
+    pendentes = []
+    for meses, futuro in zip(grupos, futuros):
+        try:
+            arquivos.extend(futuro.result())
+        except ExtracaoIncompleta as e:
+            logger.error(f"Sessão dos meses {meses} incompleta: {e}")
+            arquivos.extend(e.arquivos)
+            pendentes.extend(e.meses_pendentes)
+        except Exception as e:
+            logger.error(f"Erro na sessão dos meses {meses}: {e}")
+            erros.append(f"{meses}: {e}")
+            pendentes.extend(meses)
+
+    if len(erros) == len(grupos):
+        raise Exception(f"Todas as sessões falharam: {'; '.join(erros)}")
+    if pendentes:
+        # Mantém a ordem da requisição
+        raise ExtracaoIncompleta([mes for mes in dados.months if mes in pendentes], arquivos)
+    return arquivos
+
+def executar_sessao(execucao_id, dados, meses, indice=None, ao_evento=None):
+    """
+    Processa um conjunto de meses em uma sessão de navegador.
+
+    Args:
+        execucao_id (str): Identificador da execução (nomeia perfil e downloads)
+        dados (NotaFiscalRequest): Dados da requisição
+        meses (list): Meses processados por esta sessão
+        indice (int): Posição da sessão em uma execução paralela (None se única)
+        ao_evento (callable): Recebe os eventos de progresso do scraper
+
+    Returns:
+        list: Arquivos baixados, relativos à pasta do cliente
+
+    Raises:
+        ExtracaoIncompleta: Se algum mês ficou pendente (arquivos já relativos)
+    """
+    # Registros de log desta thread levam o job e o cliente; a sessão aguarda uma
+    # vaga na capacidade global de navegadores, compartilhada com os lotes
+    with contexto_log(job_id=execucao_id, tenant=dados.login), capacidade_navegadores:
+        # Só a primeira sessão usa o cache de login: sessões paralelas com os mesmos
+        # cookies seriam serializadas pelo portal
+        cache_sessao = not indice
+        sufixo = "" if indice is None else f"_{indice}"
+
+        if pool_navegadores is not None:
+            with pool_navegadores.emprestar() as navegador:
+                scraper = ScrapNotaFiscal(
+                    download_dir=navegador.download_dir,
+                    tenant=dados.login,
+                    cache_sessao=cache_sessao,
+                    ao_evento=ao_evento,
+                )
+                try:
+                    arquivos = scraper.get_info(navegador.driver, dados.login, dados.password, meses, retomar=dados.retomar)
+                except ExtracaoIncompleta as e:
+                    e.arquivos = listar_arquivos(scraper, e.arquivos)
+                    raise
+            return listar_arquivos(scraper, arquivos)
+
+        # Cada execução usa perfil e diretório de download próprios, evitando que
+        # jobs simultâneos bloqueiem o perfil ou apaguem os PDFs uns dos outros
+        profile_dir = f"{dados.chrome_profile}_{execucao_id[:8]}{sufixo}"
+        download_dir = os.path.join(DIRETORIO_DOWNLOADS, f"{execucao_id}{sufixo}")
+
+        scraper = ScrapNotaFiscal(
+            download_dir=download_dir, tenant=dados.login, cache_sessao=cache_sessao, ao_evento=ao_evento
+        )
+        driver = scraper.abrir_navegador(profile_dir)
+
         try:
-            scraper.get_info(driver, request.login, request.password)
-            
-            # Lista os arquivos baixados
-            arquivos_baixados = os.listdir(scraper.download_dir)
-            
-            return NotaFiscalResponse(
-                sucesso=True,
-                mensagem="Notas fiscais baixadas com sucesso",
-                arquivos_baixados=arquivos_baixados
-            )
+            arquivos = scraper.get_info(driver, dados.login, dados.password, meses, retomar=dados.retomar)
+            return listar_arquivos(scraper, arquivos)
+        except ExtracaoIncompleta as e:
+            e.arquivos = listar_arquivos(scraper, e.arquivos)
+            raise
         finally:
             driver.quit()
-            scraper.kill_chrome_instances()
-            
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            shutil.rmtree(download_dir, ignore_errors=True)
+
+def listar_arquivos(scraper, arquivos):
+    """Converte os caminhos absolutos em caminhos relativos à pasta do cliente."""
+    return [os.path.relpath(arquivo, scraper.output_dir) for arquivo in arquivos]
+
+def executar_unidade_lote(login, password, meses, item):
+    """
+    Processa uma unidade de um lote (um login e um grupo de meses).
+
+    Args:
+        login (str): Login/CNPJ do cliente
+        password (str): Senha do cliente
+        meses (list): Meses da unidade
+        item (dict): Item do lote, com o perfil do Chrome
+
+    Returns:
+        list: Arquivos baixados, relativos à pasta do cliente
+    """
+    dados = NotaFiscalRequest(
+        login=login,
+        password=password,
+        months=meses,
+        chrome_profile=item["chrome_profile"],
+        sessoes_paralelas=1,
+    )
+    return executar_sessao(uuid.uuid4().hex, dados, meses)
+
+def montar_status_job(job):
+    """Converte o estado interno de um job no modelo de resposta da API."""
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        mensagem=job["mensagem"],
+        criado_em=job["criado_em"],
+        iniciado_em=job["iniciado_em"],
+        finalizado_em=job["finalizado_em"],
+        arquivos_baixados=job["resultado"] or [],
+    )
+
+@app.post("/baixar-notas-fiscais", response_model=NotaFiscalResponse)
+def baixar_notas_fiscais(request: NotaFiscalRequest):
+    # Endpoint síncrono: declarado sem async para rodar no threadpool do FastAPI
+    try:
+        arquivos_baixados = executar_scrap(None, request)
+
+        return NotaFiscalResponse(
+            sucesso=True,
+            mensagem="Notas fiscais baixadas com sucesso",
+            arquivos_baixados=arquivos_baixados
+        )
+
+    except ExtracaoIncompleta as e:
+        # Parte dos meses foi baixada: devolve os arquivos e indica o que falta
+        return NotaFiscalResponse(sucesso=False, mensagem=str(e), arquivos_baixados=e.arquivos)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao baixar notas fiscais: {str(e)}")
 
+@app.post("/jobs/baixar-notas-fiscais", response_model=JobCriadoResponse, status_code=202)
+async def criar_job_notas_fiscais(request: NotaFiscalRequest):
+    job_id = gerenciador_jobs.submeter(executar_scrap, request)
+    job = gerenciador_jobs.obter(job_id)
+    return JobCriadoResponse(job_id=job_id, status=job["status"])
+
+@app.get("/jobs", response_model=List[JobStatusResponse])
+async def listar_jobs():
+    return [montar_status_job(job) for job in gerenciador_jobs.listar()]
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def obter_job(job_id: str):
+    job = gerenciador_jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    return montar_status_job(job)
+
+# Conexões SSE aguardando eventos ao mesmo tempo; as esperas usam threads
+# próprias, sem ocupar o threadpool dos endpoints síncronos
+SSE_MAX_CONEXOES = int(os.getenv("SSE_MAX_CONEXOES", "50"))
+_limitador_sse = None
+
+def obter_limitador_sse():
+    """Cria (no event loop, na primeira conexão) o limitador de threads do SSE."""
+    global _limitador_sse
+    if _limitador_sse is None:
+        _limitador_sse = anyio.CapacityLimiter(SSE_MAX_CONEXOES)
+    return _limitador_sse
+
+async def gerar_eventos_sse(job_id, a_partir_de):
+    """
+    Gera os eventos de um job no formato Server-Sent Events até o job terminar.
+
+    Só a espera bloqueante por novos eventos roda em thread, limitada por
+    SSE_MAX_CONEXOES; o gerador em si roda no event loop.
+
+    Args:
+        job_id (str): Identificador do job
+        a_partir_de (int): Id do primeiro evento a enviar
+
+    Yields:
+        str: Blocos SSE; um comentário de keep-alive quando não há eventos novos
+    """
+    while True:
+        retorno = await anyio.to_thread.run_sync(
+            partial(gerenciador_jobs.aguardar_eventos, job_id, a_partir_de, timeout=15),
+            limiter=obter_limitador_sse(),
+        )
+        if retorno is None:
+            return
+        eventos, finalizado = retorno
+        for evento in eventos:
+            yield f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+        a_partir_de += len(eventos)
+        if finalizado and not eventos:
+            return
+        if not eventos:
+            yield ": keep-alive\n\n"
+
+@app.get("/jobs/{job_id}/eventos")
+async def acompanhar_job(job_id: str, last_event_id: Optional[str] = Header(None)):
+    if gerenciador_jobs.obter(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    # Reconexões do EventSource continuam do evento seguinte ao último recebido
+    a_partir_de = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        gerar_eventos_sse(job_id, a_partir_de),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/jobs/{job_id}/arquivos.zip")
+def baixar_zip_job(job_id: str, mes: Optional[List[str]] = Query(None)):
+    # Declarado sem async: o ZIP é gerado (e lido do disco) no threadpool do FastAPI
+    job = gerenciador_jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    if job["status"] not in (STATUS_CONCLUIDO, STATUS_PARCIAL):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} não concluído (status: {job['status']})")
+
+    # Os caminhos do resultado começam pela pasta do mês (ex.: "Maio/arquivo.pdf")
+    arquivos = [
+        arquivo for arquivo in job["resultado"] or []
+        if not mes or arquivo.replace(os.sep, "/").split("/", 1)[0] in mes
+    ]
+    if not arquivos:
+        raise HTTPException(status_code=404, detail="Nenhum arquivo encontrado para os filtros informados")
+
+    return StreamingResponse(
+        gerar_zip(job["contexto"]["diretorio_notas"], arquivos),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="notas_{job_id}.zip"'},
+    )
+
+@app.post("/lotes/baixar-notas-fiscais", response_model=LoteCriadoResponse, status_code=202)
+async def criar_lote_notas_fiscais(request: LoteRequest):
+    itens = []
+    for credencial in request.credenciais:
+        meses = credencial.months or request.months
+        if not meses:
+            raise HTTPException(status_code=422, detail=f"Nenhum mês informado para {credencial.login}")
+        itens.append({
+            "login": credencial.login,
+            "password": credencial.password,
+            "grupos": [
+                meses[inicio:inicio + LOTES_MESES_POR_UNIDADE]
+                for inicio in range(0, len(meses), LOTES_MESES_POR_UNIDADE)
+            ],
+            "chrome_profile": request.chrome_profile,
+        })
+    lote_id = escalonador_lotes.submeter(executar_unidade_lote, itens)
+    lote = escalonador_lotes.obter(lote_id)
+    return LoteCriadoResponse(lote_id=lote_id, status=lote["status"])
+
+@app.get("/lotes", response_model=List[LoteStatusResponse])
+async def listar_lotes():
+    return escalonador_lotes.listar()
+
+@app.get("/lotes/{lote_id}", response_model=LoteStatusResponse)
+async def obter_lote(lote_id: str):
+    lote = escalonador_lotes.obter(lote_id)
+    if lote is None:
+        raise HTTPException(status_code=404, detail=f"Lote {lote_id} não encontrado")
+    return lote
+
+@app.get("/captcha/estatisticas")
+async def obter_estatisticas_captcha():
+    return estatisticas_solucionadores()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def obter_metricas():
+    # Formato de exposição texto do Prometheus
+    return PlainTextResponse(REGISTRO_METRICAS.exportar(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def iniciar_pool_navegadores():
+    if pool_navegadores is not None:
+        pool_navegadores.iniciar()
+
+@app.on_event("shutdown")
+def encerrar_workers():
+    gerenciador_jobs.encerrar(aguardar=False)
+    escalonador_lotes.encerrar()
+    if pool_navegadores is not None:
+        pool_navegadores.encerrar()
+
 @app.get("/")
 async def root():
     return {"mensagem": "API de notas fiscais está funcionando. Use o endpoint /baixar-notas-fiscais"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
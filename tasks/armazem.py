@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import uuid
+
+# Tamanho dos blocos lidos ao calcular o hash
+_TAMANHO_BLOCO = 1024 * 1024
+# Início de todo PDF e marcador de fim procurado nos últimos bytes do arquivo
+_ASSINATURA_PDF = b"%PDF"
+_MARCADOR_FIM_PDF = b"%%EOF"
+_TAMANHO_FINAL_PDF = 1024
+
+
+def calcular_sha256(caminho):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo.
+
+    Args:
+        caminho (str): Arquivo a ser lido
+
+    Returns:
+        str: Hash em hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(_TAMANHO_BLOCO), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def pdf_valido(caminho):
+    """
+    Confere se um arquivo parece um PDF completo.
+
+    Exige tamanho não nulo, a assinatura %PDF no início e o marcador %%EOF no
+    final (ausente em arquivos truncados).
+
+    Args:
+        caminho (str): Arquivo a ser conferido
+
+    Returns:
+        bool: True se o arquivo passou nas verificações
+    """
+    try:
+        tamanho = os.path.getsize(caminho)
+        if tamanho == 0:
+            return False
+        with open(caminho, "rb") as arquivo:
+            if arquivo.read(len(_ASSINATURA_PDF)) != _ASSINATURA_PDF:
+                return False
+            arquivo.seek(max(0, tamanho - _TAMANHO_FINAL_PDF))
+            return _MARCADOR_FIM_PDF in arquivo.read()
+    except OSError:
+        return False
+
+
+class ArmazemConteudo:
+    """
+    Armazena os PDFs endereçados pelo SHA-256 do conteúdo.
+
+    Cada conteúdo distinto é gravado uma única vez em <diretorio>/<ab>/<hash>.pdf
+    e a árvore legível (<tenant>/<mês>/<arquivo>.pdf) aponta para ele com hard
+    links (ou cópias, se o sistema de arquivos não os suportar). PDFs idênticos
+    em meses ou nomes diferentes ocupam espaço uma única vez e a integridade de
+    qualquer arquivo pode ser conferida recalculando o hash.
+    """
+
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório dos objetos
+        """
+        self.diretorio = os.path.abspath(diretorio)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def caminho_objeto(self, sha256):
+        """
+        Retorna o caminho do objeto de um hash.
+
+        Args:
+            sha256 (str): Hash do conteúdo
+
+        Returns:
+            str: Caminho <diretorio>/<2 primeiros caracteres>/<hash>.pdf
+        """
+        return os.path.join(self.diretorio, sha256[:2], f"{sha256}.pdf")
+
+    def armazenar_arquivo(self, origem, caminho_final):
+        """
+        Incorpora um arquivo baixado ao armazém e o publica no caminho final.
+
+        O arquivo de origem é movido para o armazém (ou descartado, se o
+        conteúdo já existir) e o caminho final passa a apontar para o objeto,
+        substituindo o que houver nele.
+
+        Args:
+            origem (str): Arquivo baixado
+            caminho_final (str): Caminho legível do PDF
+
+        Returns:
+            str: SHA-256 do conteúdo
+        """
+        sha256 = calcular_sha256(origem)
+        objeto = self.caminho_objeto(sha256)
+        if self._objeto_integro(objeto, sha256):
+            os.remove(origem)
+        else:
+            os.makedirs(os.path.dirname(objeto), exist_ok=True)
+            temporario = f"{objeto}.{uuid.uuid4().hex}.part"
+            shutil.move(origem, temporario)
+            os.replace(temporario, objeto)
+        self._publicar(objeto, caminho_final)
+        return sha256
+
+    def armazenar_bytes(self, conteudo, caminho_final):
+        """
+        Incorpora um PDF gerado em memória ao armazém e o publica no caminho final.
+
+        Args:
+            conteudo (bytes): Bytes do PDF
+            caminho_final (str): Caminho legível do PDF
+
+        Returns:
+            str: SHA-256 do conteúdo
+        """
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        objeto = self.caminho_objeto(sha256)
+        if not self._objeto_integro(objeto, sha256):
+            os.makedirs(os.path.dirname(objeto), exist_ok=True)
+            temporario = f"{objeto}.{uuid.uuid4().hex}.part"
+            with open(temporario, "wb") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, objeto)
+        self._publicar(objeto, caminho_final)
+        return sha256
+
+    def _objeto_integro(self, objeto, sha256):
+        """Indica se o objeto existe e seu conteúdo corresponde ao hash."""
+        return os.path.isfile(objeto) and calcular_sha256(objeto) == sha256
+
+    def _publicar(self, objeto, caminho_final):
+        """Substitui atomicamente o caminho final por um link para o objeto."""
+        os.makedirs(os.path.dirname(caminho_final), exist_ok=True)
+        temporario = f"{caminho_final}.{uuid.uuid4().hex}.part"
+        try:
+            os.link(objeto, temporario)
+        except OSError:
+            # Sistemas de arquivos sem hard link (ou outro dispositivo): cópia
+            shutil.copy2(objeto, temporario)
+        os.replace(temporario, caminho_final)
+
+    def verificar(self):
+        """
+        Confere a integridade de todos os objetos do armazém.
+
+        Returns:
+            list: Caminhos dos objetos cujo conteúdo não corresponde ao hash do nome
+        """
+        corrompidos = []
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                if not nome.endswith(".pdf"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                if calcular_sha256(caminho) != nome[:-len(".pdf")]:
+                    corrompidos.append(caminho)
+        return corrompidos
+
+    def coletar_orfaos(self):
+        """
+        Remove objetos sem nenhum link na árvore legível.
+
+        Só é confiável quando a árvore usa hard links: objetos publicados por
+        cópia também têm um único link e seriam removidos.
+
+        Returns:
+            int: Quantidade de objetos removidos
+        """
+        removidos = 0
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                if nome.endswith(".pdf") and os.stat(caminho).st_nlink == 1:
+                    os.remove(caminho)
+                    removidos += 1
+        return removidos
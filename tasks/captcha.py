@@ -0,0 +1,248 @@
+import base64
+import os
+import re
+import threading
+import time
+
+import capsolver
+
+# Formato padrão do texto do captcha do portal (sobrescrito por CAPTCHA_PADRAO)
+PADRAO_CAPTCHA = r"^[A-Za-z0-9]{4,8}$"
+
+
+class SolucionadorCaptcha:
+    """
+    Interface dos backends de resolução de captcha.
+
+    Subclasses implementam _resolver(); esta classe mede a latência de cada
+    leitura e contabiliza leituras inválidas, acertos e erros informados após a
+    tentativa de login.
+    """
+
+    nome = "base"
+
+    def __init__(self, api_key=None):
+        """
+        Args:
+            api_key (str): Chave da API, usada apenas por backends externos
+        """
+        self.padrao_valido = re.compile(os.getenv("CAPTCHA_PADRAO") or PADRAO_CAPTCHA)
+        self._lock = threading.Lock()
+        self._estatisticas = {
+            "leituras": 0,
+            "leituras_invalidas": 0,
+            "falhas": 0,
+            "acertos": 0,
+            "erros": 0,
+            "tempo_total": 0.0,
+            "tempo_maximo": 0.0,
+        }
+
+    def resolver(self, imagem_base64):
+        """
+        Lê o texto do captcha, registrando latência e falhas.
+
+        Args:
+            imagem_base64 (str): Imagem do captcha codificada em Base64
+
+        Returns:
+            str: Texto lido (já pós-processado pelo backend)
+        """
+        inicio = time.monotonic()
+        try:
+            texto = self._pos_processar(self._resolver(imagem_base64) or "")
+        except Exception:
+            self._incrementar("falhas")
+            raise
+        finally:
+            duracao = time.monotonic() - inicio
+            with self._lock:
+                self._estatisticas["leituras"] += 1
+                self._estatisticas["tempo_total"] += duracao
+                self._estatisticas["tempo_maximo"] = max(self._estatisticas["tempo_maximo"], duracao)
+
+        if not self.leitura_valida(texto):
+            self._incrementar("leituras_invalidas")
+        return texto
+
+    def _resolver(self, imagem_base64):
+        """Executa a leitura propriamente dita (implementado pelos backends)."""
+        raise NotImplementedError
+
+    def _pos_processar(self, texto):
+        """Ajusta o texto lido; por padrão apenas remove espaços."""
+        return texto.strip()
+
+    def leitura_valida(self, texto):
+        """
+        Verifica se o texto tem o formato de um captcha do portal.
+
+        Args:
+            texto (str): Texto lido
+
+        Returns:
+            bool: True se a leitura pode ser enviada ao portal
+        """
+        return bool(self.padrao_valido.match(texto or ""))
+
+    def registrar_resultado(self, correto):
+        """
+        Informa se a última leitura enviada foi aceita pelo portal.
+
+        Args:
+            correto (bool): True se o login passou do captcha
+        """
+        self._incrementar("acertos" if correto else "erros")
+
+    def _incrementar(self, campo):
+        with self._lock:
+            self._estatisticas[campo] += 1
+
+    def resumo(self):
+        """
+        Resume as estatísticas do backend.
+
+        Returns:
+            dict: Contadores, taxa de acerto e latência média/máxima em segundos
+        """
+        with self._lock:
+            estatisticas = dict(self._estatisticas)
+        enviados = estatisticas["acertos"] + estatisticas["erros"]
+        leituras = estatisticas["leituras"]
+        estatisticas["taxa_acerto"] = round(estatisticas["acertos"] / enviados, 3) if enviados else None
+        estatisticas["tempo_medio"] = round(estatisticas["tempo_total"] / leituras, 3) if leituras else None
+        estatisticas["tempo_total"] = round(estatisticas["tempo_total"], 3)
+        estatisticas["tempo_maximo"] = round(estatisticas["tempo_maximo"], 3)
+        return estatisticas
+
+
+class SolucionadorCapSolver(SolucionadorCaptcha):
+    """Resolve o captcha pelo serviço externo CapSolver."""
+
+    nome = "capsolver"
+
+    def __init__(self, api_key=None):
+        """
+        Args:
+            api_key (str): Chave da API do CapSolver
+        """
+        super().__init__(api_key)
+        if not api_key:
+            raise ValueError("API_KEY deve estar definida no arquivo .env para usar o CapSolver")
+        self.api_key = api_key
+
+    def _resolver(self, imagem_base64):
+        capsolver.api_key = self.api_key
+        solution = capsolver.solve({
+            "type": "ImageToTextTask",
+            "body": imagem_base64,
+            "module": "common",
+            "borderless": True,
+            "mediaSize": {
+                "height_microns": 297000,   # A4
+                "width_microns": 210000,
+                "name": "ISO_A4",
+                "custom_display_name": "A4"
+            }
+        })
+        return solution["text"]
+
+    def _pos_processar(self, texto):
+        # Remove caractere 't' que o CapSolver insere indevidamente neste captcha
+        return texto.strip().replace("t", "")
+
+
+class SolucionadorLocal(SolucionadorCaptcha):
+    """
+    Resolve o captcha localmente, em CPU, com o OCR do pacote ddddocr.
+
+    O modelo é carregado uma única vez por processo e compartilhado entre as
+    threads (as leituras são serializadas, pois o modelo não é thread-safe).
+    """
+
+    nome = "local"
+
+    _modelo = None
+    _lock_modelo = threading.Lock()
+
+    def _carregar_modelo(self):
+        """Carrega o modelo de OCR sob demanda."""
+        if SolucionadorLocal._modelo is None:
+            try:
+                import ddddocr
+            except ImportError:
+                raise ImportError(
+                    "O solucionador local requer o pacote ddddocr (pip install ddddocr)"
+                )
+            SolucionadorLocal._modelo = ddddocr.DdddOcr(show_ad=False)
+        return SolucionadorLocal._modelo
+
+    def _resolver(self, imagem_base64):
+        with SolucionadorLocal._lock_modelo:
+            modelo = self._carregar_modelo()
+            return modelo.classification(base64.b64decode(imagem_base64))
+
+
+class SolucionadorFixo(SolucionadorCaptcha):
+    """
+    Devolve sempre o texto definido em CAPTCHA_FIXO, sem ler a imagem.
+
+    Usado com o portal simulado (bench/portal_simulado.py) em benchmarks e
+    testes locais, onde o captcha é conhecido.
+    """
+
+    nome = "fixo"
+
+    def __init__(self, api_key=None):
+        super().__init__(api_key)
+        self.texto = os.getenv("CAPTCHA_FIXO")
+        if not self.texto:
+            raise ValueError("CAPTCHA_FIXO deve estar definido no arquivo .env para usar o backend fixo")
+
+    def _resolver(self, imagem_base64):
+        return self.texto
+
+
+# Backends disponíveis, selecionados pela variável CAPTCHA_BACKEND
+SOLUCIONADORES = {
+    SolucionadorCapSolver.nome: SolucionadorCapSolver,
+    SolucionadorLocal.nome: SolucionadorLocal,
+    SolucionadorFixo.nome: SolucionadorFixo,
+}
+
+# Uma instância por backend no processo, para que as estatísticas sejam agregadas
+_instancias = {}
+_lock_instancias = threading.Lock()
+
+
+def obter_solucionador(nome, api_key=None):
+    """
+    Retorna a instância compartilhada de um backend de captcha.
+
+    Args:
+        nome (str): Nome do backend (ver SOLUCIONADORES)
+        api_key (str): Chave da API, para backends externos
+
+    Returns:
+        SolucionadorCaptcha: Backend configurado
+    """
+    nome = (nome or SolucionadorCapSolver.nome).lower()
+    if nome not in SOLUCIONADORES:
+        raise ValueError(f"Backend de captcha desconhecido: {nome}. Opções: {', '.join(SOLUCIONADORES)}")
+
+    with _lock_instancias:
+        if nome not in _instancias:
+            _instancias[nome] = SOLUCIONADORES[nome](api_key=api_key)
+        return _instancias[nome]
+
+
+def estatisticas_solucionadores():
+    """
+    Estatísticas de todos os backends usados neste processo.
+
+    Returns:
+        dict: Resumo por nome de backend
+    """
+    with _lock_instancias:
+        instancias = dict(_instancias)
+    return {nome: solucionador.resumo() for nome, solucionador in instancias.items()}
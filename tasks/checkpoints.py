@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    tenant TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    pagina INTEGER NOT NULL,
+    numero_nota TEXT,
+    paginacao TEXT,
+    concluido INTEGER NOT NULL DEFAULT 0,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (tenant, mes)
+);
+"""
+
+
+class CheckpointsExtracao:
+    """
+    Progresso persistente (SQLite) da extração de cada mês por cliente.
+
+    Enquanto o mês é processado, o scraper grava a página atual e a última nota
+    tratada nela; ao fim do mês, marca-o como concluído. Se o Chrome cair ou o
+    portal parar de responder no meio do mês, a retomada pula os meses
+    concluídos, volta à página gravada e continua após a última nota.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Arquivo do banco SQLite
+        """
+        self.caminho = caminho
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        # Conexão única por processo, compartilhada entre as threads dos jobs
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            # Gravado a cada nota: em WAL, NORMAL resiste à queda do processo sem um fsync por nota
+            self._conexao.execute("PRAGMA synchronous=NORMAL")
+            self._conexao.executescript(_ESQUEMA)
+
+    def obter(self, tenant, mes):
+        """
+        Retorna o checkpoint de um mês.
+
+        Args:
+            tenant (str): Login do cliente
+            mes (str): Nome do mês
+
+        Returns:
+            dict: pagina, numero_nota, paginacao e concluido, ou None se não houver
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM checkpoints WHERE tenant = ? AND mes = ?", (tenant, mes)
+            ).fetchone()
+        if linha is None:
+            return None
+        checkpoint = dict(linha)
+        checkpoint["concluido"] = bool(checkpoint["concluido"])
+        return checkpoint
+
+    def salvar(self, tenant, mes, pagina, numero_nota=None, paginacao=None):
+        """
+        Grava o progresso de um mês em andamento.
+
+        Args:
+            tenant (str): Login do cliente
+            mes (str): Nome do mês
+            pagina (int): Página de resultados em processamento
+            numero_nota (str): Última nota tratada na página (None no início da página)
+            paginacao (str): Modo de paginação em uso ("completa" ou "ui")
+        """
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(tenant, mes, pagina, numero_nota, paginacao, concluido, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (tenant, mes, pagina, numero_nota, paginacao, time.time()),
+            )
+
+    def concluir(self, tenant, mes):
+        """
+        Marca um mês como totalmente processado.
+
+        Args:
+            tenant (str): Login do cliente
+            mes (str): Nome do mês
+        """
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE checkpoints SET concluido = 1, atualizado_em = ? WHERE tenant = ? AND mes = ?",
+                (time.time(), tenant, mes),
+            )
+
+    def limpar(self, tenant, meses):
+        """
+        Remove os checkpoints de meses que serão processados desde o início.
+
+        Args:
+            tenant (str): Login do cliente
+            meses (list): Nomes dos meses
+        """
+        with self._lock, self._conexao:
+            self._conexao.executemany(
+                "DELETE FROM checkpoints WHERE tenant = ? AND mes = ?",
+                [(tenant, mes) for mes in meses],
+            )
+
+
+# Uma instância por arquivo de banco no processo
+_instancias = {}
+_lock_instancias = threading.Lock()
+
+
+def obter_checkpoints(caminho):
+    """
+    Retorna o registro de checkpoints compartilhado de um arquivo de banco.
+
+    Args:
+        caminho (str): Arquivo do banco SQLite
+
+    Returns:
+        CheckpointsExtracao: Registro aberto
+    """
+    caminho = os.path.abspath(caminho)
+    with _lock_instancias:
+        if caminho not in _instancias:
+            _instancias[caminho] = CheckpointsExtracao(caminho)
+        return _instancias[caminho]
@@ -0,0 +1,123 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Assinatura do início de todo arquivo PDF
+_ASSINATURA_PDF = b"%PDF"
+
+
+class ClienteDownloadHttp:
+    """
+    Baixa PDFs diretamente por HTTP reaproveitando a sessão autenticada do Selenium.
+
+    Usa uma única requests.Session com pool de conexões e executa os downloads
+    em paralelo (com limite), sem passar pelo modal de impressão do portal.
+    """
+
+    def __init__(self, max_paralelo=4, timeout=30):
+        """
+        Args:
+            max_paralelo (int): Número máximo de downloads simultâneos
+            timeout (float): Timeout de cada requisição em segundos
+        """
+        self.max_paralelo = max_paralelo
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        retentativas = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adaptador = HTTPAdapter(pool_maxsize=max_paralelo, max_retries=retentativas)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        self._executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="nfse-http")
+
+    def sincronizar_sessao(self, driver):
+        """
+        Copia cookies e User-Agent do navegador para a sessão HTTP.
+
+        Args:
+            driver: WebDriver do Selenium já autenticado
+        """
+        self.sessao.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+        for cookie in driver.get_cookies():
+            self.sessao.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/"),
+            )
+
+    def baixar(self, url, diretorio, referer=None):
+        """
+        Baixa um PDF para um arquivo novo no diretório informado.
+
+        Args:
+            url (str): URL do PDF
+            diretorio (str): Diretório de destino
+            referer (str): Página de origem enviada no cabeçalho Referer
+
+        Returns:
+            str: Caminho do PDF gravado
+
+        Raises:
+            Exception: Se a resposta não for um PDF (ex.: sessão expirada)
+        """
+        cabecalhos = {"Referer": referer} if referer else {}
+        caminho = os.path.join(diretorio, f"http_{uuid.uuid4().hex}.pdf")
+        temporario = caminho + ".part"
+
+        with self.sessao.get(url, headers=cabecalhos, timeout=self.timeout, stream=True) as resposta:
+            resposta.raise_for_status()
+            blocos = resposta.iter_content(chunk_size=64 * 1024)
+            primeiro = next(blocos, b"")
+            if not primeiro.startswith(_ASSINATURA_PDF):
+                tipo = resposta.headers.get("Content-Type", "desconhecido")
+                raise Exception(f"Resposta não é um PDF (Content-Type: {tipo})")
+            try:
+                with open(temporario, "wb") as arquivo:
+                    arquivo.write(primeiro)
+                    for bloco in blocos:
+                        arquivo.write(bloco)
+                os.replace(temporario, caminho)
+            except Exception:
+                # Conexão caída no meio do stream: não deixar o .part órfão no diretório
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
+
+        return caminho
+
+    def baixar_varios(self, tarefas, diretorio, referer=None):
+        """
+        Baixa vários PDFs em paralelo.
+
+        Args:
+            tarefas (list): Pares (chave, url)
+            diretorio (str): Diretório de destino
+            referer (str): Página de origem enviada no cabeçalho Referer
+
+        Yields:
+            tuple: (chave, caminho, erro) na ordem em que os downloads terminam;
+                caminho é None quando erro não é None
+        """
+        futuros = {
+            self._executor.submit(self.baixar, url, diretorio, referer): chave
+            for chave, url in tarefas
+        }
+        for futuro in as_completed(futuros):
+            try:
+                yield futuros[futuro], futuro.result(), None
+            except Exception as e:
+                yield futuros[futuro], None, e
+
+    def encerrar(self):
+        """Libera o pool de threads e as conexões HTTP."""
+        self._executor.shutdown(wait=True)
+        self.sessao.close()
@@ -0,0 +1,344 @@
+import logging
+import os
+import threading
+import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    NoSuchFrameException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger("nfse.esperas")
+
+# Script que indica se a página terminou as requisições AJAX e o DataTables não
+# está exibindo o indicador de processamento
+_SCRIPT_TABELA_PRONTA = """
+var ativo = window.jQuery ? window.jQuery.active : 0;
+var proc = document.getElementById('tblNfse_processing');
+var processando = proc && window.getComputedStyle(proc).display !== 'none';
+return document.readyState === 'complete' && ativo === 0 && !processando;
+"""
+
+# Script que retorna a página atual do DataTables (ou null se indisponível)
+_SCRIPT_PAGINA_DATATABLES = """
+if (window.jQuery && window.jQuery.fn.dataTable &&
+        window.jQuery.fn.dataTable.isDataTable('#tblNfse')) {
+    return window.jQuery('#tblNfse').DataTable().page.info().page;
+}
+return null;
+"""
+
+# Script que retorna o total de páginas do DataTables (ou null se indisponível)
+_SCRIPT_TOTAL_PAGINAS_DATATABLES = """
+if (window.jQuery && window.jQuery.fn.dataTable &&
+        window.jQuery.fn.dataTable.isDataTable('#tblNfse')) {
+    return window.jQuery('#tblNfse').DataTable().page.info().pages;
+}
+return null;
+"""
+
+
+def _obsoleto(elemento):
+    """Indica se um elemento foi removido do DOM (None conta como obsoleto)."""
+    if elemento is None:
+        return True
+    try:
+        elemento.is_enabled()
+        return False
+    except StaleElementReferenceException:
+        return True
+
+
+def _tabela_pronta(driver):
+    """Indica se a tabela de resultados terminou de ser desenhada."""
+    if not driver.find_elements(By.CSS_SELECTOR, "#tblNfse tbody tr"):
+        return False
+    return bool(driver.execute_script(_SCRIPT_TABELA_PRONTA))
+
+
+def pagina_datatables(driver):
+    """
+    Retorna o índice (base 0) da página exibida pelo DataTables.
+
+    Args:
+        driver: WebDriver do Selenium posicionado no frame da tabela
+
+    Returns:
+        int: Página atual ou None se o DataTables não estiver disponível
+    """
+    try:
+        return driver.execute_script(_SCRIPT_PAGINA_DATATABLES)
+    except Exception:
+        return None
+
+
+def total_paginas_datatables(driver):
+    """
+    Retorna o total de páginas do resultado exibido pelo DataTables.
+
+    Args:
+        driver: WebDriver do Selenium posicionado no frame da tabela
+
+    Returns:
+        int: Total de páginas ou None se o DataTables não estiver disponível
+    """
+    try:
+        return driver.execute_script(_SCRIPT_TOTAL_PAGINAS_DATATABLES)
+    except Exception:
+        return None
+
+
+def capturar_referencia_login(driver):
+    """
+    Captura o estado da página de login antes de clicar em "Entrar".
+
+    Args:
+        driver: WebDriver do Selenium
+
+    Returns:
+        dict: Elemento <html> e texto atual de #lblMsg
+    """
+    mensagens = driver.find_elements(By.CSS_SELECTOR, "#lblMsg")
+    return {
+        "html": driver.find_element(By.TAG_NAME, "html"),
+        "mensagem": mensagens[0].text.strip() if mensagens else "",
+    }
+
+
+def capturar_referencia_tabela(driver):
+    """
+    Captura a primeira linha da tabela de resultados antes de uma ação que a redesenha.
+
+    Args:
+        driver: WebDriver do Selenium posicionado no frame da tabela
+
+    Returns:
+        dict: Primeira linha e página atual, usados pelas condições de redesenho
+    """
+    linhas = driver.find_elements(By.CSS_SELECTOR, "#tblNfse tbody tr")
+    return {
+        "linha": linhas[0] if linhas else None,
+        "pagina": pagina_datatables(driver),
+    }
+
+
+def condicao_login_concluido(referencia):
+    """
+    Login finalizado: menu carregado (sucesso) ou nova mensagem em #lblMsg (erro).
+
+    Args:
+        referencia (dict): Elemento <html> e texto de #lblMsg antes do clique
+    """
+    def verificar(driver):
+        if driver.find_elements(By.ID, "fraMenu"):
+            return {"sucesso": True, "mensagem": ""}
+        mensagens = driver.find_elements(By.CSS_SELECTOR, "#lblMsg")
+        texto = mensagens[0].text.strip() if mensagens else ""
+        # Só considera a mensagem após o postback ou se ela mudou, evitando
+        # reaproveitar o erro exibido na tentativa anterior
+        if texto and (_obsoleto(referencia["html"]) or texto != referencia["mensagem"]):
+            return {"sucesso": False, "mensagem": texto}
+        return False
+    return verificar
+
+
+def condicao_sessao_restaurada():
+    """
+    Página carregada com cookies de sessão: menu (sessão válida) ou tela de login (expirada).
+    """
+    def verificar(driver):
+        if driver.find_elements(By.ID, "fraMenu"):
+            return {"valida": True}
+        if driver.find_elements(By.CSS_SELECTOR, "#txtLogin"):
+            return {"valida": False}
+        return False
+    return verificar
+
+
+def condicao_menu_nfse(texto_link):
+    """
+    Submenu de NFS-e carregado dentro de fraMain > iFrameMenu.
+
+    Retorna o link já com o driver posicionado no frame correto.
+
+    Args:
+        texto_link (str): Texto do link esperado no submenu
+    """
+    def verificar(driver):
+        driver.switch_to.default_content()
+        driver.switch_to.frame("fraMain")
+        driver.switch_to.frame("iFrameMenu")
+        links = driver.find_elements(By.LINK_TEXT, texto_link)
+        if links and links[0].is_displayed() and links[0].is_enabled():
+            return links[0]
+        return False
+    return verificar
+
+
+def condicao_tabela_redesenhada(referencia):
+    """
+    Tabela redesenhada após uma pesquisa: linhas antigas removidas e AJAX concluído.
+
+    Args:
+        referencia (dict): Retorno de capturar_referencia_tabela() antes da ação
+    """
+    def verificar(driver):
+        return _obsoleto(referencia["linha"]) and _tabela_pronta(driver)
+    return verificar
+
+
+def condicao_pagina_alterada(referencia):
+    """
+    DataTables exibindo outra página: índice de página mudou ou linhas substituídas.
+
+    Args:
+        referencia (dict): Retorno de capturar_referencia_tabela() antes do clique
+    """
+    def verificar(driver):
+        pagina = pagina_datatables(driver)
+        if pagina is not None and referencia["pagina"] is not None:
+            mudou = pagina != referencia["pagina"]
+        else:
+            mudou = _obsoleto(referencia["linha"])
+        return mudou and _tabela_pronta(driver)
+    return verificar
+
+
+def condicao_linhas_exibidas(quantidade):
+    """
+    Tabela exibindo ao menos a quantidade de linhas esperada, com AJAX concluído.
+
+    Usada após aumentar o tamanho da página do DataTables, quando as linhas já
+    existentes podem ser reaproveitadas e não ficam obsoletas.
+
+    Args:
+        quantidade (int): Número de linhas esperado na página
+    """
+    def verificar(driver):
+        linhas = driver.find_elements(By.CSS_SELECTOR, "#tblNfse tbody tr")
+        return len(linhas) >= quantidade and _tabela_pronta(driver)
+    return verificar
+
+
+def condicao_modal_fechado():
+    """Nenhum modal do Bootstrap visível na página."""
+    def verificar(driver):
+        for modal in driver.find_elements(By.CSS_SELECTOR, ".modal.show"):
+            if modal.is_displayed():
+                return False
+        return True
+    return verificar
+
+
+class MotorEsperas:
+    """
+    Camada central de esperas por condições nomeadas de prontidão do portal.
+
+    Substitui os time.sleep fixos por WebDriverWait sobre sinais do DOM, com
+    timeout configurável por condição e registro do tempo gasto em cada espera.
+    Os timeouts podem ser sobrescritos no .env com ESPERA_TIMEOUT_<NOME>
+    (ex.: ESPERA_TIMEOUT_TABELA_REDESENHADA=60).
+    """
+
+    CONDICOES = {
+        "login_concluido": condicao_login_concluido,
+        "sessao_restaurada": condicao_sessao_restaurada,
+        "menu_nfse": condicao_menu_nfse,
+        "tabela_redesenhada": condicao_tabela_redesenhada,
+        "pagina_alterada": condicao_pagina_alterada,
+        "linhas_exibidas": condicao_linhas_exibidas,
+        "modal_fechado": condicao_modal_fechado,
+    }
+
+    TIMEOUTS_PADRAO = {
+        "login_concluido": 15,
+        "sessao_restaurada": 10,
+        "menu_nfse": 10,
+        "tabela_redesenhada": 30,
+        "pagina_alterada": 20,
+        "linhas_exibidas": 60,
+        "modal_fechado": 5,
+    }
+
+    # Exceções transitórias enquanto a página ou os frames são recarregados
+    EXCECOES_IGNORADAS = (
+        NoSuchElementException,
+        NoSuchFrameException,
+        StaleElementReferenceException,
+    )
+
+    def __init__(self, timeouts=None, intervalo=0.25):
+        """
+        Args:
+            timeouts (dict): Timeouts por condição, sobrepostos aos padrões e ao .env
+            intervalo (float): Intervalo entre verificações das condições
+        """
+        self.timeouts = dict(self.TIMEOUTS_PADRAO)
+        for nome in self.timeouts:
+            valor = os.getenv(f"ESPERA_TIMEOUT_{nome.upper()}")
+            if valor:
+                self.timeouts[nome] = float(valor)
+        self.timeouts.update(timeouts or {})
+        self.intervalo = intervalo
+        self.tempos = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, nome, driver, *args):
+        """
+        Aguarda a condição nomeada ser satisfeita.
+
+        Args:
+            nome (str): Nome da condição (ver CONDICOES)
+            driver: WebDriver do Selenium
+            *args: Parâmetros da condição (ex.: referência capturada antes da ação)
+
+        Returns:
+            Valor retornado pela condição quando satisfeita
+
+        Raises:
+            TimeoutException: Se a condição não for satisfeita dentro do timeout
+        """
+        condicao = self.CONDICOES[nome](*args)
+        timeout = self.timeouts[nome]
+        inicio = time.monotonic()
+        try:
+            return WebDriverWait(
+                driver,
+                timeout,
+                poll_frequency=self.intervalo,
+                ignored_exceptions=self.EXCECOES_IGNORADAS,
+            ).until(condicao)
+        except TimeoutException:
+            raise TimeoutException(f"Condição '{nome}' não satisfeita em {timeout}s")
+        finally:
+            duracao = time.monotonic() - inicio
+            self._registrar(nome, duracao)
+            logger.debug(f"Espera '{nome}': {duracao:.3f}s", extra={"duracao": round(duracao, 3)})
+
+    def _registrar(self, nome, duracao):
+        """Armazena a duração de uma espera."""
+        with self._lock:
+            self.tempos.setdefault(nome, []).append(duracao)
+
+    def resumo(self):
+        """
+        Resume os tempos de espera registrados por condição.
+
+        Returns:
+            dict: Quantidade, total, média e máximo (em segundos) por condição
+        """
+        with self._lock:
+            tempos = {nome: list(duracoes) for nome, duracoes in self.tempos.items()}
+        return {
+            nome: {
+                "quantidade": len(duracoes),
+                "total": round(sum(duracoes), 3),
+                "media": round(sum(duracoes) / len(duracoes), 3),
+                "maximo": round(max(duracoes), 3),
+            }
+            for nome, duracoes in tempos.items()
+        }
@@ -0,0 +1,226 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger("nfse.jobs")
+
+# Estados possíveis de um job
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+# Falhou após salvar parte dos arquivos (exceção com o atributo "arquivos")
+STATUS_PARCIAL = "parcial"
+
+STATUS_FINALIZADOS = (STATUS_CONCLUIDO, STATUS_ERRO, STATUS_PARCIAL)
+
+
+class GerenciadorJobs:
+    """
+    Fila de jobs executados em segundo plano por um pool limitado de threads.
+
+    Cada job recebe um identificador único no momento em que é enfileirado,
+    permitindo que a API responda imediatamente enquanto o scraping (bloqueante)
+    roda fora do event loop do uvicorn. O progresso é registrado como uma lista
+    de eventos por job, que pode ser acompanhada enquanto o job executa.
+    """
+
+    def __init__(self, max_workers=2, max_jobs_finalizados=200):
+        """
+        Inicializa o pool de workers e o registro de jobs.
+
+        Args:
+            max_workers (int): Número máximo de jobs executando simultaneamente
+            max_jobs_finalizados (int): Quantidade de jobs finalizados mantidos em memória
+        """
+        self.max_workers = max_workers
+        self.max_jobs_finalizados = max_jobs_finalizados
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nfse-job")
+        self._jobs = {}
+        self._eventos = {}
+        self._lock = threading.Lock()
+        # Acorda os leitores de eventos quando há novidades em algum job
+        self._condicao = threading.Condition(self._lock)
+
+    def submeter(self, funcao, *args, **kwargs):
+        """
+        Enfileira um job para execução em segundo plano.
+
+        A função é chamada como ``funcao(job_id, *args, **kwargs)`` e seu retorno
+        é armazenado como resultado do job.
+
+        Args:
+            funcao (callable): Função a ser executada pelo worker
+
+        Returns:
+            str: Identificador do job criado
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": STATUS_PENDENTE,
+                "mensagem": "Job aguardando execução",
+                "criado_em": datetime.now().isoformat(),
+                "iniciado_em": None,
+                "finalizado_em": None,
+                "resultado": None,
+                "contexto": {},
+            }
+            self._eventos[job_id] = []
+            self._remover_jobs_antigos()
+
+        self._executor.submit(self._executar, job_id, funcao, args, kwargs)
+        logger.info(f"Job {job_id} enfileirado")
+        return job_id
+
+    def _executar(self, job_id, funcao, args, kwargs):
+        """Executa o job no worker e registra o resultado ou o erro."""
+        self._atualizar(
+            job_id,
+            status=STATUS_EXECUTANDO,
+            mensagem="Job em execução",
+            iniciado_em=datetime.now().isoformat(),
+        )
+        self.registrar_evento(job_id, "job_iniciado")
+        try:
+            resultado = funcao(job_id, *args, **kwargs)
+            self.registrar_evento(job_id, "job_concluido", total_arquivos=len(resultado or []))
+            self._atualizar(
+                job_id,
+                status=STATUS_CONCLUIDO,
+                mensagem="Job concluído com sucesso",
+                resultado=resultado,
+                finalizado_em=datetime.now().isoformat(),
+            )
+            logger.info(f"Job {job_id} concluído")
+        except Exception as e:
+            # Arquivos já salvos antes da falha continuam disponíveis no resultado
+            arquivos = getattr(e, "arquivos", None)
+            self.registrar_evento(job_id, "job_erro", mensagem=str(e))
+            self._atualizar(
+                job_id,
+                status=STATUS_PARCIAL if arquivos else STATUS_ERRO,
+                mensagem=str(e),
+                resultado=arquivos,
+                finalizado_em=datetime.now().isoformat(),
+            )
+            logger.error(f"Job {job_id} falhou: {e}")
+
+    def _atualizar(self, job_id, **campos):
+        """Atualiza os campos de um job de forma thread-safe."""
+        with self._condicao:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(campos)
+                self._condicao.notify_all()
+
+    def definir_contexto(self, job_id, **campos):
+        """
+        Guarda informações do job usadas depois pela API (ex.: pasta dos arquivos).
+
+        Args:
+            job_id (str): Identificador do job
+            **campos: Valores a armazenar no contexto do job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["contexto"].update(campos)
+
+    def registrar_evento(self, job_id, tipo, **dados):
+        """
+        Registra um evento de progresso de um job.
+
+        Args:
+            job_id (str): Identificador do job
+            tipo (str): Tipo do evento (ex.: "mes_iniciado", "nota_baixada")
+            **dados: Informações do evento
+        """
+        with self._condicao:
+            eventos = self._eventos.get(job_id)
+            if eventos is None:
+                return
+            eventos.append({
+                "id": len(eventos),
+                "tipo": tipo,
+                "momento": datetime.now().isoformat(),
+                **dados,
+            })
+            self._condicao.notify_all()
+
+    def aguardar_eventos(self, job_id, a_partir_de=0, timeout=15):
+        """
+        Retorna os eventos de um job a partir de uma posição, aguardando novos.
+
+        Bloqueia até haver eventos após ``a_partir_de``, o job terminar ou o
+        timeout expirar.
+
+        Args:
+            job_id (str): Identificador do job
+            a_partir_de (int): Id do primeiro evento desejado
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            tuple: (eventos, finalizado) ou None se o job não existir
+        """
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: job_id not in self._jobs
+                or len(self._eventos[job_id]) > a_partir_de
+                or self._jobs[job_id]["status"] in STATUS_FINALIZADOS,
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return list(self._eventos[job_id][a_partir_de:]), job["status"] in STATUS_FINALIZADOS
+
+    def _remover_jobs_antigos(self):
+        """Descarta os jobs finalizados mais antigos quando o limite é excedido."""
+        finalizados = [
+            job for job in self._jobs.values() if job["status"] in STATUS_FINALIZADOS
+        ]
+        excedente = len(finalizados) - self.max_jobs_finalizados
+        if excedente <= 0:
+            return
+        finalizados.sort(key=lambda job: job["finalizado_em"] or "")
+        for job in finalizados[:excedente]:
+            del self._jobs[job["job_id"]]
+            del self._eventos[job["job_id"]]
+
+    def obter(self, job_id):
+        """
+        Retorna uma cópia do estado atual de um job.
+
+        Args:
+            job_id (str): Identificador do job
+
+        Returns:
+            dict: Estado do job ou None se não existir
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def listar(self):
+        """
+        Lista o estado de todos os jobs conhecidos.
+
+        Returns:
+            list: Cópias dos jobs ordenadas pela data de criação
+        """
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job["criado_em"])
+
+    def encerrar(self, aguardar=True):
+        """
+        Encerra o pool de workers.
+
+        Args:
+            aguardar (bool): Se True, aguarda os jobs em execução terminarem
+        """
+        self._executor.shutdown(wait=aguardar)
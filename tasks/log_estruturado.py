@@ -0,0 +1,140 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Campos estruturados aceitos em extra={...} ou em contexto_log(...)
+CAMPOS_ESTRUTURADOS = ("tenant", "job_id", "mes", "pagina", "numero_nota", "fase", "duracao")
+
+# Contexto da execução atual (por thread), anexado a cada registro
+_contexto = contextvars.ContextVar("contexto_log", default={})
+
+_listener = None
+_lock = threading.Lock()
+
+
+class FormatadorJson(logging.Formatter):
+    """Formata cada registro como uma linha JSON com os campos estruturados."""
+
+    def format(self, record):
+        dados = {
+            "momento": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "mensagem": record.getMessage(),
+        }
+        dados.update(getattr(record, "contexto", {}))
+        for campo in CAMPOS_ESTRUTURADOS:
+            if hasattr(record, campo):
+                dados[campo] = getattr(record, campo)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _FiltroContexto(logging.Filter):
+    """Copia o contexto da thread que gerou o registro (executado antes da fila)."""
+
+    def filter(self, record):
+        record.contexto = dict(_contexto.get())
+        return True
+
+
+@contextmanager
+def contexto_log(**campos):
+    """
+    Acrescenta campos estruturados a todos os registros emitidos no bloco.
+
+    Exemplo:
+        with contexto_log(tenant=login, mes="Maio"):
+            logger.info("Processando mês")
+
+    Args:
+        **campos: Campos do contexto (ex.: tenant, job_id, mes, fase)
+    """
+    token = _contexto.set({**_contexto.get(), **campos})
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+def contexto_atual():
+    """
+    Retorna os campos de contexto ativos na thread atual.
+
+    Returns:
+        dict: Campos definidos pelos blocos contexto_log em andamento (não alterar)
+    """
+    return _contexto.get()
+
+
+def configurar_logging():
+    """
+    Configura o logging do processo uma única vez (chamadas seguintes não fazem nada).
+
+    Os loggers "nfse.*", "canceled_notes" e "error_notes" enviam os registros a
+    uma fila; uma thread em segundo plano os grava, de modo que o scraping nunca
+    espera por disco ou console. Destinos:
+    - logs/nfse.jsonl: registros "nfse.*" em JSON, com os campos estruturados
+    - console: mensagens "nfse.*", como os antigos print()
+    - logs/notas_canceladas.log e logs/erros_processamento.log: como antes
+
+    Variáveis do .env: LOG_DIR (padrão "logs") e LOG_NIVEL (padrão "INFO").
+    """
+    global _listener
+    if _listener is not None:
+        return
+    with _lock:
+        if _listener is not None:
+            return
+
+        log_dir = os.getenv("LOG_DIR", "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        formato_texto = logging.Formatter("%(asctime)s - %(message)s")
+
+        json_handler = logging.FileHandler(os.path.join(log_dir, "nfse.jsonl"), encoding="utf-8")
+        json_handler.setFormatter(FormatadorJson())
+        json_handler.addFilter(logging.Filter("nfse"))
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        console_handler.addFilter(logging.Filter("nfse"))
+
+        canceladas_handler = logging.FileHandler(os.path.join(log_dir, "notas_canceladas.log"), encoding="utf-8")
+        canceladas_handler.setFormatter(formato_texto)
+        canceladas_handler.addFilter(logging.Filter("canceled_notes"))
+
+        erros_handler = logging.FileHandler(os.path.join(log_dir, "erros_processamento.log"), encoding="utf-8")
+        erros_handler.setFormatter(formato_texto)
+        erros_handler.addFilter(logging.Filter("error_notes"))
+
+        fila = queue.SimpleQueue()
+        fila_handler = logging.handlers.QueueHandler(fila)
+        fila_handler.addFilter(_FiltroContexto())
+
+        niveis = {
+            "nfse": getattr(logging, os.getenv("LOG_NIVEL", "INFO").upper(), logging.INFO),
+            "canceled_notes": logging.INFO,
+            "error_notes": logging.ERROR,
+        }
+        for nome, nivel in niveis.items():
+            logger = logging.getLogger(nome)
+            logger.setLevel(nivel)
+            logger.handlers = [fila_handler]
+            logger.propagate = False
+
+        listener = logging.handlers.QueueListener(
+            fila, json_handler, console_handler, canceladas_handler, erros_handler,
+            respect_handler_level=True,
+        )
+        listener.start()
+        # Esvazia a fila ao encerrar o processo
+        atexit.register(listener.stop)
+        _listener = listener
@@ -0,0 +1,254 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+# STATUS_PARCIAL: tenant com parte dos meses concluída e parte com erro
+from tasks.jobs import STATUS_PENDENTE, STATUS_EXECUTANDO, STATUS_CONCLUIDO, STATUS_ERRO, STATUS_PARCIAL
+
+logger = logging.getLogger("nfse.lotes")
+
+
+class EscalonadorLotes:
+    """
+    Executa lotes com vários logins dividindo a capacidade de forma justa.
+
+    Cada login de um lote é quebrado em unidades de trabalho (grupos de meses).
+    Os workers pegam unidades em rodízio entre os logins com trabalho pendente,
+    respeitando um limite por login, de modo que um CNPJ com muitos meses não
+    atrasa os demais nem abre várias sessões simultâneas no portal. O limite de
+    navegadores abertos fica com a função executada, compartilhado com os jobs. Logins repetidos em lotes diferentes
+    compartilham a mesma fila.
+    """
+
+    def __init__(self, max_concorrentes=2, max_por_tenant=1, max_lotes_finalizados=50):
+        """
+        Args:
+            max_concorrentes (int): Workers que executam unidades (todos os lotes);
+                use a capacidade global de navegadores, para não reter unidades à toa
+            max_por_tenant (int): Unidades simultâneas de um mesmo login
+            max_lotes_finalizados (int): Quantidade de lotes finalizados mantidos em memória
+        """
+        self.max_concorrentes = max_concorrentes
+        self.max_por_tenant = max_por_tenant
+        self.max_lotes_finalizados = max_lotes_finalizados
+        self._lotes = {}
+        # Login -> fila de unidades; a ordem das chaves define o rodízio
+        self._filas = OrderedDict()
+        self._ativos_por_tenant = {}
+        self._condicao = threading.Condition()
+        self._encerrado = False
+        self._workers = []
+
+    def _iniciar_workers(self):
+        """Cria os workers na primeira submissão."""
+        if self._workers:
+            return
+        for indice in range(self.max_concorrentes):
+            worker = threading.Thread(
+                target=self._executar_worker, name=f"nfse-lote-{indice}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submeter(self, funcao, itens):
+        """
+        Enfileira um lote.
+
+        Cada unidade é executada como ``funcao(login, password, meses, item)`` e
+        deve retornar a lista de arquivos baixados.
+
+        Args:
+            funcao (callable): Função que processa uma unidade
+            itens (list): Dicts com "login", "password" e "grupos" (lista de
+                listas de meses); campos extras são repassados em ``item``
+
+        Returns:
+            str: Identificador do lote
+        """
+        lote_id = uuid.uuid4().hex
+        lote = {
+            "lote_id": lote_id,
+            "status": STATUS_PENDENTE,
+            "criado_em": datetime.now().isoformat(),
+            "finalizado_em": None,
+            "pendentes": 0,
+            "tenants": OrderedDict(),
+        }
+        unidades = []
+        for item in itens:
+            tenant = lote["tenants"].setdefault(item["login"], {
+                "status": STATUS_PENDENTE,
+                "meses": [],
+                "meses_concluidos": [],
+                "erros": {},
+                "arquivos_baixados": [],
+            })
+            for meses in item["grupos"]:
+                tenant["meses"].extend(meses)
+                unidades.append((lote_id, item["login"], item["password"], meses, item, funcao))
+        lote["pendentes"] = len(unidades)
+        if not unidades:
+            lote["status"] = STATUS_CONCLUIDO
+            lote["finalizado_em"] = datetime.now().isoformat()
+
+        with self._condicao:
+            if self._encerrado:
+                raise Exception("Escalonador de lotes encerrado")
+            self._lotes[lote_id] = lote
+            self._remover_lotes_antigos()
+            for unidade in unidades:
+                self._filas.setdefault(unidade[1], deque()).append(unidade)
+            self._iniciar_workers()
+            self._condicao.notify_all()
+
+        logger.info(f"Lote {lote_id} enfileirado com {len(unidades)} unidades de {len(lote['tenants'])} logins")
+        return lote_id
+
+    def _proxima_unidade(self):
+        """
+        Retira a próxima unidade em rodízio entre os logins (chamado com o lock).
+
+        Returns:
+            tuple: Unidade a executar ou None se nenhuma pode começar agora
+        """
+        for tenant in list(self._filas):
+            if self._ativos_por_tenant.get(tenant, 0) >= self.max_por_tenant:
+                continue
+            fila = self._filas[tenant]
+            unidade = fila.popleft()
+            # O login atendido vai para o fim do rodízio
+            del self._filas[tenant]
+            if fila:
+                self._filas[tenant] = fila
+            self._ativos_por_tenant[tenant] = self._ativos_por_tenant.get(tenant, 0) + 1
+            return unidade
+        return None
+
+    def _executar_worker(self):
+        """Laço de um worker: executa unidades até o escalonador ser encerrado."""
+        while True:
+            with self._condicao:
+                unidade = self._proxima_unidade()
+                while unidade is None and not self._encerrado:
+                    self._condicao.wait()
+                    unidade = self._proxima_unidade()
+                if unidade is None:
+                    return
+                lote_id, login = unidade[0], unidade[1]
+                self._marcar_inicio(lote_id, login)
+
+            arquivos, erro = self._executar_unidade(unidade)
+
+            with self._condicao:
+                self._ativos_por_tenant[login] -= 1
+                self._registrar_resultado(unidade, arquivos, erro)
+                self._condicao.notify_all()
+
+    def _executar_unidade(self, unidade):
+        """Executa uma unidade, retornando (arquivos, erro)."""
+        lote_id, login, password, meses, item, funcao = unidade
+        logger.info(f"Lote {lote_id}: processando {login} - meses {meses}")
+        try:
+            return funcao(login, password, meses, item) or [], None
+        except Exception as e:
+            logger.error(f"Lote {lote_id}: erro em {login} - meses {meses}: {e}")
+            # Falha parcial: arquivos dos meses concluídos antes do erro
+            return getattr(e, "arquivos", None) or [], e
+
+    def _marcar_inicio(self, lote_id, login):
+        """Marca lote e login como em execução (chamado com o lock)."""
+        lote = self._lotes.get(lote_id)
+        if lote is None:
+            return
+        lote["status"] = STATUS_EXECUTANDO
+        lote["tenants"][login]["status"] = STATUS_EXECUTANDO
+
+    def _registrar_resultado(self, unidade, arquivos, erro):
+        """Agrega o resultado de uma unidade ao lote (chamado com o lock)."""
+        lote_id, login, _, meses, _, _ = unidade
+        lote = self._lotes.get(lote_id)
+        if lote is None:
+            return
+        tenant = lote["tenants"][login]
+        falhos = []
+        if erro is not None:
+            # Extração incompleta informa os meses pendentes; outros erros valem para a unidade inteira
+            pendentes = getattr(erro, "meses_pendentes", None)
+            falhos = [mes for mes in meses if mes in pendentes] if pendentes else list(meses)
+        tenant["meses_concluidos"].extend(mes for mes in meses if mes not in falhos)
+        tenant["arquivos_baixados"].extend(arquivos)
+        for mes in falhos:
+            tenant["erros"][mes] = str(erro)
+
+        if len(tenant["meses_concluidos"]) + len(tenant["erros"]) >= len(tenant["meses"]):
+            if not tenant["erros"]:
+                tenant["status"] = STATUS_CONCLUIDO
+            elif tenant["meses_concluidos"]:
+                tenant["status"] = STATUS_PARCIAL
+            else:
+                tenant["status"] = STATUS_ERRO
+
+        lote["pendentes"] -= 1
+        if lote["pendentes"] == 0:
+            lote["status"] = STATUS_CONCLUIDO
+            lote["finalizado_em"] = datetime.now().isoformat()
+            logger.info(f"Lote {lote_id} concluído")
+
+    def _remover_lotes_antigos(self):
+        """Descarta os lotes finalizados mais antigos quando o limite é excedido."""
+        finalizados = [lote for lote in self._lotes.values() if lote["finalizado_em"]]
+        excedente = len(finalizados) - self.max_lotes_finalizados
+        if excedente <= 0:
+            return
+        finalizados.sort(key=lambda lote: lote["finalizado_em"])
+        for lote in finalizados[:excedente]:
+            del self._lotes[lote["lote_id"]]
+
+    def _copiar(self, lote):
+        """Cópia do lote sem estado interno, segura para serialização."""
+        copia = {chave: valor for chave, valor in lote.items() if chave != "tenants"}
+        copia["tenants"] = {
+            login: {
+                "status": tenant["status"],
+                "meses": list(tenant["meses"]),
+                "meses_concluidos": list(tenant["meses_concluidos"]),
+                "erros": dict(tenant["erros"]),
+                "arquivos_baixados": list(tenant["arquivos_baixados"]),
+            }
+            for login, tenant in lote["tenants"].items()
+        }
+        return copia
+
+    def obter(self, lote_id):
+        """
+        Retorna uma cópia do estado atual de um lote.
+
+        Args:
+            lote_id (str): Identificador do lote
+
+        Returns:
+            dict: Estado do lote ou None se não existir
+        """
+        with self._condicao:
+            lote = self._lotes.get(lote_id)
+            return self._copiar(lote) if lote is not None else None
+
+    def listar(self):
+        """
+        Lista o estado de todos os lotes conhecidos.
+
+        Returns:
+            list: Cópias dos lotes ordenadas pela data de criação
+        """
+        with self._condicao:
+            lotes = [self._copiar(lote) for lote in self._lotes.values()]
+        return sorted(lotes, key=lambda lote: lote["criado_em"])
+
+    def encerrar(self):
+        """Encerra os workers após as unidades em execução (as pendentes são descartadas)."""
+        with self._condicao:
+            self._encerrado = True
+            self._filas.clear()
+            self._condicao.notify_all()
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import threading
+import time
+
+from tasks.armazem import calcular_sha256
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS notas (
+    tenant TEXT NOT NULL,
+    numero_nota TEXT NOT NULL,
+    data_emissao TEXT NOT NULL,
+    valor_nota TEXT NOT NULL,
+    cancelada INTEGER NOT NULL DEFAULT 0,
+    mes TEXT NOT NULL,
+    caminho TEXT NOT NULL,
+    atualizado_em REAL NOT NULL,
+    sha256 TEXT,
+    tamanho INTEGER,
+    modificado_em REAL,
+    PRIMARY KEY (tenant, numero_nota, data_emissao)
+);
+CREATE INDEX IF NOT EXISTS idx_notas_sha256 ON notas (sha256);
+CREATE TABLE IF NOT EXISTS envios_s3 (
+    chave TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    enviado_em REAL NOT NULL
+);
+"""
+
+
+class ManifestoNotas:
+    """
+    Registro persistente (SQLite) das notas já armazenadas por cliente.
+
+    Cada nota é identificada por tenant + número + data de emissão. Antes de
+    baixar uma nota o scraper consulta o manifesto: se ela já foi salva com o
+    mesmo valor e situação (cancelada ou não) e o PDF ainda existe, o download
+    é pulado. Assim um mês já sincronizado custa apenas a leitura da tabela.
+    Também guarda o SHA-256, o tamanho e a data de modificação de cada PDF (o
+    hash só é recalculado quando os dois últimos mudam) e os objetos já
+    enviados ao S3.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Arquivo do banco SQLite
+        """
+        self.caminho = caminho
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        # Conexão única por processo, compartilhada entre as threads dos jobs
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._migrar()
+            self._conexao.executescript(_ESQUEMA)
+
+    def _migrar(self):
+        """Adiciona colunas criadas após a primeira versão do banco."""
+        colunas = [linha[1] for linha in self._conexao.execute("PRAGMA table_info(notas)")]
+        if not colunas:
+            return
+        for coluna, tipo in (("sha256", "TEXT"), ("tamanho", "INTEGER"), ("modificado_em", "REAL")):
+            if coluna not in colunas:
+                self._conexao.execute(f"ALTER TABLE notas ADD COLUMN {coluna} {tipo}")
+
+    def obter(self, tenant, numero_nota, data_emissao):
+        """
+        Retorna o registro de uma nota.
+
+        Args:
+            tenant (str): Login do cliente
+            numero_nota (str): Número da nota fiscal
+            data_emissao (str): Data de emissão da nota
+
+        Returns:
+            dict: Registro da nota ou None se ainda não armazenada
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM notas WHERE tenant = ? AND numero_nota = ? AND data_emissao = ?",
+                (tenant, numero_nota, data_emissao),
+            ).fetchone()
+        if linha is None:
+            return None
+        registro = dict(linha)
+        registro["cancelada"] = bool(registro["cancelada"])
+        return registro
+
+    def sincronizada(self, tenant, numero_nota, data_emissao, valor_nota, cancelada):
+        """
+        Verifica se a nota já está armazenada e não mudou desde então.
+
+        Args:
+            tenant (str): Login do cliente
+            numero_nota (str): Número da nota fiscal
+            data_emissao (str): Data de emissão da nota
+            valor_nota (str): Valor atual exibido pelo portal
+            cancelada (bool): Situação atual da nota
+
+        Returns:
+            tuple: (sincronizada, registro); registro é None se a nota é nova
+        """
+        registro = self.obter(tenant, numero_nota, data_emissao)
+        if registro is None:
+            return False, None
+        atual = (
+            registro["valor_nota"] == valor_nota
+            and registro["cancelada"] == bool(cancelada)
+            and os.path.exists(registro["caminho"])
+        )
+        return atual, registro
+
+    def registrar(self, tenant, numero_nota, data_emissao, valor_nota, cancelada, mes, caminho, sha256=None):
+        """
+        Registra (ou atualiza) uma nota armazenada.
+
+        Args:
+            tenant (str): Login do cliente
+            numero_nota (str): Número da nota fiscal
+            data_emissao (str): Data de emissão da nota
+            valor_nota (str): Valor da nota fiscal
+            cancelada (bool): Se a nota estava cancelada ao ser baixada
+            mes (str): Nome do mês em que a nota foi organizada
+            caminho (str): Caminho do PDF armazenado
+            sha256 (str): Hash do conteúdo do PDF
+        """
+        # Tamanho e data de modificação do arquivo que corresponde ao hash
+        estado = os.stat(caminho)
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO notas "
+                "(tenant, numero_nota, data_emissao, valor_nota, cancelada, mes, caminho, atualizado_em, "
+                "sha256, tamanho, modificado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    tenant, numero_nota, data_emissao, valor_nota, int(bool(cancelada)),
+                    mes, os.path.abspath(caminho), time.time(), sha256,
+                    estado.st_size, estado.st_mtime,
+                ),
+            )
+
+    def conteudo_integro(self, registro):
+        """
+        Confere se o PDF de um registro ainda tem o conteúdo registrado.
+
+        Se tamanho e data de modificação forem os registrados, o arquivo é
+        considerado íntegro sem ser lido; caso contrário o hash é recalculado
+        (e, se conferir, o novo estado do arquivo é gravado).
+
+        Args:
+            registro (dict): Registro retornado por obter() ou sincronizada()
+
+        Returns:
+            bool: True se o conteúdo corresponde ao SHA-256 registrado (ou se
+                o registro não tem hash)
+        """
+        if not registro["sha256"]:
+            return True
+        try:
+            estado = os.stat(registro["caminho"])
+        except OSError:
+            return False
+        if estado.st_size == registro["tamanho"] and estado.st_mtime == registro["modificado_em"]:
+            return True
+        if calcular_sha256(registro["caminho"]) != registro["sha256"]:
+            return False
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE notas SET tamanho = ?, modificado_em = ? "
+                "WHERE tenant = ? AND numero_nota = ? AND data_emissao = ?",
+                (
+                    estado.st_size, estado.st_mtime,
+                    registro["tenant"], registro["numero_nota"], registro["data_emissao"],
+                ),
+            )
+        return True
+
+    def envio_s3(self, chave):
+        """
+        Retorna o hash do conteúdo já enviado ao S3 com uma chave.
+
+        Args:
+            chave (str): Chave do objeto no bucket
+
+        Returns:
+            str: SHA-256 do último envio ou None se a chave nunca foi enviada
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT sha256 FROM envios_s3 WHERE chave = ?", (chave,)
+            ).fetchone()
+        return linha["sha256"] if linha else None
+
+    def registrar_envio_s3(self, chave, sha256):
+        """
+        Registra o envio bem-sucedido de um conteúdo ao S3.
+
+        Args:
+            chave (str): Chave do objeto no bucket
+            sha256 (str): Hash do conteúdo enviado
+        """
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO envios_s3 (chave, sha256, enviado_em) VALUES (?, ?, ?)",
+                (chave, sha256, time.time()),
+            )
+
+    def remover(self, tenant, numero_nota, data_emissao):
+        """
+        Remove o registro de uma nota.
+
+        Args:
+            tenant (str): Login do cliente
+            numero_nota (str): Número da nota fiscal
+            data_emissao (str): Data de emissão da nota
+        """
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "DELETE FROM notas WHERE tenant = ? AND numero_nota = ? AND data_emissao = ?",
+                (tenant, numero_nota, data_emissao),
+            )
+
+
+# Uma instância por arquivo de banco no processo
+_instancias = {}
+_lock_instancias = threading.Lock()
+
+
+def obter_manifesto(caminho):
+    """
+    Retorna o manifesto compartilhado de um arquivo de banco.
+
+    Args:
+        caminho (str): Arquivo do banco SQLite
+
+    Returns:
+        ManifestoNotas: Manifesto aberto
+    """
+    caminho = os.path.abspath(caminho)
+    with _lock_instancias:
+        if caminho not in _instancias:
+            _instancias[caminho] = ManifestoNotas(caminho)
+        return _instancias[caminho]
@@ -0,0 +1,344 @@
+import functools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets padrão dos histogramas de duração
+LIMITES_PADRAO = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _formatar_valor(valor):
+    """Formata um número no padrão do formato texto do Prometheus."""
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    """Monta o trecho {rotulo="valor",...} de uma amostra."""
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ""
+    texto = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares)
+    return "{" + texto + "}"
+
+
+def _escapar(valor):
+    """Escapa barras, aspas e quebras de linha no valor de um rótulo."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metrica:
+    """Base das métricas: nome, descrição, rótulos e valores por combinação de rótulos."""
+
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        """
+        Args:
+            nome (str): Nome da métrica (ex.: "nfse_notas_total")
+            descricao (str): Texto do HELP
+            rotulos (tuple): Nomes dos rótulos aceitos
+        """
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos):
+        """Converte os rótulos informados na tupla de valores, na ordem declarada."""
+        if set(rotulos) != set(self.rotulos):
+            raise Exception(f"Métrica {self.nome} exige os rótulos {self.rotulos}, recebeu {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def exportar(self):
+        """
+        Gera as linhas da métrica no formato texto do Prometheus.
+
+        Returns:
+            list: Linhas HELP, TYPE e amostras
+        """
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return linhas
+
+    def _amostras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_valor(valor)}"
+            for chave, valor in valores
+        ]
+
+
+class Contador(_Metrica):
+    """Valor que só aumenta (ex.: notas baixadas, tentativas de login)."""
+
+    tipo = "counter"
+
+    def inc(self, valor=1, **rotulos):
+        """
+        Incrementa o contador.
+
+        Args:
+            valor (float): Quantidade a somar
+            **rotulos: Valores dos rótulos da métrica
+        """
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+
+class Medidor(_Metrica):
+    """
+    Valor instantâneo (ex.: navegadores abertos).
+
+    Pode ser definido explicitamente ou calculado na coleta por uma função.
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, nome, descricao, rotulos=(), funcao=None):
+        """
+        Args:
+            nome (str): Nome da métrica
+            descricao (str): Texto do HELP
+            rotulos (tuple): Nomes dos rótulos aceitos
+            funcao (callable): Sem rótulos, chamada a cada coleta para obter o valor
+        """
+        super().__init__(nome, descricao, rotulos)
+        self.funcao = funcao
+
+    def definir(self, valor, **rotulos):
+        """
+        Define o valor do medidor.
+
+        Args:
+            valor (float): Valor atual
+            **rotulos: Valores dos rótulos da métrica
+        """
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = valor
+
+    def _amostras(self):
+        if self.funcao is not None:
+            return [f"{self.nome} {_formatar_valor(self.funcao())}"]
+        return super()._amostras()
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em buckets cumulativos (ex.: durações das fases)."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_PADRAO):
+        """
+        Args:
+            nome (str): Nome da métrica
+            descricao (str): Texto do HELP
+            rotulos (tuple): Nomes dos rótulos aceitos
+            limites (tuple): Limites superiores dos buckets, em ordem crescente
+        """
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, valor, **rotulos):
+        """
+        Registra uma observação.
+
+        Args:
+            valor (float): Valor observado (ex.: duração em segundos)
+            **rotulos: Valores dos rótulos da métrica
+        """
+        chave = self._chave(rotulos)
+        with self._lock:
+            serie = self._valores.get(chave)
+            if serie is None:
+                serie = self._valores[chave] = {"buckets": [0] * len(self.limites), "soma": 0.0, "quantidade": 0}
+            for indice, limite in enumerate(self.limites):
+                if valor <= limite:
+                    serie["buckets"][indice] += 1
+                    break
+            serie["soma"] += valor
+            serie["quantidade"] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """
+        Mede a duração do bloco, inclusive quando ele termina com exceção.
+
+        Exemplo:
+            with DURACAO_FASES.medir(fase="login"):
+                self._autenticar(driver, login, password)
+
+        Args:
+            **rotulos: Valores dos rótulos da métrica
+        """
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observar(time.monotonic() - inicio, **rotulos)
+
+    def resumo(self):
+        """
+        Resume as observações por combinação de rótulos.
+
+        Returns:
+            dict: Quantidade, soma e média por valor dos rótulos (tupla)
+        """
+        with self._lock:
+            return {
+                chave: {
+                    "quantidade": serie["quantidade"],
+                    "soma": serie["soma"],
+                    "media": serie["soma"] / serie["quantidade"] if serie["quantidade"] else 0.0,
+                }
+                for chave, serie in self._valores.items()
+            }
+
+    def _amostras(self):
+        with self._lock:
+            series = sorted(
+                (chave, {"buckets": list(serie["buckets"]), "soma": serie["soma"], "quantidade": serie["quantidade"]})
+                for chave, serie in self._valores.items()
+            )
+        linhas = []
+        for chave, serie in series:
+            acumulado = 0
+            for limite, quantidade in zip(self.limites, serie["buckets"]):
+                acumulado += quantidade
+                rotulos = _formatar_rotulos(self.rotulos, chave, ("le", _formatar_valor(limite)))
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave, ("le", "+Inf"))
+            linhas.append(f"{self.nome}_bucket{rotulos} {serie['quantidade']}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_valor(serie['soma'])}")
+            linhas.append(f"{self.nome}_count{rotulos} {serie['quantidade']}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas exportadas pelo endpoint /metrics."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metrica):
+        """
+        Adiciona uma métrica ao registro.
+
+        Args:
+            metrica (_Metrica): Contador, Medidor ou Histograma
+
+        Returns:
+            _Metrica: A própria métrica
+
+        Raises:
+            Exception: Se já existir uma métrica com o mesmo nome
+        """
+        with self._lock:
+            if metrica.nome in self._metricas:
+                raise Exception(f"Métrica {metrica.nome} já registrada")
+            self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def exportar(self):
+        """
+        Gera o texto de todas as métricas no formato de exposição do Prometheus.
+
+        Returns:
+            str: Conteúdo da resposta de /metrics
+        """
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for metrica in metricas:
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+# Navegadores abertos pelo processo (o driver sai do conjunto ao ser coletado)
+_navegadores = weakref.WeakSet()
+
+
+def registrar_navegador(driver):
+    """
+    Passa a contar um navegador em nfse_navegadores_ativos.
+
+    Args:
+        driver: WebDriver recém-criado
+    """
+    _navegadores.add(driver)
+
+
+def _contar_navegadores_ativos():
+    """Conta os navegadores registrados cujo processo do chromedriver segue em execução."""
+    ativos = 0
+    for driver in list(_navegadores):
+        processo = getattr(getattr(driver, "service", None), "process", None)
+        if processo is not None and processo.poll() is None:
+            ativos += 1
+    return ativos
+
+
+DURACAO_FASES = REGISTRO.registrar(Histograma(
+    "nfse_fase_duracao_segundos",
+    "Duração de cada fase do scraping, em segundos",
+    rotulos=("fase",),
+))
+TENTATIVAS_LOGIN = REGISTRO.registrar(Contador(
+    "nfse_login_tentativas_total",
+    "Tentativas de login no portal por resultado",
+    rotulos=("resultado",),
+))
+FALHAS_CAPTCHA = REGISTRO.registrar(Contador(
+    "nfse_captcha_falhas_total",
+    "Falhas de captcha por motivo (erro do backend, leitura inválida, rejeitado pelo portal)",
+    rotulos=("motivo",),
+))
+NOTAS = REGISTRO.registrar(Contador(
+    "nfse_notas_total",
+    "Notas fiscais processadas por resultado",
+    rotulos=("resultado",),
+))
+# À parte de NOTAS: a nota cancelada também é baixada ou sincronizada, e o
+# rótulo resultado deve somar exatamente uma vez por nota
+NOTAS_CANCELADAS = REGISTRO.registrar(Contador(
+    "nfse_notas_canceladas_total",
+    "Notas fiscais canceladas encontradas na listagem",
+))
+NAVEGADORES_ATIVOS = REGISTRO.registrar(Medidor(
+    "nfse_navegadores_ativos",
+    "Navegadores Chrome abertos pelo processo",
+    funcao=_contar_navegadores_ativos,
+))
+
+
+def medir_fase(fase):
+    """
+    Decorador que registra a duração de cada chamada em nfse_fase_duracao_segundos.
+
+    Args:
+        fase (str): Valor do rótulo "fase"
+
+    Returns:
+        callable: Decorador
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with DURACAO_FASES.medir(fase=fase):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
@@ -0,0 +1,196 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# Constantes do inotify (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_FORMATO_EVENTO = "iIII"
+_TAMANHO_EVENTO = struct.calcsize(_FORMATO_EVENTO)
+
+# Sufixos de arquivos ainda sendo escritos pelo Chrome
+_SUFIXOS_TEMPORARIOS = (".crdownload", ".tmp", ".part")
+
+
+def _carregar_libc():
+    """Carrega a libc com suporte a inotify, ou None fora do Linux."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _carregar_libc()
+
+
+class ObservadorDownloads:
+    """
+    Aguarda a chegada de um novo arquivo finalizado em um diretório de download.
+
+    No Linux usa inotify para ser notificado assim que o Chrome fecha ou renomeia
+    o arquivo; nos demais sistemas (ou se o inotify falhar) faz polling do
+    diretório. Deve ser iniciado ANTES de disparar o download, para que arquivos
+    já existentes não sejam confundidos com o novo.
+
+    Exemplo:
+        with ObservadorDownloads(download_dir) as observador:
+            botao.click()
+            caminho = observador.aguardar(timeout=30)
+    """
+
+    def __init__(self, diretorio, extensao=".pdf", intervalo_estavel=0.2, intervalo_polling=0.1):
+        """
+        Args:
+            diretorio (str): Diretório onde o download será salvo
+            extensao (str): Extensão do arquivo esperado
+            intervalo_estavel (float): Intervalo para confirmar que o tamanho parou de mudar
+            intervalo_polling (float): Intervalo entre varreduras no modo polling
+        """
+        self.diretorio = diretorio
+        self.extensao = extensao.lower()
+        self.intervalo_estavel = intervalo_estavel
+        self.intervalo_polling = intervalo_polling
+        self._fd = None
+        self._existentes = set()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.encerrar()
+
+    def iniciar(self):
+        """Começa a observar o diretório."""
+        self._fd = self._criar_inotify()
+        if self._fd is None:
+            # Sem inotify é preciso saber o que já existia para detectar o novo
+            self._existentes = set(os.listdir(self.diretorio))
+
+    def encerrar(self):
+        """Libera o descritor do inotify, se houver."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _criar_inotify(self):
+        """
+        Cria um watch inotify no diretório.
+
+        Returns:
+            int: Descritor do inotify ou None se indisponível
+        """
+        if _libc is None:
+            return None
+        fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mascara = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if _libc.inotify_add_watch(fd, os.fsencode(self.diretorio), mascara) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _eh_candidato(self, nome):
+        """Indica se o arquivo tem a extensão esperada e não é temporário."""
+        nome = nome.lower()
+        return nome.endswith(self.extensao) and not nome.endswith(_SUFIXOS_TEMPORARIOS)
+
+    def _ler_eventos(self, timeout):
+        """
+        Aguarda eventos do inotify e retorna os nomes de arquivos afetados.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            list: Nomes dos arquivos que geraram eventos
+        """
+        prontos, _, _ = select.select([self._fd], [], [], timeout)
+        if not prontos:
+            return []
+        try:
+            dados = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        nomes = []
+        posicao = 0
+        while posicao + _TAMANHO_EVENTO <= len(dados):
+            _, _, _, tamanho = struct.unpack_from(_FORMATO_EVENTO, dados, posicao)
+            inicio = posicao + _TAMANHO_EVENTO
+            nome = dados[inicio:inicio + tamanho].rstrip(b"\0")
+            if nome:
+                nomes.append(os.fsdecode(nome))
+            posicao = inicio + tamanho
+        return nomes
+
+    def _novos_por_polling(self):
+        """Lista os arquivos que surgiram desde o início da observação."""
+        return [nome for nome in os.listdir(self.diretorio) if nome not in self._existentes]
+
+    def _tamanho_estavel(self, caminho):
+        """
+        Verifica se o arquivo existe, não está vazio e parou de crescer.
+
+        Returns:
+            bool: True se o arquivo está completo
+        """
+        try:
+            tamanho = os.path.getsize(caminho)
+            if tamanho == 0:
+                return False
+            time.sleep(self.intervalo_estavel)
+            return os.path.getsize(caminho) == tamanho
+        except OSError:
+            return False
+
+    def aguardar(self, timeout=30):
+        """
+        Bloqueia até que um novo arquivo com a extensão esperada esteja completo.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            str: Caminho absoluto do arquivo baixado
+
+        Raises:
+            TimeoutError: Se nenhum arquivo completo chegar dentro do prazo
+        """
+        limite = time.monotonic() + timeout
+        candidatos = []
+
+        while True:
+            # Confere primeiro os candidatos já vistos (ex.: aguardando estabilizar)
+            for nome in list(candidatos):
+                caminho = os.path.join(self.diretorio, nome)
+                if self._tamanho_estavel(caminho):
+                    return os.path.abspath(caminho)
+                if not os.path.exists(caminho):
+                    candidatos.remove(nome)
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(f"Download não concluído em {timeout}s em {self.diretorio}")
+
+            if self._fd is not None:
+                espera = min(restante, self.intervalo_estavel) if candidatos else restante
+                nomes = self._ler_eventos(espera)
+            else:
+                time.sleep(min(restante, self.intervalo_polling))
+                nomes = self._novos_por_polling()
+
+            for nome in nomes:
+                if self._eh_candidato(nome) and nome not in candidatos:
+                    candidatos.append(nome)
@@ -0,0 +1,222 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from tasks.scrap_nfse import iniciar_chrome
+
+logger = logging.getLogger("nfse.pool")
+
+
+class _NavegadorPool:
+    """Driver mantido pelo pool junto com seus metadados de uso."""
+
+    def __init__(self, indice, driver, profile_dir, download_dir):
+        self.indice = indice
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.download_dir = download_dir
+        self.usos = 0
+
+
+class PoolNavegadores:
+    """
+    Mantém N navegadores Chrome pré-iniciados e pré-configurados.
+
+    Os drivers são emprestados por job, têm o estado limpo (cookies, abas,
+    diretório de download) na devolução e são reciclados após um número
+    configurável de usos ou quando falham no health check.
+
+    Cada navegador tem seu próprio diretório de download, definido nas
+    preferências ao abrir o Chrome (a impressão silenciosa em PDF não aceita
+    troca de diretório depois disso). Como um navegador atende um job por vez,
+    o diretório do navegador emprestado é exclusivo do job.
+    """
+
+    def __init__(self, tamanho, diretorio_downloads, max_usos=20, diretorio_perfis="chrome_profiles_pool"):
+        """
+        Inicializa o pool sem abrir navegadores (ver iniciar()).
+
+        Args:
+            tamanho (int): Quantidade de navegadores mantidos aquecidos
+            diretorio_downloads (str): Diretório base dos downloads dos navegadores
+            max_usos (int): Número de empréstimos antes de reciclar um navegador
+            diretorio_perfis (str): Diretório base dos perfis do Chrome do pool
+        """
+        self.tamanho = tamanho
+        self.diretorio_downloads = diretorio_downloads
+        self.max_usos = max_usos
+        self.diretorio_perfis = diretorio_perfis
+        self._disponiveis = queue.Queue()
+        self._todos = {}
+        self._lock = threading.Lock()
+        self._encerrado = False
+
+    def iniciar(self):
+        """Abre todos os navegadores do pool em paralelo."""
+        logger.info(f"Aquecendo pool com {self.tamanho} navegadores...")
+        with ThreadPoolExecutor(max_workers=self.tamanho) as executor:
+            entradas = list(executor.map(self._criar_navegador, range(self.tamanho)))
+        for entrada in entradas:
+            self._disponiveis.put(entrada)
+        logger.info("Pool de navegadores pronto!")
+
+    def _criar_navegador(self, indice):
+        """
+        Abre um novo navegador para a posição indicada do pool.
+
+        Args:
+            indice (int): Posição do navegador no pool
+
+        Returns:
+            _NavegadorPool: Entrada com o driver recém-iniciado
+        """
+        profile_dir = os.path.join(self.diretorio_perfis, f"navegador_{indice}")
+        download_dir = os.path.abspath(os.path.join(self.diretorio_downloads, f"navegador_{indice}"))
+        # Perfil e downloads descartáveis: evita herdar estado de um Chrome que travou
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        shutil.rmtree(download_dir, ignore_errors=True)
+        os.makedirs(download_dir, exist_ok=True)
+        driver = iniciar_chrome(profile_dir, download_dir)
+        entrada = _NavegadorPool(indice, driver, profile_dir, download_dir)
+        with self._lock:
+            self._todos[indice] = entrada
+        return entrada
+
+    def _reciclar(self, entrada):
+        """Fecha o navegador da entrada e abre outro na mesma posição."""
+        logger.info(f"Reciclando navegador {entrada.indice} após {entrada.usos} usos")
+        self._fechar(entrada)
+        shutil.rmtree(entrada.profile_dir, ignore_errors=True)
+        return self._criar_navegador(entrada.indice)
+
+    def _fechar(self, entrada):
+        """Encerra o driver de uma entrada ignorando erros de navegador morto."""
+        try:
+            entrada.driver.quit()
+        except Exception as e:
+            logger.error(f"Erro ao fechar navegador {entrada.indice}: {e}")
+        with self._lock:
+            self._todos.pop(entrada.indice, None)
+
+    def _saudavel(self, entrada):
+        """
+        Verifica se o navegador ainda responde a comandos.
+
+        Returns:
+            bool: True se o driver respondeu corretamente
+        """
+        try:
+            return entrada.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _limpar_downloads(self, entrada):
+        """Remove arquivos esquecidos no diretório de download do navegador."""
+        for item in os.listdir(entrada.download_dir):
+            item_path = os.path.join(entrada.download_dir, item)
+            if os.path.isdir(item_path):
+                shutil.rmtree(item_path, ignore_errors=True)
+            else:
+                os.remove(item_path)
+
+    def _limpar_estado(self, entrada):
+        """Fecha abas extras, apaga cookies e restaura o diretório de download."""
+        driver = entrada.driver
+        abas = driver.window_handles
+        for aba in abas[1:]:
+            driver.switch_to.window(aba)
+            driver.close()
+        driver.switch_to.window(abas[0])
+        driver.switch_to.default_content()
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": entrada.download_dir,
+        })
+        self._limpar_downloads(entrada)
+
+    def adquirir(self, timeout=None):
+        """
+        Retira um navegador do pool, aguardando se todos estiverem em uso.
+
+        Args:
+            timeout (float): Tempo máximo de espera por um navegador livre
+
+        Returns:
+            _NavegadorPool: Entrada emprestada (devolver com devolver())
+        """
+        if self._encerrado:
+            raise Exception("Pool de navegadores encerrado")
+
+        try:
+            entrada = self._disponiveis.get(timeout=timeout)
+        except queue.Empty:
+            raise Exception("Nenhum navegador disponível no pool")
+
+        try:
+            if not self._saudavel(entrada):
+                logger.warning(f"Navegador {entrada.indice} não respondeu ao health check")
+                entrada = self._reciclar(entrada)
+            entrada.usos += 1
+        except Exception:
+            # Mantém a posição do pool ocupada por um navegador novo
+            self._disponiveis.put(self._reciclar(entrada))
+            raise
+        return entrada
+
+    def devolver(self, entrada):
+        """
+        Devolve um navegador ao pool, limpando ou reciclando conforme necessário.
+
+        Args:
+            entrada (_NavegadorPool): Entrada obtida com adquirir()
+        """
+        if self._encerrado:
+            self._fechar(entrada)
+            return
+
+        try:
+            if entrada.usos >= self.max_usos or not self._saudavel(entrada):
+                entrada = self._reciclar(entrada)
+            else:
+                self._limpar_estado(entrada)
+        except Exception as e:
+            logger.error(f"Erro ao limpar navegador {entrada.indice}: {e}")
+            try:
+                entrada = self._reciclar(entrada)
+            except Exception as e2:
+                # Sem navegador nesta posição; o pool segue com capacidade menor
+                logger.error(f"Erro ao recriar navegador {entrada.indice}: {e2}")
+                return
+        self._disponiveis.put(entrada)
+
+    @contextmanager
+    def emprestar(self, timeout=None):
+        """
+        Context manager que empresta um navegador e o devolve ao final.
+
+        Args:
+            timeout (float): Tempo máximo de espera por um navegador livre
+
+        Yields:
+            _NavegadorPool: Entrada com ``driver`` e ``download_dir`` exclusivos do job
+        """
+        entrada = self.adquirir(timeout)
+        try:
+            yield entrada
+        finally:
+            self.devolver(entrada)
+
+    def encerrar(self):
+        """Fecha todos os navegadores do pool."""
+        self._encerrado = True
+        with self._lock:
+            entradas = list(self._todos.values())
+        for entrada in entradas:
+            self._fechar(entrada)
+        logger.info("Pool de navegadores encerrado")
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from tasks.log_estruturado import contexto_atual
+
+logger = logging.getLogger("nfse.rastreador")
+
+# Módulo do WebDriverWait (usado também por MotorEsperas): comandos disparados
+# dentro dele são polls de espera
+_ARQUIVO_ESPERA = os.path.join("selenium", "webdriver", "support", "wait.py")
+# Profundidade máxima da pilha inspecionada para classificar o comando
+_PROFUNDIDADE_PILHA = 12
+# Quantidade de comandos listados no ranking do perfil
+_TOP_COMANDOS = 15
+
+
+def _novo_total():
+    return {"quantidade": 0, "tempo": 0.0}
+
+
+class RastreadorComandos:
+    """
+    Conta e cronometra cada comando WebDriver enviado pelo scraper.
+
+    Todo comando do Selenium (find_element, get_attribute, .text, click, polls
+    do WebDriverWait...) passa por driver.execute; o rastreador substitui esse
+    método na instância do driver e registra o comando, sua duração, se ele
+    ocorreu dentro de uma espera e a fase/nota em andamento (campos "fase" e
+    "numero_nota" de contexto_log).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._driver = None
+        self._execute_original = None
+        self._inicio = None
+        self._comandos = {}
+        self._por_fase = {}
+        self._por_nota = {}
+        self._espera = _novo_total()
+        self._acao = _novo_total()
+
+    def instalar(self, driver):
+        """
+        Passa a rastrear os comandos de um driver.
+
+        Args:
+            driver: WebDriver do Selenium
+        """
+        self._driver = driver
+        self._execute_original = driver.execute
+        self._inicio = time.monotonic()
+        driver.execute = self._executar
+
+    def desinstalar(self):
+        """Restaura o driver.execute original."""
+        if self._driver is not None:
+            # Remove o atributo da instância, voltando ao método da classe
+            self._driver.__dict__.pop("execute", None)
+            self._driver = None
+
+    def _executar(self, driver_command, params=None):
+        """Executa o comando original medindo sua duração."""
+        inicio = time.monotonic()
+        try:
+            return self._execute_original(driver_command, params)
+        finally:
+            self._registrar(driver_command, time.monotonic() - inicio, self._em_espera())
+
+    def _em_espera(self):
+        """Indica se o comando foi disparado dentro de um WebDriverWait."""
+        frame = sys._getframe(2)
+        for _ in range(_PROFUNDIDADE_PILHA):
+            if frame is None:
+                return False
+            if frame.f_code.co_filename.endswith(_ARQUIVO_ESPERA):
+                return True
+            frame = frame.f_back
+        return False
+
+    def _registrar(self, comando, duracao, em_espera):
+        """Acumula o comando nos totais gerais, por fase e por nota."""
+        contexto = contexto_atual()
+        fase = contexto.get("fase", "sem_fase")
+        numero_nota = contexto.get("numero_nota")
+        with self._lock:
+            for total in (
+                self._comandos.setdefault(comando, _novo_total()),
+                self._por_fase.setdefault(fase, _novo_total()),
+                self._espera if em_espera else self._acao,
+            ):
+                total["quantidade"] += 1
+                total["tempo"] += duracao
+            if numero_nota is not None:
+                total = self._por_nota.setdefault(str(numero_nota), _novo_total())
+                total["quantidade"] += 1
+                total["tempo"] += duracao
+
+    def perfil(self):
+        """
+        Resume os comandos registrados.
+
+        Returns:
+            dict: Duração total, comandos e tempo em esperas e em ações,
+                ranking dos comandos, totais por fase e comandos por nota
+        """
+        with self._lock:
+            comandos = {nome: dict(total) for nome, total in self._comandos.items()}
+            por_fase = {fase: dict(total) for fase, total in self._por_fase.items()}
+            por_nota = {nota: dict(total) for nota, total in self._por_nota.items()}
+            espera, acao = dict(self._espera), dict(self._acao)
+
+        top = sorted(comandos.items(), key=lambda item: item[1]["tempo"], reverse=True)[:_TOP_COMANDOS]
+        quantidades_nota = [total["quantidade"] for total in por_nota.values()]
+        return {
+            "duracao_total": round(time.monotonic() - self._inicio, 3) if self._inicio else 0.0,
+            "comandos": espera["quantidade"] + acao["quantidade"],
+            "tempo_comandos": round(espera["tempo"] + acao["tempo"], 3),
+            "espera": {"quantidade": espera["quantidade"], "tempo": round(espera["tempo"], 3)},
+            "acao": {"quantidade": acao["quantidade"], "tempo": round(acao["tempo"], 3)},
+            "top_comandos": [
+                {
+                    "comando": nome,
+                    "quantidade": total["quantidade"],
+                    "tempo": round(total["tempo"], 3),
+                    "tempo_medio": round(total["tempo"] / total["quantidade"], 4),
+                }
+                for nome, total in top
+            ],
+            "por_fase": {
+                fase: {"quantidade": total["quantidade"], "tempo": round(total["tempo"], 3)}
+                for fase, total in sorted(por_fase.items())
+            },
+            "por_nota": {
+                "notas": len(por_nota),
+                "media_comandos": round(sum(quantidades_nota) / len(quantidades_nota), 1) if quantidades_nota else 0,
+                "max_comandos": max(quantidades_nota, default=0),
+                "detalhes": {
+                    nota: {"quantidade": total["quantidade"], "tempo": round(total["tempo"], 3)}
+                    for nota, total in por_nota.items()
+                },
+            },
+        }
+
+    def salvar_perfil(self, diretorio, nome, extra=None):
+        """
+        Grava o perfil em JSON.
+
+        Args:
+            diretorio (str): Diretório de destino
+            nome (str): Identificador incluído no nome do arquivo (ex.: login)
+            extra (dict): Campos adicionais incluídos no perfil
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        perfil = self.perfil()
+        if extra:
+            perfil.update(extra)
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f"perfil_{nome}_{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}.json")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(perfil, arquivo, ensure_ascii=False, indent=2)
+
+        logger.info(
+            f"Perfil WebDriver: {perfil['comandos']} comandos em {perfil['tempo_comandos']}s "
+            f"(esperas {perfil['espera']['tempo']}s, ações {perfil['acao']['tempo']}s), "
+            f"{perfil['por_nota']['media_comandos']} comandos por nota - {caminho}"
+        )
+        return caminho
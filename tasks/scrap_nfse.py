@@ -9,43 +9,272 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import base64
-import capsolver
 import time
 import shutil
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
-import boto3
-from botocore.exceptions import ClientError
 import logging
 from datetime import datetime
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from tasks.observador_downloads import ObservadorDownloads
+from tasks.esperas import (
+    MotorEsperas,
+    capturar_referencia_login,
+    capturar_referencia_tabela,
+    total_paginas_datatables,
+)
+from tasks.download_http import ClienteDownloadHttp
+from tasks.sessoes import CacheSessoes
+from tasks.captcha import obter_solucionador
+from tasks.checkpoints import obter_checkpoints
+from tasks.manifesto import obter_manifesto
+from tasks.upload_s3 import EnviadorS3
+from tasks.armazem import ArmazemConteudo, calcular_sha256, pdf_valido
+from tasks.log_estruturado import configurar_logging, contexto_log
+from tasks.metricas import (
+    DURACAO_FASES,
+    FALHAS_CAPTCHA,
+    NOTAS,
+    NOTAS_CANCELADAS,
+    TENTATIVAS_LOGIN,
+    medir_fase,
+    registrar_navegador,
+)
+from tasks.rastreador_webdriver import RastreadorComandos
+
+logger = logging.getLogger("nfse.scraper")
+
+# Diretório base para notas fiscais (relativo ao projeto)
+DIRETORIO_NOTAS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "notas_fiscais"
+)
+
+# Diretório base dos downloads temporários isolados por job
+DIRETORIO_DOWNLOADS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "downloads"
+)
+
+# Arquivos que a limpeza do diretório de download pode remover: PDFs e downloads parciais
+_EXTENSOES_DOWNLOAD = (".pdf", ".crdownload", ".tmp", ".part")
+
+# Extrai todas as linhas da tabela de resultados em uma única chamada ao navegador
+_SCRIPT_EXTRAIR_LINHAS = """
+var linhas = document.querySelectorAll('#tblNfse tbody tr');
+var registros = [];
+for (var i = 0; i < linhas.length; i++) {
+    var tr = linhas[i];
+    var colunas = tr.cells;
+    var texto = function (indice) {
+        return colunas.length > indice ? colunas[indice].innerText.trim() : '';
+    };
+    var botao = tr.querySelector("td.action-column button[data-action='imprimir']");
+    var atributos = {};
+    if (botao) {
+        for (var j = 0; j < botao.attributes.length; j++) {
+            atributos[botao.attributes[j].name] = botao.attributes[j].value;
+        }
+    }
+    registros.push({
+        indice: i,
+        colunas: colunas.length,
+        numero: texto(1),
+        data_emissao: texto(4),
+        valor: texto(5),
+        cancelada: tr.classList.contains('canceled'),
+        botao: botao,
+        atributos_botao: atributos,
+        url_base: document.baseURI
+    });
+}
+return registros;
+"""
+
+# Aumenta o tamanho da página do DataTables para exibir todo o resultado de uma vez
+_SCRIPT_EXPANDIR_PAGINA = """
+if (!(window.jQuery && window.jQuery.fn.dataTable &&
+        window.jQuery.fn.dataTable.isDataTable('#tblNfse'))) {
+    return null;
+}
+var tabela = window.jQuery('#tblNfse').DataTable();
+var info = tabela.page.info();
+var tamanho = Math.min(info.recordsDisplay, arguments[0]);
+if (info.pages <= 1 || tamanho <= info.length) {
+    return {alterada: false, total: info.recordsDisplay};
+}
+tabela.page.len(tamanho).draw();
+return {alterada: true, total: info.recordsDisplay, linhas: tamanho};
+"""
 
 # Configuração do logging
 def setup_logging():
-    """Configura os loggers para notas canceladas e erros"""
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-        
-    # Log para notas canceladas
-    canceled_logger = logging.getLogger('canceled_notes')
-    if not canceled_logger.handlers:  # Só adiciona handler se não existir nenhum
-        canceled_logger.setLevel(logging.INFO)
-        canceled_handler = logging.FileHandler(os.path.join(log_dir, 'notas_canceladas.log'), encoding='utf-8')
-        canceled_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-        canceled_logger.addHandler(canceled_handler)
+    """
+    Retorna os loggers de notas canceladas e de erros.
+
+    A configuração (fila e thread de escrita) é feita uma única vez por processo
+    em configurar_logging(); as chamadas seguintes apenas devolvem os loggers.
+    """
+    configurar_logging()
+    return logging.getLogger('canceled_notes'), logging.getLogger('error_notes')
+
+def sanitize_filename(filename):
+    """
+    Remove caracteres inválidos do nome do arquivo.
+    
+    Args:
+        filename (str): Nome do arquivo a ser sanitizado
+        
+    Returns:
+        str: Nome do arquivo sanitizado
+    """
+    # Lista de caracteres inválidos no Windows + caracteres problemáticos
+    invalid_chars = ['/', '\\', ':', '*', '?', '"', '<', '>', '|', '$', '%', '#', '@', '!', '&']
+    for char in invalid_chars:
+        filename = filename.replace(char, '_')
+    
+    # Remove espaços duplos e espaços no início/fim
+    filename = ' '.join(filename.split())
     
-    # Log para erros
-    error_logger = logging.getLogger('error_notes')
-    if not error_logger.handlers:  # Só adiciona handler se não existir nenhum
-        error_logger.setLevel(logging.ERROR)
-        error_handler = logging.FileHandler(os.path.join(log_dir, 'erros_processamento.log'), encoding='utf-8')
-        error_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-        error_logger.addHandler(error_handler)
+    # Limita o tamanho do nome do arquivo (Windows tem limite de 255 caracteres)
+    if len(filename) > 200:
+        name_part = filename.rsplit('.', 1)[0][:190]
+        ext_part = filename.rsplit('.', 1)[1] if '.' in filename else 'pdf'
+        filename = f"{name_part}.{ext_part}"
     
-    return canceled_logger, error_logger
+    return filename
+
+
+class ExtracaoIncompleta(Exception):
+    """
+    Meses que continuaram interrompidos após as retomadas de get_info.
+    
+    Os PDFs dos demais meses já foram salvos e seguem em ``arquivos``; os meses
+    pendentes podem ser continuados com retomar=True.
+    """
+    
+    def __init__(self, meses_pendentes, arquivos):
+        """
+        Args:
+            meses_pendentes (list): Meses não concluídos
+            arquivos (list): Arquivos salvos na execução
+        """
+        super().__init__(
+            f"Meses não concluídos: {', '.join(meses_pendentes)} "
+            f"(reenvie com retomar=true para continuar dos checkpoints)"
+        )
+        self.meses_pendentes = list(meses_pendentes)
+        self.arquivos = list(arquivos)
+
+
+def diretorio_notas_tenant(tenant):
+    """
+    Retorna a pasta onde ficam os PDFs organizados de um cliente.
+    
+    Args:
+        tenant (str): Login do cliente
+        
+    Returns:
+        str: Caminho notas_fiscais/<tenant>/
+    """
+    return os.path.join(DIRETORIO_NOTAS, sanitize_filename(tenant))
+
+
+@medir_fase("abrir_navegador")
+def iniciar_chrome(profile_dir, download_dir):
+    """
+    Configura e abre o navegador Chrome com configurações otimizadas.
+
+    Args:
+        profile_dir (str): Diretório do perfil do Chrome
+        download_dir (str): Diretório onde os PDFs serão salvos
+
+    Returns:
+        WebDriver: Instância do driver do Chrome configurado
+    """
+    try:
+        os.makedirs(profile_dir, exist_ok=True)
+        logger.info(f"Usando perfil do Chrome: {profile_dir}")
+
+        options = Options()
+        options.add_argument(f"user-data-dir={os.path.abspath(profile_dir)}")
+        options.add_argument("--disable-download-notification")
+        options.add_argument("--kiosk-printing")
+
+        # Configurações para download automático de PDFs
+        prefs = {
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "plugins.always_open_pdf_externally": True,
+            "print.always_print_silent": True,
+            "printing.default_destination_selection_rules": {
+                "kind": "local",
+                "namePattern": "Save as PDF",
+            },
+            "savefile.default_directory": download_dir,
+            "browser.download.manager.showWhenStarting": False,
+            "browser.helperApps.neverAsk.saveToDisk": "application/pdf",
+            "print_printer_pdf_printer_settings": {
+                "dpi": 300,
+                "use_system_print_dialog": False,
+            },
+            "print.default_destination_selection_rules": {
+                "kind": "local",
+                "namePattern": "Save as PDF",
+            },
+            "print.print_preview_sticky_settings.appState": json.dumps({
+                "recentDestinations": [{
+                    "id": "Save as PDF",
+                    "origin": "local",
+                    "account": "",
+                }],
+                "selectedDestinationId": "Save as PDF",
+                "version": 2,
+                "isHeaderFooterEnabled": False,
+                "isLandscapeEnabled": False,
+                "marginsType": 2,  # 0=default, 1=minimum, 2=custom
+                "customMargins": {
+                    "top": 0,
+                    "bottom": 0,
+                    "left": 0,
+                    "right": 0
+                },
+                "scaling": 100,  # 100% da página
+                "scalingType": 3,  # 3=fit to page
+                "scalingPdf": 100,
+                "isScalingDisabled": False,
+                "isColorEnabled": False,
+                "isDuplexEnabled": False,
+                "duplex": 0,
+                "isLandscapeEnabled": False,
+                "pagesPerSheet": 1,
+                "copies": 1,
+                "defaultPrinter": "Save as PDF",
+                "borderless": True,
+                "mediaSize": {
+                    "height_microns": 297000,   # A4
+                    "width_microns": 210000,
+                    "name": "ISO_A4",
+                    "custom_display_name": "A4"
+                }
+            })
+        }
+        options.add_experimental_option("prefs", prefs)
+
+        driver = webdriver.Chrome(options=options)
+        registrar_navegador(driver)
+        logger.info("Navegador Chrome iniciado com sucesso!")
+        return driver
+
+    except Exception as e:
+        raise Exception(f"Erro ao abrir navegador: {e}")
 
 class ScrapNotaFiscal:
     """
@@ -58,49 +287,153 @@ class ScrapNotaFiscal:
     - Organização dos arquivos por mês
     """
     
-    def __init__(self):
-        """Inicializa a classe carregando configurações e preparando diretórios."""
+    def __init__(self, download_dir=None, tenant=None, cache_sessao=True, ao_evento=None):
+        """
+        Inicializa a classe carregando configurações e preparando diretórios.
+        
+        Args:
+            download_dir (str): Diretório exclusivo onde o Chrome salva os PDFs
+                (padrão: pasta compartilhada notas_fiscais/)
+            tenant (str): Login do cliente; quando informado, os arquivos são
+                organizados em notas_fiscais/<tenant>/<mês>/
+            cache_sessao (bool): Se False, sempre faz login completo, sem ler nem
+                gravar o cache de sessões (usado pelas sessões paralelas extras)
+            ao_evento (callable): Chamado como ao_evento(tipo, **dados) a cada
+                etapa (login, mês, página, nota baixada, erro...)
+        """
         try:
             load_dotenv()
+            configurar_logging()
             self._carregar_configuracoes()
-            self._preparar_diretorios()
+            self._preparar_diretorios(download_dir, tenant)
+            self.tenant = tenant or ""
+            # Cliente no manifesto e nos checkpoints (sem tenant, o login; definido em get_info)
+            self._chave_tenant = self.tenant
+            self.ao_evento = ao_evento
+            self.arquivos_salvos = []
+            self.esperas = MotorEsperas()
+            self.solucionador = obter_solucionador(self.captcha_backend, self.captcha_key)
+            self.sessoes = None
+            if self.sessao_ttl > 0 and cache_sessao:
+                self.sessoes = CacheSessoes(ttl=self.sessao_ttl, max_sessoes=self.sessao_max)
+            self.manifesto = obter_manifesto(self.manifesto_db) if self.manifesto_db else None
+            self.checkpoints = obter_checkpoints(self.checkpoint_db) if self.checkpoint_db else None
+            # Meses interrompidos por erro na execução atual (retomados ao final)
+            self.meses_com_falha = []
+            self.armazem = ArmazemConteudo(self.armazem_dir) if self.armazem_dir else None
                 
         except Exception as e:
-            print(f"Erro ao inicializar ScrapNotaFiscal: {e}")
+            logger.error(f"Erro ao inicializar ScrapNotaFiscal: {e}")
             raise e
     
     def _carregar_configuracoes(self):
         """Carrega as configurações do arquivo .env."""
         self.url = os.getenv("URL_CNPJ")
         self.captcha_key = os.getenv("API_KEY")
+        # Tempo máximo de espera pelo PDF de cada nota
+        self.timeout_download = float(os.getenv("DOWNLOAD_TIMEOUT", "30"))
+        # Forma de obter os PDFs: "impressao" (modal + Salvar como PDF),
+        # "http" (requisição direta à URL de impressão com os cookies do navegador)
+        # ou "cdp" (abre a URL de impressão e gera o PDF em memória via Page.printToPDF)
+        self.modo_download = os.getenv("MODO_DOWNLOAD", "impressao").lower()
+        # Modelo da URL de impressão, preenchido com os atributos data-* do botão
+        # (ex.: https://portal/ImprimirNfse.aspx?id={id})
+        self.url_impressao = os.getenv("URL_IMPRESSAO_NFSE")
+        self.downloads_http_paralelos = int(os.getenv("DOWNLOADS_HTTP_PARALELOS", "4"))
+        self._cliente_http = None
+        # Cache de sessões autenticadas (SESSAO_TTL=0 desabilita)
+        self.sessao_ttl = float(os.getenv("SESSAO_TTL", "3600"))
+        self.sessao_max = int(os.getenv("SESSAO_MAX", "500"))
+        # Backend de captcha: "capsolver" (serviço externo, requer API_KEY) ou "local"
+        self.captcha_backend = os.getenv("CAPTCHA_BACKEND", "capsolver")
+        # Quantas imagens tentar ler antes de desistir da tentativa de login
+        self.captcha_max_leituras = int(os.getenv("CAPTCHA_MAX_LEITURAS", "3"))
+        # Seletor do botão de nova imagem; sem ele a imagem é recarregada via JavaScript
+        self.captcha_seletor_atualizar = os.getenv("CAPTCHA_SELETOR_ATUALIZAR")
+        # Se definido, grava cada imagem de captcha neste diretório (depuração)
+        self.captcha_debug_dir = os.getenv("CAPTCHA_DEBUG_DIR")
+        # Se definido, rastreia os comandos WebDriver e grava o perfil de cada execução aqui
+        self.rastrear_webdriver_dir = os.getenv("RASTREAR_WEBDRIVER_DIR")
+        # Manifesto das notas já armazenadas (MANIFESTO_DB vazio desabilita)
+        self.manifesto_db = os.getenv("MANIFESTO_DB", os.path.join(DIRETORIO_NOTAS, "manifesto.sqlite3"))
+        # Checkpoints de página/nota de cada mês, usados na retomada (CHECKPOINT_DB vazio desabilita)
+        self.checkpoint_db = os.getenv("CHECKPOINT_DB", os.path.join(DIRETORIO_NOTAS, "checkpoints.sqlite3"))
+        # Novas tentativas, na mesma execução, dos meses interrompidos por erro
+        self.retomadas_max = int(os.getenv("RETOMADAS_MAX", "2"))
+        # Armazém endereçado por conteúdo (SHA-256); a árvore por mês aponta para
+        # ele com hard links (ARMAZEM_DIR vazio grava os PDFs diretamente)
+        self.armazem_dir = os.getenv("ARMAZEM_DIR", os.path.join(DIRETORIO_NOTAS, ".objetos"))
+        # Paginação dos resultados: "completa" (amplia a página do DataTables para
+        # exibir o mês inteiro) ou "ui" (navega página a página pelo botão Próximo)
+        self.paginacao = os.getenv("PAGINACAO", "completa").lower()
+        # Limite de linhas por página no modo completo (acima dele, pagina em blocos)
+        self.paginacao_max_linhas = int(os.getenv("PAGINACAO_MAX_LINHAS", "1000"))
+        # Abas do mesmo navegador pesquisando meses diferentes de forma intercalada
+        self.abas_por_sessao = int(os.getenv("ABAS_POR_SESSAO", "1"))
+        # Envio dos PDFs ao S3 em segundo plano (sem S3_BUCKET o envio fica desabilitado)
+        self.s3_bucket = os.getenv("S3_BUCKET")
+        self.s3_prefixo = os.getenv("S3_PREFIXO", "notas_fiscais")
+        self.uploads_s3_paralelos = int(os.getenv("UPLOADS_S3_PARALELOS", "4"))
+        self._enviador_s3 = None
         
-        if not self.url or not self.captcha_key:
-            raise ValueError("URL_CNPJ e API_KEY devem estar definidas no arquivo .env")
+        if not self.url:
+            raise ValueError("URL_CNPJ deve estar definida no arquivo .env")
     
-    def _preparar_diretorios(self):
-        """Prepara os diretórios necessários para download das notas fiscais."""
-        # Diretório base para notas fiscais (relativo ao script)
-        self.download_dir = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-            "notas_fiscais"
-        )
+    def _preparar_diretorios(self, download_dir=None, tenant=None):
+        """
+        Prepara os diretórios necessários para download das notas fiscais.
+        
+        Sem download_dir, o Chrome baixa em downloads/<tenant>/ (ou
+        downloads/padrao/), nunca em notas_fiscais/, onde ficam os PDFs
+        organizados e os bancos do manifesto e dos checkpoints.
+        
+        Args:
+            download_dir (str): Diretório de download exclusivo do job
+            tenant (str): Login do cliente usado na árvore de saída
+        """
+        if download_dir:
+            self.download_dir = os.path.abspath(download_dir)
+        else:
+            self.download_dir = os.path.join(DIRETORIO_DOWNLOADS, sanitize_filename(tenant) if tenant else "padrao")
         os.makedirs(self.download_dir, exist_ok=True)
-        print(f"Diretório de notas fiscais: {self.download_dir}")
+        logger.info(f"Diretório de download: {self.download_dir}")
+        
+        # Diretório final onde os PDFs são organizados por mês
+        self.output_dir = self.download_dir if download_dir else DIRETORIO_NOTAS
+        if tenant:
+            self.output_dir = diretorio_notas_tenant(tenant)
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info(f"Diretório de notas fiscais: {self.output_dir}")
         
         # Limpa arquivos antigos do diretório
         self._limpar_diretorio_download()
     
+    def _emitir(self, tipo, **dados):
+        """
+        Publica um evento de progresso para quem acompanha a execução.
+        
+        Args:
+            tipo (str): Tipo do evento
+            **dados: Informações do evento
+        """
+        if self.ao_evento is None:
+            return
+        try:
+            self.ao_evento(tipo, **dados)
+        except Exception as e:
+            logger.error(f"Erro ao publicar evento {tipo}: {e}")
+
     def _limpar_diretorio_download(self):
-        """Remove todos os arquivos do diretório de download para evitar conflitos."""
+        """Remove PDFs e downloads parciais antigos do diretório de download para evitar conflitos."""
         if os.path.exists(self.download_dir):
             for item in os.listdir(self.download_dir):
                 item_path = os.path.join(self.download_dir, item)
                 try:
-                    if os.path.isfile(item_path):
+                    if os.path.isfile(item_path) and item.lower().endswith(_EXTENSOES_DOWNLOAD):
                         os.remove(item_path)
-                        print(f"Arquivo removido: {item_path}")
+                        logger.info(f"Arquivo removido: {item_path}")
                 except Exception as e:
-                    print(f"Erro ao remover {item_path}: {e}")
+                    logger.error(f"Erro ao remover {item_path}: {e}")
 
     def sanitize_filename(self, filename):
         """
@@ -112,21 +445,7 @@ class ScrapNotaFiscal:
         Returns:
             str: Nome do arquivo sanitizado
         """
-        # Lista de caracteres inválidos no Windows + caracteres problemáticos
-        invalid_chars = ['/', '\\', ':', '*', '?', '"', '<', '>', '|', '$', '%', '#', '@', '!', '&']
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        
-        # Remove espaços duplos e espaços no início/fim
-        filename = ' '.join(filename.split())
-        
-        # Limita o tamanho do nome do arquivo (Windows tem limite de 255 caracteres)
-        if len(filename) > 200:
-            name_part = filename.rsplit('.', 1)[0][:190]
-            ext_part = filename.rsplit('.', 1)[1] if '.' in filename else 'pdf'
-            filename = f"{name_part}.{ext_part}"
-        
-        return filename
+        return sanitize_filename(filename)
 
     def preencher_input(self, driver, selector, texto, timeout=5):
         """
@@ -150,6 +469,7 @@ class ScrapNotaFiscal:
             time.sleep(0.05)
         return input_element
 
+    @medir_fase("login")
     def fazer_login(self, driver, login, password, max_tentativas=3):
         """
         Realiza login no sistema com tratamento de captcha e múltiplas tentativas.
@@ -166,12 +486,38 @@ class ScrapNotaFiscal:
         Raises:
             Exception: Se todas as tentativas falharem
         """
-        print(f"Iniciando login para: {login}")
+        logger.info(f"Iniciando login para: {login}")
         self.preencher_input(driver, "#txtLogin", login)
         
+        # Thread que resolve o captcha enquanto a senha é digitada
+        executor_captcha = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nfse-captcha")
+        try:
+            return self._tentar_login(driver, password, max_tentativas, executor_captcha)
+        finally:
+            executor_captcha.shutdown(wait=False)
+    
+    def _tentar_login(self, driver, password, max_tentativas, executor_captcha):
+        """
+        Executa as tentativas de login de fazer_login.
+        
+        Args:
+            driver: WebDriver do Selenium
+            password (str): Senha do usuário
+            max_tentativas (int): Número máximo de tentativas de login
+            executor_captcha (ThreadPoolExecutor): Executor da leitura do captcha
+            
+        Returns:
+            bool: True se login bem-sucedido
+        """
         for tentativa in range(max_tentativas):
             try:
-                print(f"Tentativa de login {tentativa + 1}/{max_tentativas}")
+                logger.info(f"Tentativa de login {tentativa + 1}/{max_tentativas}")
+                
+                # Capturar o captcha e começar a resolvê-lo antes de digitar a senha
+                img = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "#imgNewCaptcha"))
+                )
+                leitura = executor_captcha.submit(self.resolver_captcha, self.capturar_captcha(img))
                 
                 # Limpar senha em tentativas subsequentes
                 if tentativa > 0:
@@ -183,13 +529,8 @@ class ScrapNotaFiscal:
                 # Preencher senha
                 self.preencher_input(driver, "#txtSenha", password)
                 
-                # Resolver captcha
-                img = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#imgNewCaptcha"))
-                )
-                captcha_text = self.solve_captcha(img)
-                # Remove caractere 't' específico que causa problemas
-                formatted_captcha = captcha_text.replace("t", "")
+                # Resolver captcha (leituras inválidas trocam só a imagem)
+                formatted_captcha = self._ler_captcha(driver, leitura.result(), img)
                 
                 # Limpar captcha em tentativas subsequentes
                 if tentativa > 0:
@@ -205,51 +546,172 @@ class ScrapNotaFiscal:
                 btn_login = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "#btnLogar"))
                 )
+                referencia = capturar_referencia_login(driver)
                 btn_login.click()
-                time.sleep(3)
                 
-                # Verificar se houve erro de login
-                if self._verificar_erro_login(driver):
+                # Aguardar o menu carregar ou o portal exibir mensagem de erro
+                erro_login = self._verificar_erro_login(driver, referencia)
+                self.solucionador.registrar_resultado(not erro_login)
+                TENTATIVAS_LOGIN.inc(resultado="rejeitada" if erro_login else "sucesso")
+                if erro_login:
+                    FALHAS_CAPTCHA.inc(motivo="rejeitado")
                     if tentativa < max_tentativas - 1:
-                        print("Erro detectado, tentando novamente...")
+                        logger.error("Erro detectado, tentando novamente...")
                         continue
                     else:
                         raise Exception(f"Falha no login após {max_tentativas} tentativas")
                 
-                print("Login realizado com sucesso!")
+                logger.info("Login realizado com sucesso!")
                 return True
                 
             except Exception as e:
+                if not str(e).startswith("Falha no login"):
+                    TENTATIVAS_LOGIN.inc(resultado="erro")
                 if tentativa < max_tentativas - 1:
-                    print(f"Erro na tentativa {tentativa+1}: {e}")
+                    logger.error(f"Erro na tentativa {tentativa+1}: {e}")
                     continue
                 else:
                     raise Exception(f"Falha nas {max_tentativas} tentativas: {e}")
         
         return False
     
-    def _verificar_erro_login(self, driver):
+    def _ler_captcha(self, driver, captcha_text, img):
         """
-        Verifica se há mensagens de erro após tentativa de login.
+        Valida a leitura do captcha, pedindo uma nova imagem quando é inválida.
         
         Args:
             driver: WebDriver do Selenium
+            captcha_text (str): Primeira leitura, já resolvida
+            img: Elemento da imagem correspondente à primeira leitura
             
         Returns:
-            bool: True se houver erro, False caso contrário
+            str: Texto do captcha no formato esperado
+            
+        Raises:
+            Exception: Se nenhuma leitura válida for obtida
         """
-        try:
-            msg_element = WebDriverWait(driver, 2).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#lblMsg"))
+        for leitura in range(self.captcha_max_leituras):
+            if leitura > 0:
+                img = WebDriverWait(driver, 5).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "#imgNewCaptcha"))
+                )
+                captcha_text = self.solve_captcha(img)
+            if self.solucionador.leitura_valida(captcha_text):
+                return captcha_text
+            
+            logger.warning(f"Leitura de captcha inválida ('{captcha_text}'), solicitando nova imagem...")
+            FALHAS_CAPTCHA.inc(motivo="leitura_invalida")
+            self._atualizar_captcha(driver, img)
+        
+        raise Exception(f"Nenhuma leitura válida de captcha em {self.captcha_max_leituras} imagens")
+
+    def _atualizar_captcha(self, driver, img):
+        """
+        Troca apenas a imagem do captcha, sem refazer a tentativa de login.
+        
+        Args:
+            driver: WebDriver do Selenium
+            img: Elemento atual da imagem do captcha
+        """
+        src_anterior = img.get_attribute("src")
+        if self.captcha_seletor_atualizar:
+            driver.find_element(By.CSS_SELECTOR, self.captcha_seletor_atualizar).click()
+            src_anterior = None
+        else:
+            # Recarrega a imagem com parâmetro anti-cache para gerar um novo código
+            driver.execute_script(
+                "var src = arguments[0].src.split('#')[0];"
+                "arguments[0].src = src + (src.indexOf('?') >= 0 ? '&' : '?') + '_=' + Date.now();",
+                img,
             )
-            if msg_element.text.strip():
-                print(f"Mensagem de erro detectada: {msg_element.text}")
+        
+        WebDriverWait(driver, 5).until(lambda d: d.execute_script(
+            "var img = document.querySelector('#imgNewCaptcha');"
+            "return !!img && img.complete && img.naturalWidth > 0 && img.src !== arguments[0];",
+            src_anterior,
+        ))
+
+    def _autenticar(self, driver, login, password):
+        """
+        Garante uma sessão autenticada, reaproveitando o cache quando possível.
+        
+        Args:
+            driver: WebDriver do Selenium
+            login (str): Login/CNPJ do usuário
+            password (str): Senha do usuário
+        """
+        # Acessar sistema
+        driver.get(self.url)
+        
+        if self._restaurar_sessao(driver, login):
+            self._emitir("login_concluido", sessao_reaproveitada=True)
+            return
+        
+        # Fazer login
+        self.fazer_login(driver, login, password)
+        self._emitir("login_concluido", sessao_reaproveitada=False)
+        
+        if self.sessoes is not None:
+            driver.switch_to.default_content()
+            self.sessoes.salvar(login, driver.get_cookies(), driver.current_url)
+
+    def _restaurar_sessao(self, driver, login):
+        """
+        Tenta reutilizar os cookies de um login anterior ainda válido.
+        
+        Args:
+            driver: WebDriver do Selenium (já na página do portal)
+            login (str): Login/CNPJ do usuário
+            
+        Returns:
+            bool: True se o menu carregou com a sessão restaurada
+        """
+        if self.sessoes is None:
+            return False
+        
+        sessao = self.sessoes.obter(login)
+        if sessao is None:
+            return False
+        
+        logger.info(f"Reutilizando sessão em cache para: {login}")
+        try:
+            driver.delete_all_cookies()
+            campos = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry")
+            for cookie in sessao["cookies"]:
+                driver.add_cookie({campo: cookie[campo] for campo in campos if campo in cookie})
+            
+            # Validação barata: a página de menu só carrega com sessão ativa
+            driver.get(sessao["url_menu"])
+            if self.esperas.aguardar("sessao_restaurada", driver)["valida"]:
+                logger.info("Sessão restaurada com sucesso!")
                 return True
-        except:
-            # Se não encontrar elemento de erro, assume sucesso
-            pass
+        except Exception as e:
+            logger.error(f"Erro ao restaurar sessão: {e}")
+        
+        logger.info("Sessão expirada, realizando login completo")
+        self.sessoes.invalidar(login)
+        driver.delete_all_cookies()
+        driver.get(self.url)
+        return False
+
+    def _verificar_erro_login(self, driver, referencia):
+        """
+        Aguarda o resultado do login e verifica se há mensagens de erro.
+        
+        Args:
+            driver: WebDriver do Selenium
+            referencia (dict): Estado da página capturado antes do clique
+            
+        Returns:
+            bool: True se houver erro, False caso contrário
+        """
+        resultado = self.esperas.aguardar("login_concluido", driver, referencia)
+        if not resultado["sucesso"]:
+            logger.warning(f"Mensagem de erro detectada: {resultado['mensagem']}")
+            return True
         return False
 
+    @medir_fase("navegacao")
     def _navegar_para_nfse(self, driver):
         """
         Navega pelos menus até chegar na página de pesquisa de NFS-e.
@@ -257,7 +719,7 @@ class ScrapNotaFiscal:
         Args:
             driver: WebDriver do Selenium
         """
-        print("Navegando para a página de NFS-e...")
+        logger.info("Navegando para a página de NFS-e...")
         
         # Acessar menu principal
         frame_menu = WebDriverWait(driver, 10).until(
@@ -269,22 +731,10 @@ class ScrapNotaFiscal:
             EC.element_to_be_clickable((By.CSS_SELECTOR, "#td1_div5 > b > span"))
         )
         elemento_menu.click()
-        time.sleep(2)
-        driver.switch_to.default_content()
 
-        # Acessar área de Nota Fiscal
-        frame_main = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "fraMain"))
-        )
-        driver.switch_to.frame(frame_main)
-        
-        iframe_menu = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "iFrameMenu"))
-        )
-        driver.switch_to.frame(iframe_menu)
-        
-        link_nfse = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.LINK_TEXT, "Pesquisar NFS-e Recebidas (IFRAME)"))
+        # Acessar área de Nota Fiscal (aguarda fraMain > iFrameMenu carregar o submenu)
+        link_nfse = self.esperas.aguardar(
+            "menu_nfse", driver, "Pesquisar NFS-e Recebidas (IFRAME)"
         )
         link_nfse.click()
         driver.switch_to.default_content()
@@ -297,8 +747,25 @@ class ScrapNotaFiscal:
             driver: WebDriver do Selenium
             month (str): Nome do mês a ser processado
         """
-        print(f"Processando mês: {month}")
+        logger.info(f"Processando mês: {month}")
+        
+        referencia = self._pesquisar_mes(driver, month)
+        self.esperas.aguardar("tabela_redesenhada", driver, referencia)
+        
+        # Processar todas as páginas de resultados
+        self._processar_todas_paginas(driver, month)
+
+    def _pesquisar_mes(self, driver, month):
+        """
+        Seleciona o mês e dispara a pesquisa, sem aguardar o resultado.
         
+        Args:
+            driver: WebDriver do Selenium posicionado no frame da tabela
+            month (str): Nome do mês a ser pesquisado
+            
+        Returns:
+            dict: Referência da tabela anterior, para aguardar o redesenho
+        """
         # Selecionar o mês
         select_mes = Select(driver.find_element(By.ID, "Mes"))
         select_mes.select_by_visible_text(month)
@@ -307,163 +774,818 @@ class ScrapNotaFiscal:
         btn_pesquisar = WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable((By.ID, "btnPesquisar"))
         )
+        referencia = capturar_referencia_tabela(driver)
         btn_pesquisar.click()
-        time.sleep(2)
+        return referencia
+
+    def _processar_meses_em_abas(self, driver, months):
+        """
+        Processa os meses em várias abas do mesmo navegador, de forma intercalada.
         
-        # Processar todas as páginas de resultados
-        self._processar_todas_paginas(driver, month)
+        O WebDriver executa um comando por vez, mas as pesquisas ficam em
+        andamento no servidor enquanto outra aba é processada: cada aba dispara a
+        pesquisa do seu próximo mês assim que termina o anterior, e o driver
+        passa para a aba seguinte. As abas compartilham os cookies da sessão, sem
+        novo login e sem o custo de memória de outro navegador.
+        
+        Args:
+            driver: WebDriver do Selenium autenticado, no frame da tabela
+            months (list): Meses a processar
+        """
+        aba_principal = driver.current_window_handle
+        driver.switch_to.default_content()
+        url_menu = driver.current_url
+        
+        abas = [aba_principal]
+        try:
+            for _ in range(min(self.abas_por_sessao, len(months)) - 1):
+                driver.switch_to.new_window("tab")
+                abas.append(driver.current_window_handle)
+                driver.get(url_menu)
+                self._navegar_para_nfse(driver)
+            
+            fila = list(months)
+            # Aba -> (mês, referência da tabela) das pesquisas em andamento
+            pesquisas = {}
+            for aba in abas:
+                self._iniciar_pesquisa_aba(driver, aba, fila, pesquisas)
+            
+            while pesquisas:
+                aba = next(iter(pesquisas))
+                month, referencia = pesquisas.pop(aba)
+                with contexto_log(mes=month, fase="mes"):
+                    try:
+                        self._ativar_aba(driver, aba)
+                        logger.info(f"=== Iniciando processamento do mês: {month} (aba {abas.index(aba) + 1}) ===")
+                        self.esperas.aguardar("tabela_redesenhada", driver, referencia)
+                        self._processar_todas_paginas(driver, month)
+                        logger.info(f"=== Mês {month} processado com sucesso ===")
+                    except Exception as e:
+                        logger.error(f"Erro ao processar mês {month}: {e}")
+                        self._emitir("erro", mes=month, mensagem=str(e))
+                        self.meses_com_falha.append(month)
+                # A aba volta ao fim da fila com a pesquisa do próximo mês em andamento
+                self._iniciar_pesquisa_aba(driver, aba, fila, pesquisas)
+        finally:
+            for aba in abas[1:]:
+                try:
+                    driver.switch_to.window(aba)
+                    driver.close()
+                except Exception as e:
+                    logger.error(f"Erro ao fechar aba: {e}")
+            # Falhar aqui mascararia a exceção original do processamento
+            try:
+                self._ativar_aba(driver, aba_principal)
+            except Exception as e:
+                logger.error(f"Erro ao voltar para a aba principal: {e}")
+
+    def _ativar_aba(self, driver, aba):
+        """
+        Torna uma aba ativa e posiciona o driver no frame de pesquisa de notas.
+        
+        Args:
+            driver: WebDriver do Selenium
+            aba (str): Handle da aba
+        """
+        driver.switch_to.window(aba)
+        self._entrar_frame_notas(driver)
+
+    def _iniciar_pesquisa_aba(self, driver, aba, fila, pesquisas):
+        """
+        Dispara na aba a pesquisa do próximo mês da fila, se houver.
+        
+        Args:
+            driver: WebDriver do Selenium
+            aba (str): Handle da aba
+            fila (list): Meses ainda não pesquisados (consumida)
+            pesquisas (dict): Pesquisas em andamento por aba (atualizado)
+        """
+        while fila:
+            month = fila.pop(0)
+            try:
+                self._ativar_aba(driver, aba)
+                pesquisas[aba] = (month, self._pesquisar_mes(driver, month))
+                return
+            except Exception as e:
+                logger.error(f"Erro ao pesquisar mês {month}: {e}")
+                self.meses_com_falha.append(month)
 
     def _processar_todas_paginas(self, driver, month):
         """
         Processa todas as páginas de resultados para um mês.
         
+        Se o mês tiver checkpoint de uma execução interrompida, avança até a
+        página gravada e continua após a última nota tratada nela.
+        
         Args:
             driver: WebDriver do Selenium
             month (str): Nome do mês sendo processado
         """
-        pagina_atual = 1
+        self._emitir("mes_iniciado", mes=month)
+        total_antes = len(self.arquivos_salvos)
+        inicio_mes = time.monotonic()
+        
+        if self.paginacao == "completa":
+            self._expandir_pagina_resultados(driver, month)
+        total_paginas = total_paginas_datatables(driver)
+        
+        pagina_atual, ultima_nota = self._avancar_ate_checkpoint(driver, month)
         
         while True:
-            print(f"Processando página {pagina_atual} do mês {month}")
+            self._emitir("pagina", mes=month, pagina=pagina_atual, total_paginas=total_paginas)
+            self._salvar_checkpoint(month, pagina_atual, ultima_nota)
+            
+            with contexto_log(pagina=pagina_atual, fase="pagina"):
+                logger.info(f"Processando página {pagina_atual} do mês {month}")
+                inicio_pagina = time.monotonic()
+                
+                # Processar notas da página atual
+                self._processar_notas_pagina_atual(driver, month, pagina_atual, ultima_nota)
+                duracao = time.monotonic() - inicio_pagina
+                DURACAO_FASES.observar(duracao, fase="pagina")
+                logger.info(
+                    f"Página {pagina_atual} do mês {month} processada",
+                    extra={"duracao": round(duracao, 3)},
+                )
             
-            # Processar notas da página atual
-            self._processar_notas_pagina_atual(driver, month)
+            ultima_nota = None
             
             # Verificar se há próxima página
             if not self._ir_para_proxima_pagina(driver):
-                print(f"Todas as páginas do mês {month} foram processadas")
+                logger.info(f"Todas as páginas do mês {month} foram processadas")
                 break
                 
             pagina_atual += 1
+        
+        duracao = time.monotonic() - inicio_mes
+        DURACAO_FASES.observar(duracao, fase="mes")
+        logger.info(
+            f"Mês {month}: {len(self.arquivos_salvos) - total_antes} arquivos",
+            extra={"duracao": round(duracao, 3)},
+        )
+        self._concluir_checkpoint(month)
+        self._emitir("mes_concluido", mes=month, total_arquivos=len(self.arquivos_salvos) - total_antes)
+
+    def _avancar_ate_checkpoint(self, driver, month):
+        """
+        Posiciona a tabela na página gravada no checkpoint do mês, se houver.
+        
+        Args:
+            driver: WebDriver do Selenium posicionado no frame da tabela
+            month (str): Nome do mês sendo processado
+            
+        Returns:
+            tuple: (página atual, última nota já tratada nela ou None)
+        """
+        checkpoint = self.checkpoints.obter(self._chave_tenant, month) if self.checkpoints else None
+        if checkpoint is None or checkpoint["concluido"]:
+            return 1, None
+        if checkpoint["paginacao"] != self.paginacao:
+            # Com outro modo de paginação, o mesmo número de página exibe outras notas
+            logger.warning(
+                f"Checkpoint do mês {month} gravado com paginação '{checkpoint['paginacao']}', "
+                f"reiniciando da primeira página"
+            )
+            return 1, None
+        
+        logger.info(f"Retomando mês {month} na página {checkpoint['pagina']}, após a nota {checkpoint['numero_nota']}")
+        self._emitir("mes_retomado", mes=month, pagina=checkpoint["pagina"], numero=checkpoint["numero_nota"])
+        # Notas das páginas puladas já estão na pasta do mês
+        self._incluir_arquivos_do_mes(month)
+        pagina = 1
+        while pagina < checkpoint["pagina"]:
+            if not self._ir_para_proxima_pagina(driver):
+                logger.warning(f"Mês {month} tem apenas {pagina} páginas, retomando da última")
+                return pagina, None
+            pagina += 1
+        return pagina, checkpoint["numero_nota"]
+
+    def _incluir_arquivos_do_mes(self, month):
+        """
+        Inclui no resultado os PDFs já organizados de um mês pulado na retomada.
+        
+        Args:
+            month (str): Nome do mês
+        """
+        pasta_mes = os.path.join(self.output_dir, month)
+        if not os.path.isdir(pasta_mes):
+            return
+        for nome in sorted(os.listdir(pasta_mes)):
+            if nome.lower().endswith(".pdf"):
+                self.arquivos_salvos.append(os.path.join(pasta_mes, nome))
+
+    def _salvar_checkpoint(self, month, pagina, numero_nota=None):
+        """
+        Grava o progresso do mês; uma falha ao gravar não interrompe a extração.
+        
+        Args:
+            month (str): Nome do mês sendo processado
+            pagina (int): Página em processamento
+            numero_nota (str): Última nota tratada na página
+        """
+        if self.checkpoints is None:
+            return
+        try:
+            self.checkpoints.salvar(self._chave_tenant, month, pagina, numero_nota, self.paginacao)
+        except Exception as e:
+            logger.error(f"Erro ao gravar checkpoint do mês {month}: {e}")
+
+    def _concluir_checkpoint(self, month):
+        """Marca o mês como concluído no checkpoint."""
+        if self.checkpoints is None:
+            return
+        try:
+            self.checkpoints.concluir(self._chave_tenant, month)
+        except Exception as e:
+            logger.error(f"Erro ao concluir checkpoint do mês {month}: {e}")
+
+    def _expandir_pagina_resultados(self, driver, month):
+        """
+        Amplia a página do DataTables para exibir todo o resultado da pesquisa.
+        
+        Evita os cliques de paginação: um mês com várias páginas passa a ser lido
+        com uma única pesquisa. Se o DataTables não estiver acessível, mantém a
+        paginação pela interface.
+        
+        Args:
+            driver: WebDriver do Selenium posicionado no frame da tabela
+            month (str): Nome do mês sendo processado
+        """
+        try:
+            resultado = driver.execute_script(_SCRIPT_EXPANDIR_PAGINA, self.paginacao_max_linhas)
+            if resultado is None:
+                logger.warning("API do DataTables indisponível, usando paginação pela interface")
+                return
+            if resultado["alterada"]:
+                logger.info(f"Exibindo {resultado['linhas']} de {resultado['total']} notas do mês {month} em uma página")
+                self.esperas.aguardar("linhas_exibidas", driver, resultado["linhas"])
+        except Exception as e:
+            logger.error(f"Erro ao ampliar a página de resultados, usando paginação pela interface: {e}")
 
-    def _processar_notas_pagina_atual(self, driver, month):
+    def _processar_notas_pagina_atual(self, driver, month, pagina=1, ultima_nota=None):
         """
         Processa todas as notas fiscais da página atual.
         
+        Cada nota concluída avança o checkpoint do mês. Um erro na página (tabela
+        que não carrega, navegador encerrado) é propagado, deixando o checkpoint
+        na última nota concluída para a retomada.
+        
         Args:
             driver: WebDriver do Selenium
             month (str): Nome do mês sendo processado
+            pagina (int): Número da página atual
+            ultima_nota (str): Última nota tratada antes de uma interrupção; as
+                notas até ela são puladas
+            
+        Raises:
+            Exception: Se a página não puder ser processada
         """
         canceled_logger, error_logger = setup_logging()
         
         try:
             # Localizar tabela de notas
-            tabela = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "tblNfse"))
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "#tblNfse tbody tr"))
             )
             
-            tbody = WebDriverWait(tabela, 5).until(
-                EC.presence_of_element_located((By.TAG_NAME, "tbody"))
-            )
+            registros = self._extrair_registros_pagina(driver)
             
-            rows = WebDriverWait(tbody, 5).until(
-                EC.presence_of_all_elements_located((By.TAG_NAME, "tr"))
-            )
+            logger.info(f"Encontradas {len(registros)} notas na página atual")
             
-            print(f"Encontradas {len(rows)} notas na página atual")
+            # Retomada: as notas até a última tratada antes da interrupção já foram processadas
+            numeros = [registro["numero_nota"] for registro in registros]
+            if ultima_nota is not None and ultima_nota in numeros:
+                registros = registros[numeros.index(ultima_nota) + 1:]
+                logger.info(f"Retomando após a nota {ultima_nota}: {len(registros)} notas restantes na página")
             
-            for i, row in enumerate(rows):
-                try:
-                    # Pular linhas canceladas
-                    if "canceled" in row.get_attribute("class"):
-
-                        print(f"Nota cancelada encontrada, registrando...")
-                        colunas = row.find_elements(By.TAG_NAME, "td")
-                        numero_nota = colunas[1].text.strip()
-                        data_emissao = colunas[4].text.strip().split()[0]
-                        valor_nota = colunas[5].text.strip().replace(".", "").replace(",", "_")
+            # Notas cuja URL de impressão foi descoberta, baixadas em lote ao final
+            pendentes_url = []
+            # Primeira nota da página ainda não armazenada (limite do checkpoint)
+            proxima_checkpoint = 0
+            
+            for i, registro in enumerate(registros):
+                with contexto_log(numero_nota=registro["numero_nota"], fase="nota"):
+                    try:
+                        # Pular linhas canceladas
+                        if registro["cancelada"]:
+
+                            logger.info(f"Nota cancelada encontrada, registrando...")
+                            
+                            # Registrar no log de notas canceladas
+                            canceled_logger.info(f"Nota {registro['numero_nota']} do mês {month} está cancelada - Data: {registro['data_emissao']}, Valor: {registro['valor_nota']}")
+                            self._emitir("nota_cancelada", mes=month, numero=registro["numero_nota"], data_emissao=registro["data_emissao"])
+                            NOTAS_CANCELADAS.inc()
                         
-                        # Registrar no log de notas canceladas
-                        canceled_logger.info(f"Nota {numero_nota} do mês {month} está cancelada - Data: {data_emissao}, Valor: {valor_nota}")
-                    
-                    print(f"Processando nota {i+1}/{len(rows)}")
-                    self._processar_nota_individual(driver, row, month)
-                    
-                except Exception as e:
-                    colunas = row.find_elements(By.TAG_NAME, "td")
-                    numero_nota = colunas[1].text.strip()
-                    data_emissao = colunas[4].text.strip().split()[0]
-                    valor_nota = colunas[5].text.strip()
-                    error_msg = f"Erro ao processar nota {numero_nota} - Data: {data_emissao}, Valor: {valor_nota} Motivo: {str(e)}"
-                    print(error_msg)
-                    error_logger.error(error_msg)
-                    continue
+                        # Pular notas já armazenadas e inalteradas desde a última execução
+                        if self._nota_sincronizada(registro, month):
+                            logger.info(f"Nota {registro['numero_nota']} já sincronizada, pulando download")
+                            self._emitir("nota_sincronizada", mes=month, numero=registro["numero_nota"])
+                            NOTAS.inc(resultado="sincronizada")
+                            registro["armazenada"] = True
+                            proxima_checkpoint = self._avancar_checkpoint_pagina(
+                                month, pagina, registros, proxima_checkpoint
+                            )
+                            continue
+                        
+                        if self.modo_download in ("http", "cdp") and registro["colunas"] >= 6:
+                            registro["url_impressao"] = self._descobrir_url_impressao(registro)
+                            if registro["url_impressao"]:
+                                pendentes_url.append(registro)
+                                continue
+                            logger.warning(f"URL de impressão não encontrada para nota {registro['numero_nota']}, usando modal")
+                        
+                        logger.info(f"Processando nota {i+1}/{len(registros)}")
+                        registro["armazenada"] = self._processar_nota_individual(driver, registro, month)
+                        proxima_checkpoint = self._avancar_checkpoint_pagina(
+                            month, pagina, registros, proxima_checkpoint
+                        )
+                        
+                    except Exception as e:
+                        error_msg = f"Erro ao processar nota {registro['numero_nota']} - Data: {registro['data_emissao']}, Valor: {registro['valor_original']} Motivo: {str(e)}"
+                        logger.error(error_msg)
+                        error_logger.error(error_msg)
+                        self._emitir("erro", mes=month, numero=registro["numero_nota"], mensagem=str(e))
+                        NOTAS.inc(resultado="erro")
+                        continue
+            
+            if pendentes_url and self.modo_download == "cdp":
+                self._imprimir_notas_cdp(driver, pendentes_url, month)
+            elif pendentes_url:
+                self._baixar_notas_http(driver, pendentes_url, month)
+            if pendentes_url:
+                self._avancar_checkpoint_pagina(month, pagina, registros, proxima_checkpoint)
                     
         except Exception as e:
             error_msg = f"Erro ao processar notas da página: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             error_logger.error(error_msg)
+            self._emitir("erro", mes=month, mensagem=error_msg)
+            raise
+
+    def _avancar_checkpoint_pagina(self, month, pagina, registros, inicio):
+        """
+        Avança o checkpoint até a última nota armazenada sem lacunas na página.
+        
+        Notas com erro, não armazenadas ou com download em lote pendente
+        interrompem o avanço: a retomada recomeça por elas.
+        
+        Args:
+            month (str): Nome do mês sendo processado
+            pagina (int): Número da página atual
+            registros (list): Registros da página, na ordem da tabela
+            inicio (int): Primeira nota ainda não incluída no checkpoint
+            
+        Returns:
+            int: Primeira nota ainda não armazenada
+        """
+        fim = inicio
+        while fim < len(registros) and registros[fim].get("armazenada"):
+            fim += 1
+        if fim > inicio:
+            self._salvar_checkpoint(month, pagina, registros[fim - 1]["numero_nota"])
+        return fim
+
+    def _extrair_registros_pagina(self, driver):
+        """
+        Lê todas as linhas da tabela de resultados com um único execute_script.
+        
+        Evita uma requisição ao WebDriver para cada get_attribute, find_elements
+        e .text de cada linha.
+        
+        Args:
+            driver: WebDriver do Selenium posicionado no frame da tabela
+            
+        Returns:
+            list: Registros (dict) com numero_nota, data_emissao, valor_nota,
+                valor_original, cancelada, colunas, indice e botao
+        """
+        registros = []
+        for linha in driver.execute_script(_SCRIPT_EXTRAIR_LINHAS) or []:
+            data_partes = linha["data_emissao"].split()
+            registros.append({
+                "indice": linha["indice"],
+                "colunas": linha["colunas"],
+                "numero_nota": linha["numero"],
+                "data_emissao": data_partes[0] if data_partes else "",
+                "valor_original": linha["valor"],
+                "valor_nota": linha["valor"].replace(".", "").replace(",", "_"),
+                "cancelada": bool(linha["cancelada"]),
+                "botao": linha["botao"],
+                "atributos_botao": linha["atributos_botao"] or {},
+                "url_base": linha["url_base"],
+            })
+        return registros
+
+    def _descobrir_url_impressao(self, registro):
+        """
+        Descobre a URL do PDF de uma nota a partir dos atributos do botão de impressão.
+        
+        Usa, nesta ordem, um link explícito no botão (data-url, data-href, href,
+        formaction) ou o modelo URL_IMPRESSAO_NFSE preenchido com os atributos
+        data-* do botão e o número da nota.
+        
+        Args:
+            registro (dict): Dados da linha extraídos por _extrair_registros_pagina
+            
+        Returns:
+            str: URL absoluta do PDF ou None se não for possível descobrir
+        """
+        atributos = registro["atributos_botao"]
+        for chave in ("data-url", "data-href", "href", "formaction"):
+            if atributos.get(chave):
+                return urljoin(registro["url_base"], atributos[chave])
+        
+        if self.url_impressao:
+            valores = {
+                nome[len("data-"):].replace("-", "_"): valor
+                for nome, valor in atributos.items()
+                if nome.startswith("data-")
+            }
+            valores["numero"] = registro["numero_nota"]
+            try:
+                return urljoin(registro["url_base"], self.url_impressao.format(**valores))
+            except (KeyError, IndexError) as e:
+                logger.warning(f"Atributo ausente para montar URL de impressão: {e}")
+        return None
+
+    def _baixar_notas_http(self, driver, registros, month):
+        """
+        Baixa os PDFs das notas em paralelo via HTTP e organiza os arquivos.
+        
+        Args:
+            driver: WebDriver do Selenium (fonte dos cookies da sessão)
+            registros (list): Registros com a chave url_impressao preenchida
+            month (str): Nome do mês sendo processado
+        """
+        _, error_logger = setup_logging()
+        
+        if self._cliente_http is None:
+            self._cliente_http = ClienteDownloadHttp(
+                max_paralelo=self.downloads_http_paralelos,
+                timeout=self.timeout_download,
+            )
+        # Atualiza os cookies a cada página, pois o portal pode renová-los
+        self._cliente_http.sincronizar_sessao(driver)
+        
+        logger.info(f"Baixando {len(registros)} notas via HTTP")
+        tarefas = [(indice, registro["url_impressao"]) for indice, registro in enumerate(registros)]
+        # baixar_varios é um gerador: consumido dentro do bloco para medir o lote inteiro
+        with DURACAO_FASES.medir(fase="download_lote_http"):
+            resultados = list(self._cliente_http.baixar_varios(
+                tarefas, self.download_dir, referer=registros[0]["url_base"]
+            ))
+        for indice, arquivo_baixado, erro in resultados:
+            registro = registros[indice]
+            with contexto_log(numero_nota=registro["numero_nota"], fase="nota"):
+                if erro is not None:
+                    error_msg = f"Erro ao processar nota {registro['numero_nota']} - Data: {registro['data_emissao']}, Valor: {registro['valor_original']} Motivo: {str(erro)}"
+                    logger.error(error_msg)
+                    error_logger.error(error_msg)
+                    self._emitir("erro", mes=month, numero=registro["numero_nota"], mensagem=str(erro))
+                    NOTAS.inc(resultado="erro")
+                    continue
+                caminho_final = self._organizar_arquivo_baixado(
+                    month, registro["data_emissao"], registro["numero_nota"], registro["valor_nota"], arquivo_baixado
+                )
+                registro["armazenada"] = self._concluir_nota(registro, month, caminho_final)
+
+    def _imprimir_notas_cdp(self, driver, registros, month):
+        """
+        Gera os PDFs das notas em memória com o comando CDP Page.printToPDF.
+        
+        Abre uma aba auxiliar, carrega a URL de impressão de cada nota e grava o
+        PDF diretamente no caminho final, sem diretório de download nem polling.
+        
+        Args:
+            driver: WebDriver do Selenium
+            registros (list): Registros com a chave url_impressao preenchida
+            month (str): Nome do mês sendo processado
+        """
+        _, error_logger = setup_logging()
+        
+        aba_principal = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+        try:
+            for registro in registros:
+                with contexto_log(numero_nota=registro["numero_nota"], fase="nota"):
+                    try:
+                        logger.info(f"Gerando PDF da nota {registro['numero_nota']} via CDP")
+                        with DURACAO_FASES.medir(fase="download_nota"):
+                            driver.get(registro["url_impressao"])
+                            WebDriverWait(driver, self.timeout_download).until(
+                                lambda d: d.execute_script("return document.readyState") == "complete"
+                            )
+                            resultado = driver.execute_cdp_cmd("Page.printToPDF", {
+                                "printBackground": True,
+                                "preferCSSPageSize": True,
+                                "paperWidth": 8.27,    # A4 em polegadas
+                                "paperHeight": 11.69,
+                                "marginTop": 0,
+                                "marginBottom": 0,
+                                "marginLeft": 0,
+                                "marginRight": 0,
+                            })
+                        caminho_final = self._caminho_final(
+                            month, registro["data_emissao"], registro["numero_nota"], registro["valor_nota"]
+                        )
+                        self._salvar_pdf(base64.b64decode(resultado["data"]), caminho_final)
+                        registro["armazenada"] = self._concluir_nota(registro, month, caminho_final)
+                    except Exception as e:
+                        error_msg = f"Erro ao processar nota {registro['numero_nota']} - Data: {registro['data_emissao']}, Valor: {registro['valor_original']} Motivo: {str(e)}"
+                        logger.error(error_msg)
+                        error_logger.error(error_msg)
+                        self._emitir("erro", mes=month, numero=registro["numero_nota"], mensagem=str(e))
+                        NOTAS.inc(resultado="erro")
+        finally:
+            # Volta para a aba da pesquisa e restaura o contexto de frames
+            driver.close()
+            driver.switch_to.window(aba_principal)
+            self._entrar_frame_notas(driver)
+
+    def _nota_sincronizada(self, registro, month):
+        """
+        Consulta o manifesto para saber se a nota pode ser pulada.
+        
+        PDFs salvos antes do manifesto existir são validados e incorporados ao
+        armazém na primeira verificação; arquivos vazios, truncados ou que não
+        são PDF são removidos e a nota é baixada novamente. Se a nota mudou (valor ou cancelamento), o PDF antigo é
+        descartado para que o novo download o substitua.
+        
+        Args:
+            registro (dict): Dados da linha extraídos por _extrair_registros_pagina
+            month (str): Nome do mês sendo processado
+            
+        Returns:
+            bool: True se a nota já está armazenada e inalterada
+        """
+        if self.manifesto is None or registro["colunas"] < 6:
+            return False
+        
+        sincronizada, anterior = self.manifesto.sincronizada(
+            self._chave_tenant, registro["numero_nota"], registro["data_emissao"],
+            registro["valor_nota"], registro["cancelada"],
+        )
+        if sincronizada and not self.manifesto.conteudo_integro(anterior):
+            # Conteúdo diferente do registrado: arquivo corrompido, baixar de novo
+            logger.warning(f"PDF da nota {registro['numero_nota']} corrompido, baixando novamente")
+            sincronizada = False
+        if sincronizada:
+            self.arquivos_salvos.append(anterior["caminho"])
+            return True
+        
+        if anterior is None:
+            caminho_final = self._caminho_final(
+                month, registro["data_emissao"], registro["numero_nota"], registro["valor_nota"]
+            )
+            if os.path.exists(caminho_final):
+                if not pdf_valido(caminho_final):
+                    logger.warning(f"PDF existente da nota {registro['numero_nota']} inválido, baixando novamente")
+                    os.remove(caminho_final)
+                    return False
+                sha256 = None
+                if self.armazem is not None:
+                    sha256 = self.armazem.armazenar_arquivo(caminho_final, caminho_final)
+                self._registrar_no_manifesto(registro, month, caminho_final, sha256)
+                self.arquivos_salvos.append(caminho_final)
+                return True
+        elif os.path.exists(anterior["caminho"]):
+            logger.warning(f"Nota {registro['numero_nota']} desatualizada, substituindo {anterior['caminho']}")
+            os.remove(anterior["caminho"])
+        return False
 
-    def _processar_nota_individual(self, driver, row, month):
+    def _concluir_nota(self, registro, month, caminho_final):
+        """
+        Finaliza uma nota baixada: registra no manifesto, publica o evento e agenda o upload.
+        
+        Args:
+            registro (dict): Dados da linha extraídos por _extrair_registros_pagina
+            month (str): Nome do mês sendo processado
+            caminho_final (str): Caminho do PDF; None quando a organização falhou
+            
+        Returns:
+            bool: True se o PDF foi armazenado
+        """
+        if not caminho_final or not os.path.exists(caminho_final):
+            return False
+        sha256 = calcular_sha256(caminho_final)
+        self._registrar_no_manifesto(registro, month, caminho_final, sha256)
+        self._emitir(
+            "nota_baixada",
+            mes=month,
+            numero=registro["numero_nota"],
+            arquivo=os.path.relpath(caminho_final, self.output_dir),
+            sha256=sha256,
+        )
+        NOTAS.inc(resultado="baixada")
+        if self.s3_bucket:
+            self._agendar_upload_s3(caminho_final, sha256)
+        return True
+
+    def _obter_enviador_s3(self):
+        """Cria sob demanda o enviador de arquivos para o S3."""
+        if self._enviador_s3 is None:
+            self._enviador_s3 = EnviadorS3(self.s3_bucket, max_paralelo=self.uploads_s3_paralelos)
+        return self._enviador_s3
+
+    def _chave_s3(self, caminho_final):
+        """
+        Monta a chave do objeto no S3 espelhando a organização local.
+        
+        Args:
+            caminho_final (str): Caminho do PDF organizado
+            
+        Returns:
+            str: Chave no formato <prefixo>/<tenant>/<mês>/<arquivo>.pdf
+        """
+        relativo = os.path.relpath(caminho_final, self.output_dir).replace(os.sep, "/")
+        partes = [self.s3_prefixo.strip("/"), sanitize_filename(self.tenant) if self.tenant else "", relativo]
+        return "/".join(parte for parte in partes if parte)
+
+    def _agendar_upload_s3(self, caminho_final, sha256=None):
+        """
+        Agenda o envio do PDF ao S3, em paralelo com o restante do scraping.
+        
+        Conteúdos já enviados com a mesma chave (conforme o manifesto) são
+        pulados sem consultar o bucket.
+        
+        Args:
+            caminho_final (str): Caminho do PDF organizado
+            sha256 (str): Hash do conteúdo do PDF
+        """
+        chave = self._chave_s3(caminho_final)
+        if sha256 and self.manifesto is not None and self.manifesto.envio_s3(chave) == sha256:
+            self._emitir("arquivo_enviado_s3", chave=chave, enviado=False)
+            return
+        
+        def ao_concluir(chave, enviado, erro):
+            if erro is not None:
+                _, error_logger = setup_logging()
+                error_logger.error(f"Erro ao enviar {chave} para o S3: {erro}")
+                self._emitir("erro", arquivo=chave, mensagem=f"Upload S3: {erro}")
+                return
+            if sha256 and self.manifesto is not None:
+                self.manifesto.registrar_envio_s3(chave, sha256)
+            self._emitir("arquivo_enviado_s3", chave=chave, enviado=enviado)
+        
+        try:
+            self._obter_enviador_s3().agendar(caminho_final, chave, ao_concluir)
+        except Exception as e:
+            logger.error(f"Erro ao agendar upload para o S3: {e}")
+
+    def _encerrar_enviador_s3(self):
+        """Aguarda os envios pendentes ao S3 e libera o enviador."""
+        if self._enviador_s3 is not None:
+            estatisticas = self._enviador_s3.aguardar()
+            logger.info(f"Uploads para o S3: {estatisticas}")
+            self._enviador_s3.encerrar()
+            self._enviador_s3 = None
+
+    def _registrar_no_manifesto(self, registro, month, caminho_final, sha256=None):
+        """
+        Registra no manifesto uma nota cujo PDF foi armazenado.
+        
+        Args:
+            registro (dict): Dados da linha extraídos por _extrair_registros_pagina
+            month (str): Nome do mês sendo processado
+            caminho_final (str): Caminho do PDF; None quando a organização falhou
+            sha256 (str): Hash do conteúdo (calculado se omitido)
+        """
+        if self.manifesto is None or not caminho_final or not os.path.exists(caminho_final):
+            return
+        self.manifesto.registrar(
+            self._chave_tenant, registro["numero_nota"], registro["data_emissao"],
+            registro["valor_nota"], registro["cancelada"], month, caminho_final,
+            sha256 or calcular_sha256(caminho_final),
+        )
+
+    def _encerrar_cliente_http(self):
+        """Fecha o cliente HTTP, se tiver sido criado."""
+        if self._cliente_http is not None:
+            self._cliente_http.encerrar()
+            self._cliente_http = None
+
+    def _processar_nota_individual(self, driver, registro, month):
         """
         Processa uma nota fiscal individual (download e renomeação).
         
         Args:
             driver: WebDriver do Selenium
-            row: Elemento da linha da tabela
+            registro (dict): Dados da linha extraídos por _extrair_registros_pagina
             month (str): Nome do mês sendo processado
+            
+        Returns:
+            bool: True se o PDF foi armazenado
         """
         canceled_logger, error_logger = setup_logging()
         
         try:
             # Extrair dados da nota
-            colunas = row.find_elements(By.TAG_NAME, "td")
-            if len(colunas) < 6:
+            if registro["colunas"] < 6:
                 error_msg = "Linha sem dados suficientes, pulando..."
-                print(error_msg)
+                logger.error(error_msg)
                 error_logger.error(error_msg)
-                return
+                return False
             
-            numero_nota = colunas[1].text.strip()
-            data_emissao = colunas[4].text.strip().split()[0]
-            valor_nota = colunas[5].text.strip().replace(".", "").replace(",", "_")
+            numero_nota = registro["numero_nota"]
+            data_emissao = registro["data_emissao"]
+            valor_nota = registro["valor_nota"]
             
-            print(f"Processando nota: {numero_nota}")
+            logger.info(f"Processando nota: {numero_nota}")
             
             # Fazer download da nota
-            self._fazer_download_nota(driver, row)
+            arquivo_baixado = self._fazer_download_nota(driver, registro)
             
             # Renomear e organizar arquivo
-            self._organizar_arquivo_baixado(month, data_emissao, numero_nota, valor_nota)
+            caminho_final = self._organizar_arquivo_baixado(month, data_emissao, numero_nota, valor_nota, arquivo_baixado)
+            return self._concluir_nota(registro, month, caminho_final)
             
         except Exception as e:
             error_msg = f"Erro ao processar nota individual {numero_nota if 'numero_nota' in locals() else 'desconhecida'}: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             error_logger.error(error_msg)
             raise
 
-    def _fazer_download_nota(self, driver, row):
+    @medir_fase("download_nota")
+    def _fazer_download_nota(self, driver, registro):
         """
         Executa o download de uma nota fiscal específica.
         
         Args:
             driver: WebDriver do Selenium
-            row: Elemento da linha da tabela contendo o botão de download
+            registro (dict): Dados da linha, incluindo o botão de impressão
+            
+        Returns:
+            str: Caminho do PDF baixado
         """
-        # Clicar no botão de imprimir
-        botao_imprimir = row.find_element(
-            By.CSS_SELECTOR, 
-            "td.action-column button[data-action='imprimir']"
-        )
-        botao_imprimir.click()
+        botao_imprimir = registro["botao"]
+        if botao_imprimir is None:
+            raise Exception("Botão de impressão não encontrado na linha")
         
-        # Confirmar impressão no modal
-        botao_confirmar = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, ".modal-footer button.btn-success"))
-        )
-        botao_confirmar.click()
-        time.sleep(1)
+        # Observa o diretório antes do clique para identificar exatamente o novo arquivo
+        with ObservadorDownloads(self.download_dir) as observador:
+            # Clicar no botão de imprimir
+            botao_imprimir.click()
+            
+            # Confirmar impressão no modal
+            botao_confirmar = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".modal-footer button.btn-success"))
+            )
+            botao_confirmar.click()
+            
+            # Fechar modal
+            botao_fechar = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".modal-footer button.btn-secondary"))
+            )
+            botao_fechar.click()
+            
+            # Aguardar o PDF ser gravado por completo e o modal sumir da tela
+            arquivo_baixado = observador.aguardar(timeout=self.timeout_download)
+            self.esperas.aguardar("modal_fechado", driver)
+            return arquivo_baixado
+
+    def _caminho_final(self, month, data_emissao, numero_nota, valor_nota):
+        """
+        Monta o caminho definitivo do PDF de uma nota, criando a pasta do mês.
         
-        # Fechar modal
-        botao_fechar = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, ".modal-footer button.btn-secondary"))
-        )
-        botao_fechar.click()
+        Args:
+            month (str): Nome do mês
+            data_emissao (str): Data de emissão da nota
+            numero_nota (str): Número da nota fiscal
+            valor_nota (str): Valor da nota fiscal
+            
+        Returns:
+            str: Caminho no formato <output_dir>/<mês>/<data>_<numero>_<valor>.pdf
+        """
+        pasta_mes = os.path.join(self.output_dir, month)
+        os.makedirs(pasta_mes, exist_ok=True)
         
-        # Aguardar download completar
-        time.sleep(2)
+        nome_arquivo = f"{data_emissao}_{numero_nota}_{valor_nota}.pdf"
+        return os.path.join(pasta_mes, self.sanitize_filename(nome_arquivo))
 
-    def _organizar_arquivo_baixado(self, month, data_emissao, numero_nota, valor_nota):
+    def _salvar_pdf(self, conteudo, caminho_final):
+        """
+        Grava o conteúdo de um PDF gerado em memória no caminho final.
+        
+        Args:
+            conteudo (bytes): Bytes do PDF
+            caminho_final (str): Caminho definitivo do arquivo
+        """
+        if self.armazem is not None:
+            sha256 = self.armazem.armazenar_bytes(conteudo, caminho_final)
+            logger.info(f"Arquivo armazenado: {caminho_final} (sha256 {sha256[:12]})")
+        elif os.path.exists(caminho_final):
+            logger.info(f"Arquivo já existe: {caminho_final}")
+        else:
+            # Grava em arquivo temporário e renomeia para nunca expor PDF parcial
+            temporario = caminho_final + ".part"
+            with open(temporario, "wb") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho_final)
+            logger.info(f"Arquivo salvo com sucesso: {caminho_final}")
+        self.arquivos_salvos.append(caminho_final)
+
+    @medir_fase("organizar_arquivo")
+    def _organizar_arquivo_baixado(self, month, data_emissao, numero_nota, valor_nota, arquivo_baixado=None):
         """
         Organiza o arquivo baixado renomeando e movendo para pasta correta.
         
@@ -472,74 +1594,87 @@ class ScrapNotaFiscal:
             data_emissao (str): Data de emissão da nota
             numero_nota (str): Número da nota fiscal
             valor_nota (str): Valor da nota fiscal
+            arquivo_baixado (str): Caminho do PDF baixado; se omitido, usa o
+                PDF mais recente do diretório de download
+                
+        Returns:
+            str: Caminho final do arquivo ou None se não foi possível organizá-lo
         """
         try:
-            # Criar pasta do mês se não existir
-            pasta_mes = os.path.join(self.download_dir, month)
-            os.makedirs(pasta_mes, exist_ok=True)
-            print(f"Pasta do mês verificada: {pasta_mes}")
+            # Caminho final do arquivo (cria a pasta do mês se não existir)
+            caminho_final = self._caminho_final(month, data_emissao, numero_nota, valor_nota)
             
-            # Encontrar arquivos PDF no diretório principal (não nas subpastas)
-            arquivos_pdf = []
-            for item in os.listdir(self.download_dir):
-                item_path = os.path.join(self.download_dir, item)
-                # Só considera arquivos PDF que estão diretamente no diretório principal
-                if os.path.isfile(item_path) and item.lower().endswith('.pdf'):
-                    arquivos_pdf.append(item_path)
-            
-            if not arquivos_pdf:
-                print("Nenhum arquivo PDF encontrado no diretório principal para organizar")
-                return
-            
-            # Encontrar o arquivo mais recente
-            arquivo_mais_recente = max(arquivos_pdf, key=os.path.getctime)
-            print(f"Arquivo mais recente detectado: {arquivo_mais_recente}")
+            if arquivo_baixado:
+                arquivo_mais_recente = arquivo_baixado
+            else:
+                # Encontrar arquivos PDF no diretório principal (não nas subpastas)
+                arquivos_pdf = []
+                for item in os.listdir(self.download_dir):
+                    item_path = os.path.join(self.download_dir, item)
+                    # Só considera arquivos PDF que estão diretamente no diretório principal
+                    if os.path.isfile(item_path) and item.lower().endswith('.pdf'):
+                        arquivos_pdf.append(item_path)
+                
+                if not arquivos_pdf:
+                    logger.warning("Nenhum arquivo PDF encontrado no diretório principal para organizar")
+                    return
+                
+                # Encontrar o arquivo mais recente
+                arquivo_mais_recente = max(arquivos_pdf, key=os.path.getctime)
+                logger.info(f"Arquivo mais recente detectado: {arquivo_mais_recente}")
             
             # Verificar se o arquivo ainda existe (pode ter sido movido por processo anterior)
             if not os.path.exists(arquivo_mais_recente):
-                print(f"Arquivo {arquivo_mais_recente} não existe mais, pulando...")
+                logger.warning(f"Arquivo {arquivo_mais_recente} não existe mais, pulando...")
                 return
             
-            # Criar nome sanitizado
-            nome_arquivo = f"{data_emissao}_{numero_nota}_{valor_nota}.pdf"
-            nome_sanitizado = self.sanitize_filename(nome_arquivo)
-            
-            # Caminho final do arquivo
-            caminho_final = os.path.join(pasta_mes, nome_sanitizado)
+            # Com o armazém por conteúdo, o PDF recém-baixado sempre substitui o
+            # do caminho final (que pode estar corrompido ou desatualizado)
+            if self.armazem is not None:
+                sha256 = self.armazem.armazenar_arquivo(arquivo_mais_recente, caminho_final)
+                logger.info(f"Arquivo armazenado: {caminho_final} (sha256 {sha256[:12]})")
+                self.arquivos_salvos.append(caminho_final)
+                return caminho_final
             
             # Verificar se arquivo com mesmo nome já existe
             if os.path.exists(caminho_final):
-                print(f"Arquivo já existe: {caminho_final}")
+                logger.info(f"Arquivo já existe: {caminho_final}")
+                self.arquivos_salvos.append(caminho_final)
                 # Remove o arquivo baixado pois já temos uma cópia
                 try:
                     os.remove(arquivo_mais_recente)
-                    print(f"Arquivo duplicado removido: {arquivo_mais_recente}")
+                    logger.info(f"Arquivo duplicado removido: {arquivo_mais_recente}")
                 except Exception as e:
-                    print(f"Erro ao remover arquivo duplicado: {e}")
+                    logger.error(f"Erro ao remover arquivo duplicado: {e}")
+                return caminho_final
             else:
                 # Mover e renomear o arquivo
                 try:
                     shutil.move(arquivo_mais_recente, caminho_final)
-                    print(f"Arquivo organizado com sucesso: {caminho_final}")
+                    logger.info(f"Arquivo organizado com sucesso: {caminho_final}")
+                    self.arquivos_salvos.append(caminho_final)
+                    return caminho_final
                 except Exception as e:
-                    print(f"Erro ao mover arquivo com shutil.move: {e}")
+                    logger.error(f"Erro ao mover arquivo com shutil.move: {e}")
                     # Fallback: tentar com copy + remove
                     try:
                         shutil.copy2(arquivo_mais_recente, caminho_final)
                         os.remove(arquivo_mais_recente)
-                        print(f"Arquivo copiado e original removido: {caminho_final}")
+                        logger.info(f"Arquivo copiado e original removido: {caminho_final}")
+                        self.arquivos_salvos.append(caminho_final)
+                        return caminho_final
                     except Exception as e2:
-                        print(f"Erro no fallback copy+remove: {e2}")
+                        logger.error(f"Erro no fallback copy+remove: {e2}")
                 
         except Exception as e:
-            print(f"Erro geral ao organizar arquivo: {e}")
+            logger.error(f"Erro geral ao organizar arquivo: {e}")
             # Em caso de erro, pelo menos tenta listar o que está no diretório
             try:
-                print("Conteúdo do diretório de download:")
+                logger.info("Conteúdo do diretório de download:")
                 for item in os.listdir(self.download_dir):
                     item_path = os.path.join(self.download_dir, item)
                     tipo = "PASTA" if os.path.isdir(item_path) else "ARQUIVO"
-                    print(f"  {tipo}: {item}")
+                    logger.info(f"  {tipo}: {item}")
             except:
                 pass
 
@@ -552,74 +1687,260 @@ class ScrapNotaFiscal:
             
         Returns:
             bool: True se conseguiu ir para próxima página, False se não há mais páginas
+            
+        Raises:
+            Exception: Se a navegação falhar (o mês fica pendente no checkpoint)
         """
+        _, error_logger = setup_logging()
+        
         try:
+            # Sem botão Próximo (tabela com uma única página) não há o que navegar
+            botoes = driver.find_elements(By.CSS_SELECTOR, "li.paginate_button.page-item.next")
+            if not botoes or "disabled" in (botoes[0].get_attribute("class") or ""):
+                return False
+            
             next_button = WebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, "li.paginate_button.page-item.next"))
             )
-            
-            if "disabled" in next_button.get_attribute("class"):
-                return False
-            
+            referencia = capturar_referencia_tabela(driver)
             next_button.click()
-            time.sleep(2)
+            self.esperas.aguardar("pagina_alterada", driver, referencia)
             return True
             
         except Exception as e:
-            print(f"Erro ao navegar para próxima página: {e}")
-            return True
+            # Interrompe a paginação: continuar poderia reprocessar a mesma página indefinidamente
+            error_msg = f"Erro ao navegar para próxima página: {e}"
+            logger.error(error_msg)
+            error_logger.error(error_msg)
+            raise
 
-    def get_info(self, driver, login, password, months):
+    def get_info(self, driver, login, password, months, retomar=False):
         """
         Método principal para extrair informações de notas fiscais.
         
+        O progresso de cada mês é gravado em checkpoints. Meses interrompidos por
+        erro são retomados ao final, com novo login, a partir da página e nota
+        gravadas (até RETOMADAS_MAX vezes). Com retomar=True, uma nova execução
+        (ex.: após a queda do Chrome) pula os meses já concluídos e continua os
+        demais de onde pararam; sem ele, os meses recomeçam da primeira página.
+        
         Args:
             driver: WebDriver do Selenium
             login (str): Login/CNPJ do usuário
             password (str): Senha do usuário
             months (list): Lista de meses para processar
-        """
-        try:
-            print(f"Iniciando extração para os meses: {months}")
-            
-            # Acessar sistema
-            driver.get(self.url)
-            
-            # Fazer login
-            self.fazer_login(driver, login, password)
+            retomar (bool): Continua a partir dos checkpoints da execução anterior
             
-            # Navegar para área de NFS-e
-            self._navegar_para_nfse(driver)
+        Returns:
+            list: Caminhos dos PDFs organizados nesta execução
             
-            # Obter referência do frame principal
-            frame_main = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.ID, "fraMain"))
-            )
-            # Navegar para o frame de filtros
-            driver.switch_to.frame(frame_main)
-            iframe_notas = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_frmObras"))
-            )
-            driver.switch_to.frame(iframe_notas)
-            # Processar cada mês
-            for month in months:
+        Raises:
+            ExtracaoIncompleta: Se algum mês seguir interrompido após as retomadas
+        """
+        # Mesma chave no manifesto e nos checkpoints: logins sem tenant não se misturam
+        self._chave_tenant = self.tenant or login
+        self.meses_com_falha = []
+        rastreador = None
+        if self.rastrear_webdriver_dir:
+            rastreador = RastreadorComandos()
+            rastreador.instalar(driver)
+        
+        with contexto_log(tenant=self._chave_tenant):
+            try:
+                logger.info(f"Iniciando extração para os meses: {months}")
+                months = self._preparar_checkpoints(months, retomar)
+                
+                # Direcionar downloads para o diretório exclusivo desta execução
+                self._configurar_download(driver)
+                
+                # Reaproveitar sessão anterior ou fazer login completo
+                with contexto_log(fase="login"):
+                    self._autenticar(driver, login, password)
+                
+                with contexto_log(fase="navegacao"):
+                    # Navegar para área de NFS-e
+                    self._navegar_para_nfse(driver)
+                    
+                    # Navegar para o frame de filtros
+                    self._entrar_frame_notas(driver)
+                
+                if self.abas_por_sessao > 1 and len(months) > 1:
+                    # Pesquisas de meses diferentes intercaladas entre abas
+                    self._processar_meses_em_abas(driver, months)
+                else:
+                    self._processar_meses(driver, months)
+                
+                self._retomar_meses_com_falha(driver, login, password)
+                # Uma nota retomada pode ter sido incluída mais de uma vez
+                arquivos = list(dict.fromkeys(self.arquivos_salvos))
+                if self.meses_com_falha:
+                    raise ExtracaoIncompleta(self.meses_com_falha, arquivos)
+                
+                logger.info("Extração concluída para todos os meses!")
+                logger.info(f"Tempos de espera: {self.esperas.resumo()}")
+                return arquivos
+                
+            except Exception as e:
+                logger.error(f"Erro durante extração: {e}")
+                raise
+            finally:
+                self._encerrar_cliente_http()
+                self._encerrar_enviador_s3()
+                if rastreador is not None:
+                    self._salvar_perfil_webdriver(rastreador, login, months)
+
+    def _processar_meses(self, driver, months):
+        """
+        Processa os meses em sequência na aba atual.
+        
+        Args:
+            driver: WebDriver do Selenium no frame da tabela
+            months (list): Meses a processar
+        """
+        for month in months:
+            with contexto_log(mes=month, fase="mes"):
                 try:
-                    print(f"\n=== Iniciando processamento do mês: {month} ===")
+                    logger.info(f"=== Iniciando processamento do mês: {month} ===")
                     self._processar_mes(driver, month)
-                    print(f"=== Mês {month} processado com sucesso ===\n")
+                    logger.info(f"=== Mês {month} processado com sucesso ===")
                 except Exception as e:
-                    print(f"Erro ao processar mês {month}: {e}")
+                    logger.error(f"Erro ao processar mês {month}: {e}")
+                    self._emitir("erro", mes=month, mensagem=str(e))
+                    self.meses_com_falha.append(month)
                     continue
+
+    def _preparar_checkpoints(self, months, retomar):
+        """
+        Define os meses da execução conforme os checkpoints.
+        
+        Args:
+            months (list): Meses solicitados
+            retomar (bool): Se True, pula os meses concluídos e mantém o progresso
+                dos demais; se False, descarta os checkpoints dos meses
             
-            print("Extração concluída para todos os meses!")
-            
+        Returns:
+            list: Meses a processar
+        """
+        if self.checkpoints is None:
+            if retomar:
+                logger.warning("Checkpoints desabilitados (CHECKPOINT_DB vazio), processando todos os meses")
+            return months
+        
+        if not retomar:
+            self.checkpoints.limpar(self._chave_tenant, months)
+            return months
+        
+        concluidos = []
+        for month in months:
+            checkpoint = self.checkpoints.obter(self._chave_tenant, month)
+            if checkpoint is not None and checkpoint["concluido"]:
+                concluidos.append(month)
+        if concluidos:
+            logger.info(f"Retomada: meses já concluídos {concluidos} serão pulados")
+            self._emitir("retomada", meses_concluidos=concluidos)
+            for month in concluidos:
+                self._incluir_arquivos_do_mes(month)
+        return [month for month in months if month not in concluidos]
+
+    def _retomar_meses_com_falha(self, driver, login, password):
+        """
+        Refaz o login e continua, a partir do checkpoint, os meses interrompidos.
+        
+        Args:
+            driver: WebDriver do Selenium
+            login (str): Login/CNPJ do usuário
+            password (str): Senha do usuário
+        """
+        for tentativa in range(1, self.retomadas_max + 1):
+            if not self.meses_com_falha:
+                return
+            pendentes, self.meses_com_falha = self.meses_com_falha, []
+            logger.warning(f"Retomando meses interrompidos {pendentes} (tentativa {tentativa}/{self.retomadas_max})")
+            self._emitir("retomada", meses=pendentes, tentativa=tentativa)
+            try:
+                driver.switch_to.default_content()
+                with contexto_log(fase="login"):
+                    self._autenticar(driver, login, password)
+                with contexto_log(fase="navegacao"):
+                    self._navegar_para_nfse(driver)
+                    self._entrar_frame_notas(driver)
+            except Exception as e:
+                # Navegador encerrado ou portal fora do ar: os checkpoints ficam para retomar=True
+                logger.error(f"Erro ao refazer login para retomada: {e}")
+                self.meses_com_falha = pendentes
+                break
+            self._processar_meses(driver, pendentes)
+        if self.meses_com_falha:
+            logger.error(f"Meses não concluídos após as retomadas: {self.meses_com_falha}")
+
+    def _salvar_perfil_webdriver(self, rastreador, login, months):
+        """
+        Remove o rastreador do driver e grava o perfil da execução.
+        
+        Args:
+            rastreador (RastreadorComandos): Rastreador instalado em get_info
+            login (str): Login/CNPJ do usuário
+            months (list): Meses processados
+        """
+        rastreador.desinstalar()
+        try:
+            rastreador.salvar_perfil(
+                self.rastrear_webdriver_dir,
+                sanitize_filename(self._chave_tenant),
+                extra={
+                    "tenant": self._chave_tenant,
+                    "meses": months,
+                    "modo_download": self.modo_download,
+                    "paginacao": self.paginacao,
+                    "notas_salvas": len(self.arquivos_salvos),
+                    # Tempo de relógio nas esperas nomeadas (inclui os intervalos entre polls)
+                    "esperas_motor": self.esperas.resumo(),
+                },
+            )
         except Exception as e:
-            print(f"Erro durante extração: {e}")
-            raise
+            logger.error(f"Erro ao salvar perfil WebDriver: {e}")
+
+    def _entrar_frame_notas(self, driver):
+        """
+        Posiciona o driver no iframe de pesquisa de notas (fraMain > frmObras).
+        
+        Args:
+            driver: WebDriver do Selenium
+        """
+        driver.switch_to.default_content()
+        
+        # Obter referência do frame principal
+        frame_main = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.ID, "fraMain"))
+        )
+        driver.switch_to.frame(frame_main)
+        iframe_notas = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_frmObras"))
+        )
+        driver.switch_to.frame(iframe_notas)
+
+    def _configurar_download(self, driver):
+        """
+        Aponta os downloads do navegador para o diretório desta instância via CDP.
+        
+        Necessário quando o driver foi aberto com outro diretório (ex.: pool de
+        navegadores). A impressão silenciosa em PDF continua usando o diretório
+        definido nas preferências ao abrir o navegador.
+        
+        Args:
+            driver: WebDriver do Selenium
+        """
+        try:
+            driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+                "behavior": "allow",
+                "downloadPath": self.download_dir,
+            })
+        except Exception as e:
+            logger.warning(f"Não foi possível configurar diretório de download via CDP: {e}")
 
     def solve_captcha(self, img_element):
         """
-        Resolve captcha usando serviço CapSolver.
+        Resolve captcha usando o backend configurado em CAPTCHA_BACKEND.
         
         Args:
             img_element: Elemento da imagem do captcha
@@ -627,172 +1948,104 @@ class ScrapNotaFiscal:
         Returns:
             str: Texto do captcha resolvido
         """
-        try:
-            # Criar pasta temporária
-            os.makedirs("temp", exist_ok=True)
-            
-            # Capturar screenshot do captcha
-            image_path = "temp/captcha.jpeg"
-            img_element.screenshot(image_path)
-            
-            # Converter para base64
-            base64_string = self.image_to_base64(image_path)
-            
-            # Resolver captcha
-            capsolver.api_key = self.captcha_key
-            solution = capsolver.solve({
-                "type": "ImageToTextTask",
-                "body": base64_string,
-                "module": "common",
-                "borderless": True,
-                "mediaSize": {
-                    "height_microns": 297000,   # A4
-                    "width_microns": 210000,
-                    "name": "ISO_A4",
-                    "custom_display_name": "A4"
-                }
-            })
-            
-            print(f"Captcha resolvido: {solution['text']}")
-            return solution["text"]
+        return self.resolver_captcha(self.capturar_captcha(img_element))
 
-        except Exception as e:
-            raise Exception(f"Erro ao resolver captcha: {e}")
+    def capturar_captcha(self, img_element):
+        """
+        Captura a imagem do captcha em memória, sem passar pelo disco.
         
-    def image_to_base64(self, image_path):
+        Com CAPTCHA_DEBUG_DIR definido, também grava a imagem em um arquivo
+        de nome único para depuração.
+        
+        Args:
+            img_element: Elemento da imagem do captcha
+            
+        Returns:
+            str: Imagem PNG codificada em Base64
         """
-        Converte uma imagem para string Base64.
+        base64_string = img_element.screenshot_as_base64
+        
+        if self.captcha_debug_dir:
+            os.makedirs(self.captcha_debug_dir, exist_ok=True)
+            nome = f"captcha_{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.png"
+            with open(os.path.join(self.captcha_debug_dir, nome), "wb") as arquivo:
+                arquivo.write(base64.b64decode(base64_string))
+        
+        return base64_string
 
+    @medir_fase("captcha")
+    def resolver_captcha(self, base64_string):
+        """
+        Resolve o captcha a partir da imagem em Base64 (seguro para outra thread).
+        
         Args:
-            image_path (str): Caminho para o arquivo de imagem
-
+            base64_string (str): Imagem do captcha codificada em Base64
+            
         Returns:
-            str: String Base64 da imagem ou None se erro
+            str: Texto do captcha resolvido
         """
         try:
-            with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode("utf-8")
-                return encoded_string
-        except FileNotFoundError:
-            print(f"Erro: Arquivo não encontrado: {image_path}")
-            return None
+            captcha_text = self.solucionador.resolver(base64_string)
+            
+            logger.info(f"Captcha resolvido ({self.solucionador.nome}): {captcha_text}")
+            return captcha_text
+
         except Exception as e:
-            print(f"Erro ao converter imagem: {e}")
-            return None
+            FALHAS_CAPTCHA.inc(motivo="erro")
+            raise Exception(f"Erro ao resolver captcha: {e}")
         
-    def abrir_navegador(self, profile_dir):
+    def abrir_navegador(self, profile_dir, download_dir=None):
         """
         Configura e abre o navegador Chrome com configurações otimizadas.
         
         Args:
             profile_dir (str): Diretório do perfil do Chrome
+            download_dir (str): Diretório de download (padrão: self.download_dir)
             
         Returns:
             WebDriver: Instância do driver do Chrome configurado
         """
-        try:
-            os.makedirs(profile_dir, exist_ok=True)
-            print(f"Usando perfil do Chrome: {profile_dir}")
-
-            options = Options()
-            options.add_argument(f"user-data-dir={os.path.abspath(profile_dir)}")
-            options.add_argument("--disable-download-notification")
-            options.add_argument("--kiosk-printing")
-            
-            # Configurações para download automático de PDFs
-            prefs = {
-                "download.default_directory": self.download_dir,
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "plugins.always_open_pdf_externally": True,
-                "print.always_print_silent": True,
-                "printing.default_destination_selection_rules": {
-                    "kind": "local",
-                    "namePattern": "Save as PDF",
-                },
-                "savefile.default_directory": self.download_dir,
-                "browser.download.manager.showWhenStarting": False,
-                "browser.helperApps.neverAsk.saveToDisk": "application/pdf",
-                "print_printer_pdf_printer_settings": {
-                    "dpi": 300,
-                    "use_system_print_dialog": False,
-                },
-                "print.default_destination_selection_rules": {
-                    "kind": "local",
-                    "namePattern": "Save as PDF",
-                },
-                "print.print_preview_sticky_settings.appState": json.dumps({
-                    "recentDestinations": [{
-                        "id": "Save as PDF",
-                        "origin": "local",
-                        "account": "",
-                    }],
-                    "selectedDestinationId": "Save as PDF",
-                    "version": 2,
-                    "isHeaderFooterEnabled": False,
-                    "isLandscapeEnabled": False,
-                    "marginsType": 2,  # 0=default, 1=minimum, 2=custom
-                    "customMargins": {
-                        "top": 0,
-                        "bottom": 0,
-                        "left": 0,
-                        "right": 0
-                    },
-                    "scaling": 100,  # 100% da página
-                    "scalingType": 3,  # 3=fit to page
-                    "scalingPdf": 100,
-                    "isScalingDisabled": False,
-                    "isColorEnabled": False,
-                    "isDuplexEnabled": False,
-                    "duplex": 0,
-                    "isLandscapeEnabled": False,
-                    "pagesPerSheet": 1,
-                    "copies": 1,
-                    "defaultPrinter": "Save as PDF",
-                    "borderless": True,
-                    "mediaSize": {
-                        "height_microns": 297000,   # A4
-                        "width_microns": 210000,
-                        "name": "ISO_A4",
-                        "custom_display_name": "A4"
-                    }
-                })
-            }
-            options.add_experimental_option("prefs", prefs)
-            
-            driver = webdriver.Chrome(options=options)
-            print("Navegador Chrome iniciado com sucesso!")
-            return driver
-
-        except Exception as e:
-            raise Exception(f"Erro ao abrir navegador: {e}")
+        return iniciar_chrome(profile_dir, download_dir or self.download_dir)
     
     def kill_chrome_instances(self):
         """Encerra todas as instâncias do Chrome em execução."""
         try:
             subprocess.run(["taskkill", "/F", "/IM", "chrome.exe"], check=True)
-            print("Instâncias do Chrome encerradas com sucesso.")
+            logger.info("Instâncias do Chrome encerradas com sucesso.")
         except subprocess.CalledProcessError as e:
-            print(f"Erro ao encerrar Chrome: {e}")
+            logger.error(f"Erro ao encerrar Chrome: {e}")
             
     def upload_to_s3(self, file_path, s3_key):
         """
-        Faz upload de um arquivo para o bucket S3 (funcionalidade desabilitada).
+        Faz upload de um arquivo para o bucket S3 configurado em S3_BUCKET.
+        
+        Arquivos já presentes no bucket com o mesmo conteúdo (ETag) não são
+        reenviados.
         
         Args:
             file_path (str): Caminho local do arquivo
             s3_key (str): Chave do arquivo no S3
             
         Returns:
-            bool: Sempre False (funcionalidade desabilitada)
+            bool: True se o arquivo está no bucket, False em caso de erro
         """
-        print("Upload para S3 está desabilitado nesta versão")
-        return False
+        if not self.s3_bucket:
+            logger.warning("S3_BUCKET não definido no arquivo .env, upload desabilitado")
+            return False
+        try:
+            if self._obter_enviador_s3().enviar(file_path, s3_key):
+                logger.info(f"Arquivo enviado para o S3: {s3_key}")
+            else:
+                logger.info(f"Arquivo já atualizado no S3: {s3_key}")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao enviar {file_path} para o S3: {e}")
+            return False
 
     def process_month(self, month):
         """Processa todas as notas de um mês específico"""
-        print(f"\n=== Iniciando processamento do mês: {month} ===")
-        print(f"Processando mês: {month}")
+        logger.info(f"=== Iniciando processamento do mês: {month} ===")
+        logger.info(f"Processando mês: {month}")
         
         # Configuração dos loggers
         canceled_logger, error_logger = setup_logging()
@@ -809,7 +2062,7 @@ class ScrapNotaFiscal:
             page = 1
             while True:
                 try:
-                    print(f"Processando página {page} do mês {month}")
+                    logger.info(f"Processando página {page} do mês {month}")
                     
                     # Encontra todas as linhas da tabela
                     rows = WebDriverWait(self.driver, 10).until(
@@ -820,15 +2073,15 @@ class ScrapNotaFiscal:
                     note_rows = [row for row in rows if row.get_attribute("ng-repeat") is not None]
                     
                     if not note_rows:
-                        print(f"Nenhuma nota encontrada na página {page}")
+                        logger.info(f"Nenhuma nota encontrada na página {page}")
                         break
                     
-                    print(f"Encontradas {len(note_rows)} notas na página atual")
+                    logger.info(f"Encontradas {len(note_rows)} notas na página atual")
                     
                     # Processa cada nota
                     for i, row in enumerate(note_rows, 1):
                         try:
-                            print(f"Processando nota {i}/{len(note_rows)}")
+                            logger.info(f"Processando nota {i}/{len(note_rows)}")
                             
                             # Verifica se a nota está cancelada
                             status_element = row.find_element(By.CSS_SELECTOR, "td:nth-child(4)")
@@ -846,36 +2099,36 @@ class ScrapNotaFiscal:
                             
                         except Exception as e:
                             error_logger.error(f"Erro ao processar nota na página {page}: {str(e)}")
-                            print(f"Erro ao processar nota: {str(e)}")
+                            logger.error(f"Erro ao processar nota: {str(e)}")
                             continue
                     
                     # Tenta ir para a próxima página
                     try:
                         next_button = self.driver.find_element(By.CSS_SELECTOR, "button[ng-click='selectPage(page + 1, $event)']")
                         if "disabled" in next_button.get_attribute("class"):
-                            print("Última página alcançada")
+                            logger.info("Última página alcançada")
                             break
                         next_button.click()
                         time.sleep(2)
                         page += 1
                     except NoSuchElementException:
-                        print("Botão de próxima página não encontrado")
+                        logger.warning("Botão de próxima página não encontrado")
                         break
                         
                 except TimeoutException:
-                    print(f"Timeout ao processar página {page}")
+                    logger.warning(f"Timeout ao processar página {page}")
                     break
                 except Exception as e:
                     error_logger.error(f"Erro ao processar página {page}: {str(e)}")
-                    print(f"Erro ao processar página {page}: {str(e)}")
+                    logger.error(f"Erro ao processar página {page}: {str(e)}")
                     break
                     
-            print(f"Todas as páginas do mês {month} foram processadas")
-            print(f"=== Mês {month} processado com sucesso ===\n")
+            logger.info(f"Todas as páginas do mês {month} foram processadas")
+            logger.info(f"=== Mês {month} processado com sucesso ===")
             
         except Exception as e:
             error_logger.error(f"Erro ao processar mês {month}: {str(e)}")
-            print(f"Erro ao processar mês {month}: {str(e)}")
+            logger.error(f"Erro ao processar mês {month}: {str(e)}")
 
     def process_note(self, month):
         """Processa uma nota fiscal individual"""
@@ -885,7 +2138,7 @@ class ScrapNotaFiscal:
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div[ng-show='nfse.numero']"))
             ).text.split(": ")[1]
             
-            print(f"Processando nota: {nota_num}")
+            logger.info(f"Processando nota: {nota_num}")
             
             # Obtém o valor da nota
             valor_element = WebDriverWait(self.driver, 10).until(
@@ -905,7 +2158,7 @@ class ScrapNotaFiscal:
         except Exception as e:
             _, error_logger = setup_logging()
             error_logger.error(f"Erro ao processar nota {nota_num if 'nota_num' in locals() else 'desconhecida'}: {str(e)}")
-            print(f"Erro ao processar nota: {str(e)}")
+            logger.error(f"Erro ao processar nota: {str(e)}")
 
 
 # Exemplo de uso da classe
@@ -930,13 +2183,13 @@ if __name__ == "__main__":
         scraper.get_info(driver, CNPJ_LOGIN, SENHA, MESES_PROCESSAR)
         
     except Exception as e:
-        print(f"Erro durante execução: {e}")
+        logger.error(f"Erro durante execução: {e}")
     finally:
         # Limpeza
         if driver:
             driver.quit()
         scraper.kill_chrome_instances()
-        print("Processo finalizado!")
+        logger.info("Processo finalizado!")
 
                 
 
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CacheSessoes:
+    """
+    Armazena em disco os cookies de sessões autenticadas, indexados por login.
+
+    Permite reaproveitar um login recente (evitando captcha e digitação) até que
+    a sessão expire. Cada entrada tem TTL a partir do login e o cache descarta
+    as entradas menos usadas quando excede o número máximo de sessões.
+    """
+
+    def __init__(self, diretorio="sessoes", ttl=3600, max_sessoes=500):
+        """
+        Args:
+            diretorio (str): Diretório onde as sessões são gravadas
+            ttl (float): Validade de uma sessão em segundos, contada do login
+            max_sessoes (int): Quantidade máxima de sessões mantidas
+        """
+        self.diretorio = diretorio
+        self.ttl = ttl
+        self.max_sessoes = max_sessoes
+        self._lock = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, login):
+        """Caminho do arquivo da sessão (o login não aparece em texto claro)."""
+        chave = hashlib.sha256(login.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def _ler(self, caminho):
+        """Lê uma entrada do disco, retornando None se inexistente ou corrompida."""
+        try:
+            with open(caminho, "r", encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar(self, caminho, entrada):
+        """Grava uma entrada de forma atômica e legível apenas pelo usuário."""
+        temporario = caminho + ".tmp"
+        descritor = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            json.dump(entrada, arquivo)
+        os.replace(temporario, caminho)
+
+    def _expirada(self, entrada, agora):
+        """Indica se a entrada ultrapassou o TTL."""
+        return agora - entrada.get("criado_em", 0) > self.ttl
+
+    def obter(self, login):
+        """
+        Retorna a sessão válida de um login.
+
+        Args:
+            login (str): Login/CNPJ do usuário
+
+        Returns:
+            dict: Entrada com "cookies" e "url_menu", ou None se ausente/expirada
+        """
+        caminho = self._caminho(login)
+        with self._lock:
+            entrada = self._ler(caminho)
+            if entrada is None:
+                return None
+            agora = time.time()
+            if self._expirada(entrada, agora):
+                self._remover(caminho)
+                return None
+            entrada["ultimo_uso"] = agora
+            self._gravar(caminho, entrada)
+            return entrada
+
+    def salvar(self, login, cookies, url_menu):
+        """
+        Registra a sessão obtida após um login bem-sucedido.
+
+        Args:
+            login (str): Login/CNPJ do usuário
+            cookies (list): Cookies retornados por driver.get_cookies()
+            url_menu (str): URL da página principal (frames de menu) após o login
+        """
+        agora = time.time()
+        entrada = {
+            "cookies": cookies,
+            "url_menu": url_menu,
+            "criado_em": agora,
+            "ultimo_uso": agora,
+        }
+        with self._lock:
+            self._gravar(self._caminho(login), entrada)
+            self._evictar()
+
+    def invalidar(self, login):
+        """
+        Remove a sessão de um login (ex.: rejeitada pelo portal).
+
+        Args:
+            login (str): Login/CNPJ do usuário
+        """
+        with self._lock:
+            self._remover(self._caminho(login))
+
+    def _remover(self, caminho):
+        """Apaga o arquivo de uma sessão, ignorando se já não existir."""
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+    def _evictar(self):
+        """Remove sessões expiradas e, se necessário, as menos usadas recentemente."""
+        agora = time.time()
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".json"):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            entrada = self._ler(caminho)
+            if entrada is None or self._expirada(entrada, agora):
+                self._remover(caminho)
+            else:
+                entradas.append((entrada.get("ultimo_uso", 0), caminho))
+
+        excedente = len(entradas) - self.max_sessoes
+        if excedente > 0:
+            entradas.sort()
+            for _, caminho in entradas[:excedente]:
+                self._remover(caminho)
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger("nfse.s3")
+
+# Arquivos a partir deste tamanho são enviados em partes (multipart upload)
+LIMITE_MULTIPART = 8 * 1024 * 1024
+TAMANHO_PARTE = 8 * 1024 * 1024
+
+# Clientes boto3 são thread-safe: um por configuração no processo
+_clientes = {}
+_lock_clientes = threading.Lock()
+
+
+def obter_cliente_s3(max_conexoes=10, tentativas=5):
+    """
+    Retorna o cliente S3 compartilhado, configurado pelo .env.
+
+    Usa AWS_ACCESS_KEY, AWS_SECRET_KEY e AWS_REGION; S3_ENDPOINT_URL permite
+    apontar para um serviço compatível local (ex.: MinIO) em testes.
+
+    Args:
+        max_conexoes (int): Tamanho do pool de conexões HTTP
+        tentativas (int): Máximo de tentativas por requisição (com backoff)
+
+    Returns:
+        botocore.client.S3: Cliente S3
+    """
+    endpoint = os.getenv("S3_ENDPOINT_URL") or None
+    chave = (endpoint, max_conexoes, tentativas)
+    with _lock_clientes:
+        if chave not in _clientes:
+            _clientes[chave] = boto3.client(
+                "s3",
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY") or None,
+                aws_secret_access_key=os.getenv("AWS_SECRET_KEY") or None,
+                region_name=os.getenv("AWS_REGION") or None,
+                endpoint_url=endpoint,
+                config=Config(
+                    max_pool_connections=max_conexoes,
+                    retries={"max_attempts": tentativas, "mode": "standard"},
+                ),
+            )
+        return _clientes[chave]
+
+
+def calcular_etag(caminho, limite_multipart=LIMITE_MULTIPART, tamanho_parte=TAMANHO_PARTE):
+    """
+    Calcula o ETag que o S3 atribui ao arquivo enviado com a configuração informada.
+
+    Args:
+        caminho (str): Arquivo local
+        limite_multipart (int): Tamanho a partir do qual o envio é feito em partes
+        tamanho_parte (int): Tamanho de cada parte
+
+    Returns:
+        str: MD5 do arquivo ou, em envios multipart, MD5 dos MD5s das partes
+            seguido de "-<quantidade de partes>"
+    """
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, "rb") as arquivo:
+        if tamanho < limite_multipart:
+            return hashlib.md5(arquivo.read()).hexdigest()
+        digests = []
+        while True:
+            parte = arquivo.read(tamanho_parte)
+            if not parte:
+                break
+            digests.append(hashlib.md5(parte).digest())
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+class EnviadorS3:
+    """
+    Envia arquivos ao S3 em segundo plano, em paralelo com o scraping.
+
+    Cada arquivo é enviado por um pool de threads assim que é agendado; arquivos
+    grandes usam multipart upload e arquivos cujo ETag no bucket já corresponde
+    ao conteúdo local não são reenviados.
+    """
+
+    def __init__(self, bucket, max_paralelo=4, cliente=None):
+        """
+        Args:
+            bucket (str): Nome do bucket de destino
+            max_paralelo (int): Número máximo de envios simultâneos
+            cliente: Cliente S3 (padrão: obter_cliente_s3())
+        """
+        self.bucket = bucket
+        self.cliente = cliente or obter_cliente_s3(max_conexoes=max_paralelo * 2)
+        self.config_transferencia = TransferConfig(
+            multipart_threshold=LIMITE_MULTIPART,
+            multipart_chunksize=TAMANHO_PARTE,
+            max_concurrency=2,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="nfse-s3")
+        self._futuros = []
+        self._lock = threading.Lock()
+        self.estatisticas = {"enviados": 0, "ignorados": 0, "erros": 0}
+
+    def enviar(self, caminho, chave):
+        """
+        Envia um arquivo de forma síncrona, pulando-o se já estiver no bucket.
+
+        Args:
+            caminho (str): Arquivo local
+            chave (str): Chave do objeto no bucket
+
+        Returns:
+            bool: True se o arquivo foi enviado, False se já estava atualizado
+        """
+        if self._mesmo_etag(caminho, chave):
+            return False
+        self.cliente.upload_file(
+            caminho,
+            self.bucket,
+            chave,
+            ExtraArgs={"ContentType": "application/pdf"},
+            Config=self.config_transferencia,
+        )
+        return True
+
+    def _mesmo_etag(self, caminho, chave):
+        """Indica se o objeto já existe no bucket com o mesmo conteúdo."""
+        try:
+            objeto = self.cliente.head_object(Bucket=self.bucket, Key=chave)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return objeto.get("ETag", "").strip('"') == calcular_etag(caminho)
+
+    def agendar(self, caminho, chave, ao_concluir=None):
+        """
+        Agenda o envio de um arquivo no pool de threads.
+
+        Args:
+            caminho (str): Arquivo local
+            chave (str): Chave do objeto no bucket
+            ao_concluir (callable): Chamado como ao_concluir(chave, enviado, erro)
+
+        Returns:
+            Future: Futuro do envio
+        """
+        futuro = self._executor.submit(self._enviar_registrando, caminho, chave, ao_concluir)
+        with self._lock:
+            self._futuros.append(futuro)
+        return futuro
+
+    def _enviar_registrando(self, caminho, chave, ao_concluir):
+        """Executa o envio no worker e contabiliza o resultado."""
+        enviado, erro = False, None
+        try:
+            enviado = self.enviar(caminho, chave)
+        except Exception as e:
+            erro = e
+            logger.error(f"Erro ao enviar {chave} para o S3: {e}")
+        with self._lock:
+            campo = "erros" if erro else ("enviados" if enviado else "ignorados")
+            self.estatisticas[campo] += 1
+        if ao_concluir is not None:
+            ao_concluir(chave, enviado, erro)
+        return enviado
+
+    def aguardar(self):
+        """
+        Aguarda os envios agendados terminarem.
+
+        Returns:
+            dict: Quantidade de arquivos enviados, ignorados e com erro
+        """
+        with self._lock:
+            futuros, self._futuros = self._futuros, []
+        wait(futuros)
+        with self._lock:
+            return dict(self.estatisticas)
+
+    def encerrar(self):
+        """Aguarda os envios pendentes e libera o pool de threads."""
+        self.aguardar()
+        self._executor.shutdown(wait=True)
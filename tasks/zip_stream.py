@@ -0,0 +1,71 @@
+import os
+import zipfile
+
+# Tamanho dos blocos lidos dos PDFs e entregues ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+
+class _SaidaEmBlocos:
+    """
+    Destino somente-escrita do ZipFile que acumula os bytes gerados.
+
+    Não implementa seek/tell, então o zipfile grava cada entrada com data
+    descriptor, sem precisar voltar no arquivo: o ZIP pode ser enviado
+    enquanto é gerado.
+    """
+
+    def __init__(self):
+        self._blocos = []
+
+    def write(self, dados):
+        self._blocos.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        """Retorna e descarta os bytes acumulados desde a última chamada."""
+        dados = b"".join(self._blocos)
+        self._blocos = []
+        return dados
+
+
+def gerar_zip(diretorio_base, arquivos, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera um ZIP com os arquivos informados, em blocos, sem montá-lo em memória ou disco.
+
+    Args:
+        diretorio_base (str): Diretório ao qual os caminhos são relativos
+        arquivos (list): Caminhos relativos (viram os nomes dentro do ZIP)
+        tamanho_bloco (int): Tamanho da leitura de cada arquivo
+
+    Yields:
+        bytes: Trechos consecutivos do arquivo ZIP
+    """
+    base = os.path.realpath(diretorio_base)
+    saida = _SaidaEmBlocos()
+    with zipfile.ZipFile(saida, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as arquivo_zip:
+        for relativo in arquivos:
+            caminho = os.path.realpath(os.path.join(base, relativo))
+            # Ignora caminhos fora do diretório do cliente ou removidos do disco
+            if os.path.commonpath([base, caminho]) != base or not os.path.isfile(caminho):
+                continue
+            info = zipfile.ZipInfo.from_file(caminho, arcname=relativo.replace(os.sep, "/"))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(caminho, "rb") as origem, arquivo_zip.open(info, mode="w") as destino:
+                while True:
+                    bloco = origem.read(tamanho_bloco)
+                    if not bloco:
+                        break
+                    destino.write(bloco)
+                    dados = saida.retirar()
+                    if dados:
+                        yield dados
+            dados = saida.retirar()
+            if dados:
+                yield dados
+    # Diretório central, gravado ao fechar o ZIP
+    dados = saida.retirar()
+    if dados:
+        yield dados